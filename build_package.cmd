@@ -44,4 +44,5 @@ echo Using "%SEVENZIP%" to pack
     -xr!.git ^
     -xr@.gitignore ^
     -x!.gitignore ^
+    -xr!tests ^
     *
@@ -0,0 +1,180 @@
+"""Builds the catalog of windows apps without Keypirinha
+
+Runs the catalog pipeline (package source, manifest parsing, resource resolution and icon selection) and writes one
+JSON object per application to the output. Timings and counters of the phases, including the number of opened files
+and scanned directories, are written to stderr.
+Run it from the plugin directory, e.g.
+
+    python -m lib.cli --source "C:\\Program Files\\WindowsApps" --output catalog.ndjson
+
+Outside of Windows the UI language has to be given and resource strings can only be resolved by a custom resolver, a
+function that takes an indirect string "@{<pri file>? <resource path>}" and returns the resolved string or None:
+
+    python -m lib.cli --source packages.json --language 1033 --resolver none
+"""
+import argparse
+import collections
+import concurrent.futures
+import importlib
+import json
+import os
+import sys
+import time
+
+from . import helper
+from . import icons
+from . import sources
+from . import timing
+
+# packages read ahead of the oldest one not written yet, per worker thread
+READ_AHEAD_PER_WORKER = 4
+
+
+def create_source(source):
+    """Creates the package source from a source name, a JSON file or a directory of packages
+    """
+    if source in sources.SOURCE_NAMES:
+        return sources.create_source(source)
+    if os.path.isdir(source):
+        return sources.DirectoryPackageSource(source)
+    return sources.JsonPackageSource(source)
+
+
+def _resolve_nothing(resource_descriptor):
+    return None
+
+
+def load_resolver(resolver):
+    """Returns the resolver function for "shlwapi", "none" or a function given as "module:function"
+    """
+    if resolver == "shlwapi":
+        return helper.load_indirect_string
+    if resolver == "none":
+        return _resolve_nothing
+    module_name, _, function_name = resolver.partition(":")
+    if not module_name or not function_name:
+        raise ValueError("resolver has to be shlwapi, none or module:function, not '{}'".format(resolver))
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def read_package(props, stats, asset_index, preferred_contrast):
+    """Reads the applications of a package and selects their logos, runs in a worker thread
+
+    Returns the catalog records of the applications.
+    """
+    start = time.perf_counter()
+    package = helper.AppXPackage(props, stats)
+    records = []
+    for app in package.apps():
+        best_variants = []
+        if app.icon_path:
+            with stats.phase("icon selection"):
+                best_variants = icons.best_variants(asset_index.variants(app.icon_path),
+                                                    preferred_contrast,
+                                                    icons.logo_base_size(app.icon_path))
+        record = app.to_dict()
+        record["package_full_name"] = package.PackageFullName
+        record["logos"] = [[size, variant.path] for size, variant in best_variants]
+        records.append(record)
+    stats.package(package.Name, time.perf_counter() - start)
+    return records
+
+
+def write_records(future, output, stats):
+    try:
+        records = future.result()
+    except Exception as ex:
+        stats.count("failed packages")
+        print("Failed to read package:", ex, file=sys.stderr)
+        return
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False))
+        output.write("\n")
+    stats.count("apps", len(records))
+
+
+def build_catalog(package_source, output, stats, workers=4, preferred_contrast=""):
+    """Streams the packages of the source to worker threads and writes the records in the order of the packages
+
+    Only a few packages per worker are read ahead, so the records of a source that is faster than the workers are not
+    all kept in memory.
+    """
+    asset_index = icons.AssetIndex()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        packages = iter(package_source.packages())
+        while True:
+            with stats.phase("package source"):
+                props = next(packages, None)
+            if props is None:
+                break
+            stats.count("packages")
+            pending.append(executor.submit(read_package, props, stats, asset_index, preferred_contrast))
+            while pending and (pending[0].done() or len(pending) >= workers * READ_AHEAD_PER_WORKER):
+                write_records(pending.popleft(), output, stats)
+        while pending:
+            write_records(pending.popleft(), output, stats)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m lib.cli", description="Builds the catalog of windows apps")
+    parser.add_argument("--source", default="auto",
+                        help="auto, registry, powershell, a JSON file of packages or a directory of packages "
+                             "(default: auto)")
+    parser.add_argument("--output", help="file the NDJSON records are written to (default: stdout)")
+    parser.add_argument("--language", help="UI language id of the resource cache (default: the user's UI language)")
+    parser.add_argument("--resolver", default="shlwapi",
+                        help="shlwapi, none or a resolver function as module:function (default: shlwapi)")
+    parser.add_argument("--resource-cache", help="resource cache file loaded before and saved after the run")
+    parser.add_argument("--workers", type=int, default=4, help="number of worker threads (default: 4)")
+    parser.add_argument("--contrast", default="", choices=["", "black", "white"], help="preferred icon contrast")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest packages reported (default: 10)")
+    parser.add_argument("--memory", action="store_true", help="trace the peak memory, slows the run down")
+    args = parser.parse_args(argv)
+
+    if sys.platform != "win32":
+        if args.resolver == "shlwapi":
+            parser.error("the shlwapi resolver is only available on Windows, use --resolver none or module:function")
+        if not args.language:
+            parser.error("--language is required outside of Windows")
+    if args.workers < 1:
+        parser.error("--workers has to be at least 1")
+    try:
+        args.resolver = load_resolver(args.resolver)
+    except (ValueError, ImportError, AttributeError) as ex:
+        parser.error(str(ex))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    timing.audit_file_accesses()
+    stats = timing.CatalogStats(trace_memory=args.memory)
+
+    helper.resource_cache = helper.ResourceCache(args.resolver, args.language)
+    if args.resource_cache:
+        with stats.phase("resource cache"):
+            helper.resource_cache.load(args.resource_cache)
+
+    output = open(args.output, "w", encoding="utf8") if args.output else sys.stdout
+    try:
+        build_catalog(create_source(args.source), output, stats, args.workers, args.contrast)
+    finally:
+        if args.output:
+            output.close()
+
+    if args.resource_cache:
+        with stats.phase("resource cache"):
+            helper.resource_cache.save(args.resource_cache)
+    resource_cache = helper.resource_cache
+    stats.count("resource lookups", resource_cache.hits + resource_cache.misses)
+    stats.count("resource cache hits", resource_cache.hits)
+    stats.count("resolver calls", resource_cache.resolver_calls)
+    stats.add_time("resolve resources", resource_cache.resolver_seconds)
+    for line in stats.report(args.top):
+        print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
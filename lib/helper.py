@@ -1,12 +1,11 @@
 import os
-import xml.etree.cElementTree as etree
-import re
 import ctypes as ct
-import glob
+import json
+import threading
+import time
 
-SHLoadIndirectString = ct.windll.shlwapi.SHLoadIndirectString
-SHLoadIndirectString.argtypes = [ct.c_wchar_p, ct.c_wchar_p, ct.c_uint, ct.POINTER(ct.c_void_p)]
-SHLoadIndirectString.restype = ct.HRESULT
+# bound on first use, see _sh_load_indirect_string()
+SHLoadIndirectString = None
 
 RESOURCE_PREFIX = "ms-resource:"
 RESOURCE_DISPLAY_FORMAT = "ms-resource://Windows.UI.SettingsAppThreshold/SystemSettings/Resources/{}/DisplayName"
@@ -22,13 +21,25 @@ WINDOWS10 = "http://schemas.microsoft.com/appx/manifest/foundation/windows10"
 WINDOWS81 = "http://schemas.microsoft.com/appx/2013/manifest"
 WINDOWS8 = "http://schemas.microsoft.com/appx/2010/manifest"
 
+# manifests up to this size are parsed at once, the bigger ones are streamed in chunks of MANIFEST_CHUNK_SIZE bytes
+# until the Properties and Applications are done, as most of such a manifest often follows them
+MANIFEST_PARSE_SIZE = 65536
+MANIFEST_CHUNK_SIZE = 4096
+
 
 class AppXPackage(object):
     """Represents a windows app package
     """
 
-    def __init__(self, property_dict):
+    __slots__ = ("Name", "InstallLocation", "PackageFamilyName", "PackageFullName", "applications", "cached_only",
+                 "unresolved", "_manifest_apps", "_stats")
+
+    def __init__(self, property_dict, stats=None, cached_only=False):
         """Sets needed properties from the dict as member
+
+        If a timing.CatalogStats is given, the time needed for parsing the manifest is recorded.
+        If cached_only is set, resource strings are only taken from the resource cache and unresolved is set, if one
+        of them was not cached. The missing strings are resolved by resolve(), without reading the manifest again.
         """
         # for key, value in property_dict.items():
         #     setattr(self, key, value)
@@ -36,13 +47,46 @@ class AppXPackage(object):
         self.Name = property_dict["Name"] if "Name" in property_dict else None
         self.InstallLocation = property_dict["InstallLocation"] if "InstallLocation" in property_dict else None
         self.PackageFamilyName = property_dict["PackageFamilyName"] if "PackageFamilyName" in property_dict else None
-        self.applications = []
+        self.PackageFullName = property_dict["PackageFullName"] if "PackageFullName" in property_dict else None
+        self.applications = None
+        self.cached_only = cached_only
+        self.unresolved = False
+        self._manifest_apps = None
+        self._stats = stats
 
     def apps(self):
-        if not self.applications:
+        if self.applications is None:
             self.applications = self._get_applications()
         return self.applications
 
+    def resolve(self):
+        """Resolves the resource strings of the applications that were missing in the resource cache
+
+        Uses the applications read from the manifest with cached_only, returns the applications.
+        """
+        if self.unresolved and self._manifest_apps is not None:
+            self.cached_only = False
+            self.unresolved = False
+            self.applications = self._create_apps(*self._manifest_apps)
+            self._manifest_apps = None
+        return self.apps()
+
+    def snapshot_key(self):
+        """Key identifying the package in a persisted catalog snapshot
+        """
+        return self.PackageFullName if self.PackageFullName else self.InstallLocation
+
+    def manifest_stat(self):
+        """Returns modification time and size of the manifest or None if there is no manifest
+        """
+        if not self.InstallLocation:
+            return None
+        try:
+            stat = os.stat(os.path.join(self.InstallLocation, "AppxManifest.xml"))
+        except OSError:
+            return None
+        return [stat.st_mtime, stat.st_size]
+
     def _get_applications(self):
         """Reads the manifest of the package and extracts name, description, applications and logos
         """
@@ -52,183 +96,626 @@ class AppXPackage(object):
         manifest_path = os.path.join(self.InstallLocation, "AppxManifest.xml")
         if not os.path.isfile(manifest_path):
             return []
-        manifest = etree.parse(manifest_path)
-        ns = {"default": re.sub(r"{(.*?)}.+", r"\1", manifest.getroot().tag)}
+        parse_start = time.perf_counter()
+        ns, properties, package_applications = read_manifest(manifest_path)
+        if self._stats:
+            self._stats.add_time("manifest", time.perf_counter() - parse_start)
+            self._stats.count("manifests parsed")
 
-        package_applications = manifest.findall("./default:Applications/default:Application", ns)
         if not package_applications:
             return []
 
-        apps = []
+        applications = []
 
         package_description = ""
-        default_description_node = manifest.find("./default:Properties/default:Description", ns)
-        if default_description_node is not None:
-            package_description = default_description_node.text.strip()
+        if "Description" in properties:
+            package_description = properties["Description"].strip()
 
         package_display_name = ""
-        default_display_name_node = manifest.find("./default:Properties/default:DisplayName", ns)
-        if default_display_name_node is not None:
-            package_display_name = default_display_name_node.text.strip()
+        if "DisplayName" in properties:
+            package_display_name = properties["DisplayName"].strip()
 
         package_icon_path = ""
-        logo_node = manifest.find("./default:Properties/default:Logo", ns)
-        if logo_node is not None:
-            logo = logo_node.text
+        if "Logo" in properties:
+            logo = properties["Logo"]
             package_icon_path = os.path.join(self.InstallLocation, logo)
 
-        for application in package_applications:
-            app_display_name = ""
-            app_description = ""
-            app_icon_path = ""
-            app_misc = False
-
-            visual_elements = next((elem for elem in application if elem.tag.endswith("VisualElements")), None)
-            if visual_elements is not None:
-                default_tile = next((elem for elem in visual_elements if elem.tag.endswith('DefaultTile')), None)
+        for application, visual_elements, default_tile in package_applications:
+            if visual_elements is None:
+                # applications without visual elements have no name and logo, they are not listed in the start menu
+                continue
 
-                app_misc = visual_elements.get("AppListEntry") == "none" \
-                    if "AppListEntry" in visual_elements.attrib else False
+            app_icon_path = ""
+            app_misc = visual_elements.get("AppListEntry") == "none" \
+                if "AppListEntry" in visual_elements else False
+
+            app_display_name = visual_elements.get("DisplayName")
+            app_description = visual_elements.get("Description")
+
+            logos = {attr: visual_elements.get(attr) for attr in visual_elements if "logo" in attr.lower()}
+            if ns == WINDOWS10 and "Square44x44Logo" in logos:
+                app_icon_path = os.path.join(self.InstallLocation, logos["Square44x44Logo"])
+            elif ns == WINDOWS81 and "Square30x30Logo" in logos:
+                app_icon_path = os.path.join(self.InstallLocation, logos["Square30x30Logo"])
+            elif ns == WINDOWS8 and "SmallLogo" in logos:
+                app_icon_path = os.path.join(self.InstallLocation, logos["SmallLogo"])
+            else:
+                if default_tile is not None:
+                    logos.update({attr: default_tile.get(attr) for attr in default_tile
+                                  if "logo" in attr.lower()})
+                square_logos = {key: value for key, value in logos.items() if "square" in key.lower()}
+                wide_logos = {key: value for key, value in logos.items() if "wide" in key.lower()}
+
+                if square_logos:
+                    biggest = max(square_logos.keys(), key=_logo_width)
+                    app_icon_path = os.path.join(self.InstallLocation, logos[biggest])
+                elif not app_icon_path and wide_logos:
+                    biggest = max(wide_logos, key=_logo_width)
+                    app_icon_path = os.path.join(self.InstallLocation, logos[biggest])
+                elif not app_icon_path and logos:
+                    biggest = min(logos)
+                    app_icon_path = os.path.join(self.InstallLocation, logos[biggest])
+                elif not app_icon_path:
+                    app_icon_path = package_icon_path
+
+            applications.append((application.get("Id"), app_display_name, app_description, app_icon_path, app_misc))
+
+        apps = self._create_apps(package_display_name, package_description, applications)
+        if self.unresolved:
+            self._manifest_apps = (package_display_name, package_description, applications)
+        return apps
 
-                app_display_name = visual_elements.get("DisplayName")
-                app_description = visual_elements.get("Description")
+    def _create_apps(self, package_display_name, package_description, applications):
+        """Creates the applications read from the manifest with their resource strings resolved
+        """
+        # resource strings of all applications are resolved at once, the ones of the package only if needed
+        resources = self._get_resources([string for _, display_name, description, _, _ in applications
+                                         for string in (display_name, description)
+                                         if string and string.startswith(RESOURCE_PREFIX)])
+        fallbacks = []
+        for _, display_name, description, _, _ in applications:
+            if display_name and display_name.startswith(RESOURCE_PREFIX) and not resources[display_name] \
+                    and package_display_name.startswith(RESOURCE_PREFIX):
+                fallbacks.append(package_display_name)
+            if description and description.startswith(RESOURCE_PREFIX) and not resources[description] \
+                    and package_description.startswith(RESOURCE_PREFIX):
+                fallbacks.append(package_description)
+        resources.update(self._get_resources(fallbacks))
 
-                logos = {attr: visual_elements.get(attr) for attr in visual_elements.attrib if "logo" in attr.lower()}
-                if ns["default"] == WINDOWS10 and "Square44x44Logo" in logos:
-                    app_icon_path = os.path.join(self.InstallLocation, logos["Square44x44Logo"])
-                elif ns["default"] == WINDOWS81 and "Square30x30Logo" in logos:
-                    app_icon_path = os.path.join(self.InstallLocation, logos["Square30x30Logo"])
-                elif ns["default"] == WINDOWS8 and "SmallLogo" in logos:
-                    app_icon_path = os.path.join(self.InstallLocation, logos["SmallLogo"])
+        apps = []
+        for app_id, app_display_name, app_description, app_icon_path, app_misc in applications:
+            if app_display_name and app_display_name.startswith(RESOURCE_PREFIX):
+                if resources[app_display_name]:
+                    app_display_name = resources[app_display_name]
+                elif resources.get(package_display_name):
+                    app_display_name = resources[package_display_name]
                 else:
-                    if default_tile is not None:
-                        logos.update({attr: default_tile.get(attr) for attr in default_tile.attrib
-                                      if "logo" in attr.lower()})
-                    square_logos = {key: value for key, value in logos.items() if "square" in key.lower()}
-                    wide_logos = {key: value for key, value in logos.items() if "wide" in key.lower()}
-
-                    if square_logos:
-                        biggest = max(square_logos.keys(), key=lambda x: int(re.search(r"(\d+)x\d+", x).groups()[0]))
-                        app_icon_path = os.path.join(self.InstallLocation, logos[biggest])
-                    elif not app_icon_path and wide_logos:
-                        biggest = max(wide_logos, key=lambda x: re.search(r"(\d+)x\d+", x).groups()[0])
-                        app_icon_path = os.path.join(self.InstallLocation, logos[biggest])
-                    elif not app_icon_path and logos:
-                        biggest = min(logos)
-                        app_icon_path = os.path.join(self.InstallLocation, logos[biggest])
-                    elif not app_icon_path:
-                        app_icon_path = package_icon_path
-
-                if app_display_name and app_display_name.startswith(RESOURCE_PREFIX):
-                    resource = self.get_resource(self.InstallLocation, app_display_name, self.Name)
-                    if resource:
-                        app_display_name = resource
-                    else:
-                        if package_display_name and package_display_name.startswith(RESOURCE_PREFIX):
-                            resource = self.get_resource(self.InstallLocation, package_display_name, self.Name)
-                            if resource:
-                                package_display_name = resource
-                                app_display_name = package_display_name
-                            else:
-                                app_display_name = self.Name
-                        else:
-                            app_display_name = self.Name
-
-                if app_description and app_description.startswith(RESOURCE_PREFIX):
-                    resource = self.get_resource(self.InstallLocation, app_description, self.Name)
-                    if resource:
-                        app_description = resource
-                    else:
-                        if package_description and package_description.startswith(RESOURCE_PREFIX):
-                            resource = self.get_resource(self.InstallLocation, package_description, self.Name)
-                            if resource:
-                                package_description = resource
-                                app_description = package_description
-
-                apps.append(AppX(execution="shell:AppsFolder\\{}!{}".format(self.PackageFamilyName, application.get("Id")),
-                                 display_name=app_display_name,
-                                 description=app_description,
-                                 icon_path=app_icon_path,
-                                 app_id="{}!{}".format(self.PackageFamilyName, application.get("Id")),
-                                 misc_app=app_misc))
+                    app_display_name = self.Name
+
+            if app_description and app_description.startswith(RESOURCE_PREFIX):
+                if resources[app_description]:
+                    app_description = resources[app_description]
+                elif resources.get(package_description):
+                    app_description = resources[package_description]
+
+            apps.append(AppX(execution="shell:AppsFolder\\{}!{}".format(self.PackageFamilyName, app_id),
+                             display_name=app_display_name,
+                             description=app_description,
+                             icon_path=app_icon_path,
+                             app_id="{}!{}".format(self.PackageFamilyName, app_id),
+                             misc_app=app_misc,
+                             package_family_name=self.PackageFamilyName))
         return apps
 
+    def _get_resources(self, resources):
+        """Resolves the resource strings of the package at once, only from the resource cache if cached_only is set
+
+        Returns a dict mapping every resource string to its value or None.
+        """
+        if not resources:
+            return {}
+        if self.cached_only:
+            values = {}
+            for resource in resources:
+                found, values[resource] = resource_cache.lookup(self.InstallLocation, resource, self.Name)
+                if not found:
+                    self.unresolved = True
+            return values
+        return resource_cache.resolve_many(self.InstallLocation, resources, self.Name)
+
     @staticmethod
     def get_resource(install_location, resource, name=None):
         """Helper method to resolve resource strings to their (localized) value
         """
-        pri_files = []
-        pri_files.extend(glob.glob(install_location + '/*.pri'))
-        pri_files.extend(glob.glob(install_location + '/**/*.pri'))
+        return resource_cache.resolve(install_location, resource, name)
+
+    @staticmethod
+    def get_resources(install_location, resources, name=None):
+        """Helper method to resolve several resource strings at once, returns a dict of their (localized) values
+        """
+        return resource_cache.resolve_many(install_location, resources, name)
+
+
+def read_manifest(manifest_path):
+    """Reads the parts of an AppxManifest.xml needed for cataloging
+
+    Only the Properties and the Applications of the package are read. A manifest of up to MANIFEST_PARSE_SIZE bytes
+    is parsed at once, looking at the events of the streaming parser costs more than parsing the rest of it. A bigger
+    one is fed to a streaming parser in chunks of MANIFEST_CHUNK_SIZE bytes and parsing stops as soon as both elements
+    are done. Their children are read with the element API.
+    Returns a tuple (namespace, properties, applications):
+        - namespace of the package element
+        - dict of the Properties children in that namespace mapped to their text
+        - list of tuples (Application attributes, VisualElements attributes, DefaultTile attributes) for every
+          Application, the latter ones being None if the element doesn't exist
+    """
+    import xml.etree.ElementTree as etree
+
+    with open(manifest_path, "rb") as manifest_file:
+        data = manifest_file.read(MANIFEST_PARSE_SIZE + 1)
+        if len(data) <= MANIFEST_PARSE_SIZE:
+            root = etree.fromstring(data)
+        else:
+            root = _parse_package_element(manifest_file, data)
+
+    ns = root.tag[1:].partition("}")[0] if root.tag.startswith("{") else root.tag
+    prefix = "{{{}}}".format(ns)
+    properties = {}
+    properties_elem = root.find(prefix + "Properties")
+    if properties_elem is not None:
+        for child in properties_elem:
+            if child.tag.startswith(prefix):
+                properties[child.tag[len(prefix):]] = child.text if child.text else ""
+
+    applications = []
+    applications_elem = root.find(prefix + "Applications")
+    if applications_elem is not None:
+        for application in applications_elem.iterfind(prefix + "Application"):
+            # only the first VisualElements element and its first DefaultTile are of interest
+            visual_elements = next((child for child in application if child.tag.endswith("VisualElements")), None)
+            default_tile = None
+            if visual_elements is not None:
+                default_tile = next((child for child in visual_elements if child.tag.endswith("DefaultTile")), None)
+            applications.append((application.attrib,
+                                 visual_elements.attrib if visual_elements is not None else None,
+                                 default_tile.attrib if default_tile is not None else None))
+    return ns, properties, applications
+
+
+def _parse_package_element(manifest_file, data):
+    """Parses a manifest in chunks of MANIFEST_CHUNK_SIZE bytes after the already read data, until its Properties and
+    Applications are done. Returns the package element, without the rest of the manifest if parsing stopped early.
+    """
+    import xml.etree.ElementTree as etree
+
+    root = None
+    properties_tag = applications_tag = None
+    done = set()
+    parser = etree.XMLPullParser(events=("start", "end"))
+    while data:
+        parser.feed(data)
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+                ns = elem.tag[1:].partition("}")[0] if elem.tag.startswith("{") else elem.tag
+                properties_tag = "{{{}}}Properties".format(ns)
+                applications_tag = "{{{}}}Applications".format(ns)
+            elif event == "end" and (elem.tag == properties_tag or elem.tag == applications_tag) \
+                    and root.find(elem.tag) is elem:
+                done.add(elem.tag)
+                if len(done) == 2:
+                    return root
+        data = manifest_file.read(MANIFEST_CHUNK_SIZE)
+    parser.close()
+    return root
+
+
+def _logo_width(logo_attribute):
+    """Returns the width in the name of a logo attribute like "Square150x150Logo"
+    """
+    import re
+
+    return int(re.search(r"(\d+)x\d+", logo_attribute).group(1))
+
+
+def _sh_load_indirect_string():
+    """Returns SHLoadIndirectString of shlwapi, binding it on first use keeps loading the module cheap
+    """
+    global SHLoadIndirectString
+    if SHLoadIndirectString is None:
+        function = ct.windll.shlwapi.SHLoadIndirectString
+        function.argtypes = [ct.c_wchar_p, ct.c_wchar_p, ct.c_uint, ct.POINTER(ct.c_void_p)]
+        function.restype = ct.HRESULT
+        SHLoadIndirectString = function
+    return SHLoadIndirectString
+
+
+def load_indirect_string(resource_descriptor):
+    """Default resolver backend, resolves an indirect string "@{<pri file>? <resource path>}" with shlwapi
+    """
+    inp = ct.create_unicode_buffer(resource_descriptor)
+    output = ct.create_unicode_buffer(1024)
+    result = _sh_load_indirect_string()(inp, output, ct.sizeof(output), None)
+    if result == 0:
+        return output.value
+    return None
+
+
+def get_ui_language():
+    """Returns the user's UI language identifier as string
+    """
+    return str(ct.windll.kernel32.GetUserDefaultUILanguage())
+
+
+class PriIndex(object):
+    """Resource files of an install location, scanned once and ordered with the most localized files first
+
+    Remembers which file resolved a resource root last, so lookups for the same root try that file first.
+    """
+
+    def __init__(self, install_location):
+        self.pri_files = []
+        self._mtimes = {}
+        self._last_hits = {}
+        self._scan(install_location)
+
+    def _scan(self, install_location):
+        """Collects the .pri files directly in the install location and one directory level below
+        """
+        found = []
+        sub_dirs = []
+        try:
+            with os.scandir(install_location) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.name.lower().endswith(".pri") and entry.is_file():
+                        found.append(entry)
+                    elif entry.is_dir():
+                        sub_dirs.append(entry.path)
+        except OSError:
+            return
+        for sub_dir in sub_dirs:
+            try:
+                with os.scandir(sub_dir) as entries:
+                    found.extend(entry for entry in entries
+                                 if not entry.name.startswith(".") and entry.name.lower().endswith(".pri")
+                                 and entry.is_file())
+            except OSError:
+                pass
+
+        for entry in found:
+            try:
+                self._mtimes[entry.path] = entry.stat().st_mtime
+            except OSError:
+                continue
+            self.pri_files.append(entry.path)
         # the assumption is, that localized .pri resource data files are deeper in the file tree
         # and therefore have a longer path
-        pri_files_sorted = sorted(pri_files, key=lambda file: len(file), reverse=True)
-        resource_root_names = ["/resources"]
-        if name:
-            resource_root_names.append(name)
-
-        for pri_file in pri_files_sorted:
-            for resource_root_name in resource_root_names:
-                try:
-                    if resource[0:12] == RESOURCE_PREFIX:
-                        resource_key = resource[12:]
-                        if resource_key.startswith("//"):
-                            resource_path = resource
-                        elif resource_key.startswith("/"):
-                            resource_path = RESOURCE_PREFIX + "//" + resource_key
-                        else:
-                            resource_path = RESOURCE_PREFIX + "//" + resource_root_name + "/" + resource_key
-
-                        resource_descriptor = "@{{{}? {}}}".format(pri_file, resource_path)
-
-                        inp = ct.create_unicode_buffer(resource_descriptor)
-                        output = ct.create_unicode_buffer(1024)
-                        result = SHLoadIndirectString(inp, output, ct.sizeof(output), None)
-                        if result == 0 and output.value:
-                            if not output.value.startswith(RESOURCE_PREFIX):
-                                return output.value
-                except OSError:
-                    pass
+        self.pri_files.sort(key=lambda file: len(file), reverse=True)
+
+    def signature(self):
+        """Returns the files with their modification times to detect changes between runs
+        """
+        return [[pri_file, self._mtimes[pri_file]] for pri_file in self.pri_files]
 
+    def ordered(self, resource_root):
+        """Returns the files in lookup order, starting with the one that resolved the resource root last
+        """
+        last_hit = self._last_hits.get(resource_root)
+        if last_hit is None:
+            return self.pri_files
+        return [last_hit] + [pri_file for pri_file in self.pri_files if pri_file != last_hit]
+
+    def record_hit(self, resource_root, pri_file):
+        self._last_hits[resource_root] = pri_file
+
+
+class ResourceCache(object):
+    """Resolves resource strings and caches the results in memory and on disk
+
+    Cached strings are kept per install location and language, strings that could not be resolved are cached as None.
+    They are dropped as soon as one of the .pri files of the install location is added, removed or modified.
+    """
+
+    VERSION = 1
+
+    def __init__(self, resolver=None, language=None):
+        """The resolver is called with an indirect string descriptor and returns the resolved string or None
+        """
+        self.resolver = resolver if resolver else load_indirect_string
+        self._language = language
+        self._locations = {}
+        self._indexes = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.resolver_calls = 0
+        self.resolver_seconds = 0.0
+
+    @property
+    def language(self):
+        if self._language is None:
+            self._language = get_ui_language()
+        return self._language
+
+    def _pri_index(self, install_location):
+        """Returns the .pri file index of an install location, it is built once per run
+
+        Building the index validates the cached strings of the install location against the .pri files.
+        """
+        with self._lock:
+            index = self._indexes.get(install_location)
+        if index is not None:
+            return index
+
+        index = PriIndex(install_location)
+        signature = index.signature()
+        with self._lock:
+            if install_location in self._indexes:
+                return self._indexes[install_location]
+            self._indexes[install_location] = index
+            entry = self._locations.get(install_location)
+            if entry is None or entry["pri"] != signature:
+                self._locations[install_location] = {"pri": signature, "strings": {}}
+        return index
+
+    def pri_signature(self, install_location):
+        """Returns the .pri files of an install location with their modification times, scanned once per run
+        """
+        return self._pri_index(install_location).signature()
+
+    def _strings(self, install_location):
+        """Returns the cached strings of an install location
+        """
+        self._pri_index(install_location)
+        with self._lock:
+            return self._locations[install_location]["strings"]
+
+    def begin_run(self):
+        """Starts a new catalog run, the .pri files of every install location are scanned again
+        """
+        with self._lock:
+            self._indexes.clear()
+            self.hits = 0
+            self.misses = 0
+            self.resolver_calls = 0
+            self.resolver_seconds = 0.0
+
+    def rescan(self, install_location):
+        """Scans the .pri files of an install location again on its next use, without starting a new run
+        """
+        with self._lock:
+            self._indexes.pop(install_location, None)
+
+    @staticmethod
+    def _key(resource, name):
+        return "{}|{}".format(name if name else "", resource)
+
+    @staticmethod
+    def _resource_root(resource, name):
+        """Returns the resource root a resource string is looked up in, e.g. the package name for relative ones
+        """
+        resource_key = resource[12:]
+        if resource_key.startswith("//"):
+            return resource_key[2:].split("/", 1)[0]
+        return name if name else ""
+
+    def lookup(self, install_location, resource, name=None):
+        """Looks up a resource string in the cache only
+
+        Returns a tuple (found, value), value is None for strings that are cached as not resolvable.
+        """
+        strings = self._strings(install_location)
+        key = self._key(resource, name)
+        with self._lock:
+            if key in strings:
+                return True, strings[key]
+        return False, None
+
+    def resolve(self, install_location, resource, name=None):
+        """Resolves a resource string to its (localized) value, using the cache if possible
+        """
+        return self.resolve_many(install_location, [resource], name)[resource]
+
+    def resolve_many(self, install_location, resources, name=None):
+        """Resolves several resource strings of an install location at once, using the cache if possible
+
+        Strings missing in the cache are resolved in one pass over the .pri files per resource root, every file is
+        only tried for the strings that are still unresolved. Strings that can't be resolved are cached as well, so
+        they are not looked up again until the .pri files change.
+        Returns a dict mapping every resource string to its value or None.
+        """
+        strings = self._strings(install_location)
+        results = {}
+        pending = {}
+        with self._lock:
+            for resource in resources:
+                if resource in results:
+                    continue
+                key = self._key(resource, name)
+                if key in strings:
+                    self.hits += 1
+                    results[resource] = strings[key]
+                    continue
+                self.misses += 1
+                results[resource] = None
+                if resource[0:12] == RESOURCE_PREFIX:
+                    pending.setdefault(self._resource_root(resource, name), []).append(resource)
+                else:
+                    strings[key] = None
+
+        if not pending:
+            return results
+
+        pri_index = self._pri_index(install_location)
+        for resource_root, unresolved in pending.items():
+            for pri_file in pri_index.ordered(resource_root):
+                if not unresolved:
+                    break
+                still_unresolved = []
+                for resource in unresolved:
+                    value = self._resolve_in_file(pri_file, resource, name)
+                    if value is None:
+                        still_unresolved.append(resource)
+                    else:
+                        results[resource] = value
+                        pri_index.record_hit(resource_root, pri_file)
+                unresolved = still_unresolved
+
+        with self._lock:
+            for root_resources in pending.values():
+                for resource in root_resources:
+                    strings[self._key(resource, name)] = results[resource]
+        return results
+
+    def _resolve_in_file(self, pri_file, resource, name):
+        """Resolves a resource string with one .pri file, trying the resource roots of the package
+        """
+        resource_key = resource[12:]
+        if resource_key.startswith("//"):
+            resource_paths = [resource]
+        elif resource_key.startswith("/"):
+            resource_paths = [RESOURCE_PREFIX + "//" + resource_key]
+        else:
+            resource_root_names = ["/resources"]
+            if name:
+                resource_root_names.append(name)
+            resource_paths = [RESOURCE_PREFIX + "//" + resource_root_name + "/" + resource_key
+                              for resource_root_name in resource_root_names]
+
+        for resource_path in resource_paths:
+            resource_descriptor = "@{{{}? {}}}".format(pri_file, resource_path)
+            try:
+                resolver_start = time.perf_counter()
+                value = self.resolver(resource_descriptor)
+                with self._lock:
+                    self.resolver_calls += 1
+                    self.resolver_seconds += time.perf_counter() - resolver_start
+                if value and not value.startswith(RESOURCE_PREFIX):
+                    return value
+            except OSError:
+                pass
         return None
 
+    def load(self, path):
+        """Loads cached strings from a file, entries for another language are ignored
+        """
+        try:
+            with open(path, "r", encoding="utf8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.VERSION or data.get("language") != self.language:
+            return
+        with self._lock:
+            for install_location, entry in data["locations"].items():
+                current = self._locations.get(install_location)
+                if current is None:
+                    self._locations[install_location] = entry
+                elif current["pri"] == entry["pri"]:
+                    # strings resolved before loading, e.g. on start, are merged with the loaded ones
+                    for key, value in entry["strings"].items():
+                        current["strings"].setdefault(key, value)
+
+    def save(self, path):
+        """Writes the cached strings of all still existing install locations to a file
+        """
+        with self._lock:
+            locations = {install_location: entry for install_location, entry in self._locations.items()
+                         if os.path.isdir(install_location)}
+            tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+            with open(tmp_path, "w", encoding="utf8") as cache_file:
+                json.dump({"version": self.VERSION, "language": self.language, "locations": locations}, cache_file)
+            os.replace(tmp_path, path)
+
+
+resource_cache = ResourceCache()
+
 
 class AppX(object):
     """Represents an executable application from a windows app package
+
+    An application is also the record of the catalog that is passed from the manifest parsing to the icon selection
+    and the creation of the catalog items and persisted between catalog runs.
     """
 
+    __slots__ = ("execution", "display_name", "description", "icon_path", "app_id", "misc_app",
+                 "package_family_name")
+
     def __init__(self, execution=None, display_name=None, description=None, icon_path=None, app_id=None,
-                 misc_app=False):
+                 misc_app=False, package_family_name=None):
         self.execution = execution
         self.display_name = display_name
         self.description = description
         self.icon_path = icon_path
         self.app_id = app_id
         self.misc_app = misc_app
+        self.package_family_name = package_family_name
+
+    def __repr__(self):
+        return "AppX({})".format(", ".join("{}={!r}".format(field, getattr(self, field)) for field in self.__slots__))
+
+    def to_dict(self):
+        """Returns the attributes as dict
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, app_dict):
+        """Creates an application from a dict created by to_dict
+        """
+        return cls(**app_dict)
+
+    def to_record(self):
+        """Returns the attributes as list in the order of __slots__, the compact form used in record files
+        """
+        return [getattr(self, field) for field in self.__slots__]
+
+    @classmethod
+    def from_record(cls, record):
+        """Creates an application from a list created by to_record
+        """
+        return cls(*record)
 
 
-if __name__ == "__main__":
-    import json
-    import subprocess
-
-    startupinfo = subprocess.STARTUPINFO()
-    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    output, err = subprocess.Popen(["powershell.exe",
-                                    "-noprofile",
-                                    "chcp 65001 >$null; [Console]::OutputEncoding = [System.Text.UTF8Encoding]::new(); Get-AppxPackage | ConvertTo-Json"],
-                                    stdout=subprocess.PIPE,
-                                    universal_newlines=False,
-                                    shell=False,
-                                    startupinfo=startupinfo).communicate()
-
-    catalog = []
-    packages = json.loads(output.decode("utf8", "replace"))
-    for package in packages:
-        p = AppXPackage(package)
-        apps = p.apps()
-        if all([app.misc_app for app in apps]):
-            continue
-        print(f"{p.Name:50} {p.InstallLocation}")
-        for app in apps:
-            if not app.misc_app:
-                print(f"  - {app.display_name} ({app.description})")
+RECORDS_VERSION = 3
+
+
+def save_records(path, entries, language=None):
+    """Writes app records to a file in JSON lines format, the file is replaced atomically
+
+    The first line is a header with the format version, the record fields and the UI language of the resolved
+    strings, every further line holds one entry, a list whose last element is the list of records of AppX.to_record.
+    If writing fails, the file is left as it was.
+    """
+    tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+    try:
+        with open(tmp_path, "w", encoding="utf8") as records_file:
+            records_file.write(json.dumps({"version": RECORDS_VERSION, "fields": AppX.__slots__,
+                                           "language": language}))
+            records_file.write("\n")
+            for entry in entries:
+                records_file.write(json.dumps(entry, separators=(",", ":")))
+                records_file.write("\n")
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_records(path, language=None):
+    """Reads the entries of a file written by save_records
+
+    Returns None if the file was written with another format version, other record fields or for another language.
+    """
+    with open(path, "r", encoding="utf8") as records_file:
+        header = json.loads(records_file.readline())
+        if header.get("version") != RECORDS_VERSION or header.get("fields") != list(AppX.__slots__) \
+                or header.get("language") != language:
+            return None
+        return [json.loads(line) for line in records_file if line.strip()]
+
@@ -0,0 +1,538 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+
+SCALE_DIR_PREFIX = "scale-"
+CONTRAST_DIR_PREFIX = "contrast-"
+ICON_SIZES = (16, 24, 32, 48)
+DEFAULT_BASE_SIZE = 44
+FORMAT_PREFERENCE = (".png", ".ico", ".bmp", ".jpg", ".jpeg")
+ALTFORM_PREFERENCE = ("unplated", None)
+PRESCALED_EXT = ".ico"
+PRESCALE_MIN_FACTOR = 2
+
+
+class IconVariant(object):
+    """Represents an asset file of a logo with the qualifiers parsed from its path
+    """
+
+    def __init__(self, path, scale=None, targetsize=None, contrast=None, altform=None):
+        self.path = path
+        self.scale = scale
+        self.targetsize = targetsize
+        self.contrast = contrast
+        self.altform = altform
+
+    def __repr__(self):
+        return "IconVariant({!r}, scale={}, targetsize={}, contrast={}, altform={})".format(
+            self.path, self.scale, self.targetsize, self.contrast, self.altform)
+
+    def to_record(self):
+        """Returns the attributes as list, the compact form used in cache files
+        """
+        return [self.path, self.scale, self.targetsize, self.contrast, self.altform]
+
+    @classmethod
+    def from_record(cls, record):
+        """Creates a variant from a list created by to_record
+        """
+        return cls(*record)
+
+    @classmethod
+    def from_path(cls, path, qualifier_dirs, qualifier_str):
+        """Creates a variant from the qualifier directories and the qualifiers in the file name
+
+        The qualifiers in the file name are the part between the logo name and the extension, e.g.
+        "scale-100_contrast-black" for "Square44x44Logo.scale-100_contrast-black.png".
+        """
+        variant = cls(path)
+        qualifiers = list(qualifier_dirs)
+        if qualifier_str:
+            qualifiers.extend(qualifier_str.split("_"))
+        for qualifier in qualifiers:
+            key, _, value = qualifier.lower().partition("-")
+            if key == "scale" or key == "targetsize":
+                try:
+                    setattr(variant, key, int(value))
+                except ValueError:
+                    pass
+            elif key == "contrast" or key == "altform":
+                setattr(variant, key, value)
+        return variant
+
+
+def _qualifiers(name, prefix, ext):
+    """Returns the part of the file name between prefix and extension or None if the file name does not match
+    """
+    if len(name) >= len(prefix) + len(ext) and name.startswith(prefix) and name.endswith(ext):
+        return name[len(prefix):len(name) - len(ext)]
+    return None
+
+
+class AssetIndex(object):
+    """Lists asset directories once and finds the variants of logos in them
+
+    Only the directory of the logo, its "scale-*" and "contrast-*" sub directories and their nested "contrast-*" and
+    "scale-*" directories are listed, which are the places Windows looks for qualified logo files.
+    """
+
+    def __init__(self):
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _list_files(path):
+        files = []
+        dirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirs.append(entry)
+                    else:
+                        files.append(entry)
+        except OSError:
+            pass
+        return files, dirs
+
+    def _listing(self, dirname):
+        """Returns all files in the asset directory as tuples (qualifier directories, normalized name, path)
+        """
+        with self._lock:
+            listing = self._listings.get(dirname)
+        if listing is not None:
+            return listing
+
+        listing = []
+        files, dirs = self._list_files(dirname)
+        listing.extend(((), os.path.normcase(entry.name), entry.path) for entry in files)
+        for qualifier_dir in dirs:
+            qualifier = os.path.normcase(qualifier_dir.name)
+            if qualifier.startswith(SCALE_DIR_PREFIX):
+                nested_prefix = CONTRAST_DIR_PREFIX
+            elif qualifier.startswith(CONTRAST_DIR_PREFIX):
+                nested_prefix = SCALE_DIR_PREFIX
+            else:
+                continue
+            files, nested_dirs = self._list_files(qualifier_dir.path)
+            listing.extend(((qualifier,), os.path.normcase(entry.name), entry.path) for entry in files)
+            for nested_dir in nested_dirs:
+                nested = os.path.normcase(nested_dir.name)
+                if nested.startswith(nested_prefix):
+                    files, _ = self._list_files(nested_dir.path)
+                    listing.extend(((qualifier, nested), os.path.normcase(entry.name), entry.path)
+                                   for entry in files)
+
+        with self._lock:
+            self._listings[dirname] = listing
+        return listing
+
+    def variants(self, icon_path):
+        """Returns the variants of a logo in the order of
+            <logo>
+            <logo>.scale-*
+            scale-*/<logo>
+            <logo>.targetsize-*
+            <logo>.contrast-*
+            contrast-*/<logo>
+            contrast-*/<logo>.contrast-*
+            contrast-*/<logo>.scale-*
+            contrast-*/<logo>.targetsize-*
+            contrast-*/scale-*/<logo>
+            scale-*/<logo>.contrast-*
+            scale-*/contrast-*/<logo>
+        """
+        base_path, ext = os.path.splitext(icon_path)
+        basename = os.path.normcase(os.path.basename(base_path))
+        ext = os.path.normcase(ext)
+        plain_name = basename + ext
+
+        found = []
+        for qualifier_dirs, name, path in self._listing(os.path.dirname(base_path)):
+            qualifier_str = None
+            if not qualifier_dirs:
+                if name == plain_name:
+                    order = 0
+                elif _qualifiers(name, basename + ".scale-", ext) is not None:
+                    order = 1
+                elif _qualifiers(name, basename + ".targetsize-", ext) is not None:
+                    order = 3
+                elif _qualifiers(name, basename + ".contrast-", ext) is not None:
+                    order = 4
+                else:
+                    continue
+            elif len(qualifier_dirs) == 1 and qualifier_dirs[0].startswith(SCALE_DIR_PREFIX):
+                if name == plain_name:
+                    order = 2
+                elif _qualifiers(name, basename + ".contrast-", ext) is not None:
+                    order = 10
+                else:
+                    continue
+            elif len(qualifier_dirs) == 1:
+                if name == plain_name:
+                    order = 5
+                elif _qualifiers(name, basename + ".contrast-", ext) is not None:
+                    order = 6
+                elif _qualifiers(name, basename + ".scale-", ext) is not None:
+                    order = 7
+                elif _qualifiers(name, basename + ".targetsize-", ext) is not None:
+                    order = 8
+                else:
+                    continue
+            elif name == plain_name:
+                order = 9 if qualifier_dirs[0].startswith(CONTRAST_DIR_PREFIX) else 11
+            else:
+                continue
+
+            if name != plain_name:
+                qualifier_str = _qualifiers(name, basename + ".", ext)
+            found.append((order, IconVariant.from_path(path, qualifier_dirs, qualifier_str)))
+
+        found.sort(key=lambda item: item[0])
+        return [variant for _, variant in found]
+
+
+def logo_base_size(icon_path):
+    """Returns the size in pixels of a logo at scale 100, taken from names like "Square44x44Logo.png"
+    """
+    match = re.search(r"(\d+)x\d+", os.path.basename(icon_path))
+    if match:
+        return int(match.group(1))
+    return DEFAULT_BASE_SIZE
+
+
+def pixel_size(variant, base_size=DEFAULT_BASE_SIZE):
+    """Returns the (estimated) size in pixels of a variant
+    """
+    if variant.targetsize:
+        return variant.targetsize
+    if variant.scale:
+        return base_size * variant.scale // 100
+    return base_size
+
+
+def _preference(value, preference):
+    return preference.index(value) if value in preference else len(preference)
+
+
+def rank_variant(variant, size, preferred_contrast="", base_size=DEFAULT_BASE_SIZE):
+    """Returns the sort key of a variant for the given icon size, lower is better
+
+    Variants are ranked by
+        - matching contrast preference (no contrast qualifier, if there is no preference)
+        - fit, the smallest variant at least as big as the size, otherwise the biggest smaller one
+        - targetsize variants before scaled ones, they are designed for exactly that size
+        - unplated variants before plated ones and those for light themes
+        - file format
+    """
+    if preferred_contrast:
+        contrast_mismatch = variant.contrast != preferred_contrast
+    else:
+        contrast_mismatch = variant.contrast is not None
+
+    variant_size = pixel_size(variant, base_size)
+    if variant_size >= size:
+        fit = (0, variant_size - size)
+    else:
+        fit = (1, size - variant_size)
+
+    return (contrast_mismatch,
+            fit,
+            variant.targetsize is None,
+            _preference(variant.altform, ALTFORM_PREFERENCE),
+            _preference(os.path.splitext(variant.path)[1].lower(), FORMAT_PREFERENCE),
+            variant.path)
+
+
+def best_variants(variants, preferred_contrast="", base_size=DEFAULT_BASE_SIZE, sizes=ICON_SIZES):
+    """Returns the best variant for each of the icon sizes as list of tuples (size, variant)
+    """
+    if preferred_contrast:
+        candidates = [variant for variant in variants if variant.contrast == preferred_contrast]
+    else:
+        candidates = [variant for variant in variants if variant.contrast is None]
+    if not candidates:
+        candidates = variants
+    if not candidates:
+        return []
+    return [(size, min(candidates, key=lambda variant: rank_variant(variant, size, preferred_contrast, base_size)))
+            for size in sizes]
+
+
+def needs_prescaling(best_variants, base_size=DEFAULT_BASE_SIZE):
+    """Returns True if one of the best variants is at least PRESCALE_MIN_FACTOR times as big as its icon size
+
+    Logos that (almost) have the icon sizes already are smaller as they are than as part of a rendered icon.
+    """
+    return any(pixel_size(variant, base_size) >= size * PRESCALE_MIN_FACTOR for size, variant in best_variants)
+
+
+_pillow = None
+
+
+def load_pillow():
+    """Returns the PIL.Image module or None if Pillow is not installed, the import is only tried once
+    """
+    global _pillow
+    if _pillow is None:
+        try:
+            from PIL import Image
+            _pillow = Image
+        except ImportError:
+            _pillow = False
+    return _pillow if _pillow else None
+
+
+def render_icon(logos_by_size):
+    """Renders logos to a multi-size icon file scaled to exactly the icon sizes and returns its content
+
+    Takes a list of tuples (size, logo path) ordered by size, every logo is scaled down to fit its size and centered
+    on a transparent square. Requires Pillow.
+    """
+    image_module = load_pillow()
+    images = []
+    for size, logo_path in logos_by_size:
+        with image_module.open(logo_path) as logo:
+            image = logo.convert("RGBA")
+        image.thumbnail((size, size), image_module.LANCZOS)
+        if image.size != (size, size):
+            square = image_module.new("RGBA", (size, size))
+            square.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+            image = square
+        images.append(image)
+    buffer = io.BytesIO()
+    images[-1].save(buffer, format="ICO", sizes=[image.size for image in images], append_images=images[:-1])
+    return buffer.getvalue()
+
+
+class IconStore(object):
+    """Content addressed store for logo files
+
+    Files are named after the hash of their content, so identical logos of different packages are stored only once
+    and a stored file never changes. The hash of every source file is remembered together with its size and
+    modification time, unchanged source files are not read again.
+    Besides plain copies of logos the store holds icons rendered from logos, which are remembered the same way with
+    the size and modification time of every logo they were rendered from.
+    """
+
+    INDEX_FILE = "index.json"
+    VERSION = 2
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._sources = {}
+        self._referenced = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.source_bytes = 0
+        self.stored_bytes = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.path, self.INDEX_FILE), "r", encoding="utf8") as index_file:
+                index = json.load(index_file)
+            if index.get("version") == self.VERSION:
+                self._sources = index["sources"]
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        """Writes the index of source files and their hashes
+        """
+        os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        with self._lock:
+            with open(index_path + ".tmp", "w", encoding="utf8") as index_file:
+                json.dump({"version": self.VERSION, "sources": self._sources}, index_file)
+        os.replace(index_path + ".tmp", index_path)
+
+    def begin_run(self):
+        """Starts a new catalog run, afterwards only files added during the run count as referenced
+        """
+        with self._lock:
+            self._referenced.clear()
+            self.hits = 0
+            self.misses = 0
+            self.source_bytes = 0
+            self.stored_bytes = 0
+
+    def _lookup(self, key, signature, source_bytes):
+        """Returns the name of the stored file for the key if it is stored for the same source signature
+        """
+        with self._lock:
+            entry = self._sources.get(key)
+        if not entry or entry[0] != signature:
+            return None
+        try:
+            stored_size = os.stat(os.path.join(self.path, entry[1])).st_size
+        except OSError:
+            return None
+        with self._lock:
+            self.hits += 1
+            self.source_bytes += source_bytes
+            self.stored_bytes += stored_size
+            self._referenced.add(entry[1])
+        return entry[1]
+
+    def _record(self, key, signature, file_name, source_bytes, stored_size):
+        with self._lock:
+            self.misses += 1
+            self.source_bytes += source_bytes
+            self.stored_bytes += stored_size
+            self._sources[key] = [signature, file_name]
+            self._referenced.add(file_name)
+
+    def _store(self, tmp_path, file_name):
+        stored_path = os.path.join(self.path, file_name)
+        if os.path.isfile(stored_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, stored_path)
+
+    @staticmethod
+    def _signature(source_path):
+        stat = os.stat(source_path)
+        return [stat.st_mtime, stat.st_size]
+
+    def add(self, source_path):
+        """Stores a copy of the file if its content is not stored yet and returns the name of the stored file
+        """
+        signature = [self._signature(source_path)]
+        file_name = self._lookup(source_path, signature, signature[0][1])
+        if file_name:
+            return file_name
+
+        os.makedirs(self.path, exist_ok=True)
+        digest = hashlib.sha1()
+        tmp_path = os.path.join(self.path, "{}.tmp".format(threading.get_ident()))
+        with open(source_path, "rb") as in_file, open(tmp_path, "wb") as out_file:
+            for chunk in iter(lambda: in_file.read(self.CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out_file.write(chunk)
+        file_name = digest.hexdigest() + os.path.splitext(source_path)[1].lower()
+        self._store(tmp_path, file_name)
+        self._record(source_path, signature, file_name, signature[0][1], signature[0][1])
+        return file_name
+
+    def add_rendered(self, logos_by_size, render):
+        """Stores the icon rendered from the logos if its content is not stored yet and returns its file name
+
+        Takes a list of tuples (size, logo path) and the function rendering them to the content of an icon file, the
+        function is only called if one of the logos changed since the icon was stored.
+        """
+        key = "|".join("{}={}".format(size, logo_path) for size, logo_path in logos_by_size)
+        signature = [self._signature(logo_path) for _, logo_path in logos_by_size]
+        source_bytes = sum({logo_path: size for (_, logo_path), (_, size) in zip(logos_by_size, signature)}.values())
+        file_name = self._lookup(key, signature, source_bytes)
+        if file_name:
+            return file_name
+
+        os.makedirs(self.path, exist_ok=True)
+        content = render(logos_by_size)
+        file_name = hashlib.sha1(content).hexdigest() + PRESCALED_EXT
+        tmp_path = os.path.join(self.path, "{}.tmp".format(threading.get_ident()))
+        with open(tmp_path, "wb") as out_file:
+            out_file.write(content)
+        self._store(tmp_path, file_name)
+        self._record(key, signature, file_name, source_bytes, len(content))
+        return file_name
+
+    def collect_garbage(self):
+        """Removes stored files that were not added during the current run
+
+        Returns the number of removed files and their size in bytes.
+        """
+        removed = 0
+        freed = 0
+        with self._lock:
+            self._sources = {source: entry for source, entry in self._sources.items()
+                             if entry[1] in self._referenced}
+            try:
+                entries = list(os.scandir(self.path))
+            except OSError:
+                return removed, freed
+            for entry in entries:
+                if entry.name == self.INDEX_FILE or entry.name in self._referenced or not entry.is_file():
+                    continue
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += size
+        return removed, freed
+
+    def size(self):
+        """Returns the number of stored files and their total size in bytes
+        """
+        count = 0
+        total = 0
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.name != self.INDEX_FILE and entry.is_file():
+                        count += 1
+                        total += entry.stat().st_size
+        except OSError:
+            pass
+        return count, total
+
+
+class IconRegistry(object):
+    """Reference counted icon handles keyed by the cached logos they were loaded from
+
+    Every catalog holds a reference to the icons of its items. Icons are only loaded, if no catalog references them
+    yet, and freed as soon as the last catalog referencing them is released. As cached logos are named after their
+    content, an icon that did not change keeps its handle over catalog runs.
+    Has to be used from the plugin thread only.
+    """
+
+    def __init__(self, load_icon):
+        """The function load_icon is called with a list of cached logos and returns a handle with a free() method
+        """
+        self._load_icon = load_icon
+        self._entries = {}
+        self.loaded = 0
+        self.reused = 0
+        self.freed = 0
+
+    def acquire(self, cached_logos):
+        """Returns a tuple (handle, key) of the icon for the cached logos, loading it if it's not referenced yet
+
+        The key has to be passed to release() once the reference is no longer needed.
+        """
+        key = tuple(cached_logos)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = [self._load_icon(list(cached_logos)), 0]
+            self._entries[key] = entry
+            self.loaded += 1
+        else:
+            self.reused += 1
+        entry[1] += 1
+        return entry[0], key
+
+    def release(self, keys):
+        """Releases one reference for each of the keys, icons without references are freed
+        """
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._entries[key]
+                entry[0].free()
+                self.freed += 1
+
+    def live(self):
+        """Returns the number of loaded icon handles
+        """
+        return len(self._entries)
@@ -0,0 +1,82 @@
+import bisect
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_PREFIX_LENGTH = 2
+
+
+def tokenize(text):
+    """Splits a text into lower case words
+    """
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class KeywordIndex(object):
+    """Inverted index of the words of catalog entries, answers queries by whole words and word prefixes
+
+    Every entry is added with weighted texts, e.g. the display name and keywords weigh more than the description. A
+    query matches the entries that contain every word of the query either as a whole word or as a prefix of one of their
+    words (prefixes need at least MIN_PREFIX_LENGTH characters). Prefixes are looked up by bisecting the sorted
+    vocabulary, so the index only holds one posting list per distinct word.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulary = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, weighted_texts):
+        """Adds an entry with its (weight, text) pairs and returns the entry's number
+        """
+        entry = self._size
+        self._size += 1
+        for weight, text in weighted_texts:
+            for token in tokenize(text):
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                if posting.get(entry, 0) < weight:
+                    posting[entry] = weight
+        self._vocabulary = []
+        return entry
+
+    def _matches(self, token):
+        """Returns the score of every entry that contains the token, whole words count twice
+        """
+        scores = {}
+        posting = self._postings.get(token)
+        if posting:
+            for entry, weight in posting.items():
+                scores[entry] = weight * 2
+        if len(token) < MIN_PREFIX_LENGTH:
+            return scores
+
+        if not self._vocabulary:
+            self._vocabulary = sorted(self._postings)
+        position = bisect.bisect_right(self._vocabulary, token)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(token):
+            for entry, weight in self._postings[self._vocabulary[position]].items():
+                if scores.get(entry, 0) < weight:
+                    scores[entry] = weight
+            position += 1
+        return scores
+
+    def search(self, query, limit=None):
+        """Returns the numbers of the entries that match all words of the query, best matches first
+        """
+        totals = None
+        for token in set(tokenize(query)):
+            scores = self._matches(token)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {entry: total + scores[entry] for entry, total in totals.items() if entry in scores}
+            if not totals:
+                return []
+        if not totals:
+            return []
+        ranked = sorted(totals, key=lambda entry: (-totals[entry], entry))
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,221 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from . import helper
+from . import icons
+
+SHARED_VERSION = 2
+LOCK_TIMEOUT = 5.0
+LOCK_RETRY_INTERVAL = 0.05
+
+
+def default_roots():
+    """Returns the directories of the packages installed for all users of the machine
+
+    ProgramFiles is "Program Files (x86)" for a 32 bit Keypirinha on 64 bit Windows, ProgramW6432 always points to
+    the 64 bit one holding the packages.
+    """
+    program_files = os.environ.get("ProgramW6432", os.environ.get("ProgramFiles", r"C:\Program Files"))
+    return [os.path.join(program_files, "WindowsApps"),
+            os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "SystemApps")]
+
+
+class FileLock(object):
+    """Exclusive lock on a lock file across processes, msvcrt.locking on Windows and fcntl.flock elsewhere
+
+    Raises TimeoutError if the lock could not be acquired within the timeout.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def _try_lock(self):
+        if sys.platform == "win32":
+            import msvcrt
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(self):
+        if sys.platform == "win32":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        self._file.seek(0)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self._try_lock()
+                return self
+            except OSError:
+                if time.monotonic() > deadline:
+                    self._file.close()
+                    self._file = None
+                    raise TimeoutError("Timed out waiting for lock {}".format(self.path))
+                time.sleep(LOCK_RETRY_INTERVAL)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._unlock()
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class SharedPackageCache(object):
+    """Cache of the applications and logo variants of packages installed for all users, shared by all users and
+    Keypirinha profiles of a machine
+
+    Every package has its own file named after its full name and the UI language, holding the application records
+    with their resolved strings and the logo variants found for their icons. An entry is only used as long as install
+    location and manifest of the package are unchanged. Entries are written to a temporary file that replaces the entry
+    while holding a lock on the entry, readers need no lock. Entries pointing outside of the package are ignored, so a
+    user with write access to the cache cannot make others run or copy other files.
+
+    The cache is best effort, if it cannot be read or written the packages are read as if there was no shared cache.
+    """
+
+    def __init__(self, path, roots=None):
+        self.path = path
+        self.roots = [os.path.join(os.path.normcase(os.path.normpath(root)), "") for root in roots or default_roots()]
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.failures = 0
+
+    def begin_run(self):
+        """Forgets the entries read by an earlier catalog run and resets the counters
+        """
+        with self._lock:
+            self._entries = {}
+            self.hits = 0
+            self.misses = 0
+            self.writes = 0
+            self.failures = 0
+
+    def is_shared(self, install_location):
+        """Returns True if the package is installed in one of the machine wide package directories
+        """
+        if not install_location:
+            return False
+        location = os.path.normcase(os.path.normpath(install_location))
+        return any(location.startswith(root) for root in self.roots)
+
+    def _entry_path(self, package, language):
+        return os.path.join(self.path, "{}_{}.json".format(package.PackageFullName, language))
+
+    @staticmethod
+    def _inside(path, install_location):
+        if not path:
+            return True
+        location = os.path.join(os.path.normcase(os.path.normpath(install_location)), "")
+        return os.path.normcase(os.path.normpath(path)).startswith(location)
+
+    def _valid(self, entry, package, language):
+        """Returns True if the entry belongs to the package in its current state and only points into the package
+        """
+        try:
+            if entry.get("version") != SHARED_VERSION \
+                    or entry.get("package_full_name") != package.PackageFullName \
+                    or entry.get("language") != language \
+                    or entry.get("install_location") != package.InstallLocation \
+                    or entry.get("manifest_stat") != package.manifest_stat():
+                return False
+            execution_prefix = "shell:AppsFolder\\{}!".format(package.PackageFamilyName)
+            for record in entry["apps"]:
+                app = helper.AppX.from_record(record)
+                if not app.execution.startswith(execution_prefix) \
+                        or not self._inside(app.icon_path, package.InstallLocation):
+                    return False
+            return all(self._inside(icons.IconVariant.from_record(record).path, package.InstallLocation)
+                       for records in entry["variants"].values() for record in records)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return False
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf8") as entry_file:
+                return json.load(entry_file)
+        except FileNotFoundError:
+            return None
+
+    def get(self, package, language):
+        """Returns the entry of a package or None if there is no valid one, entries are read once per catalog run
+        """
+        if not package.PackageFullName or not self.is_shared(package.InstallLocation):
+            return None
+        path = self._entry_path(package, language)
+        with self._lock:
+            if path in self._entries:
+                return self._entries[path]
+        entry = None
+        try:
+            entry = self._read(path)
+            if entry is not None and not self._valid(entry, package, language):
+                entry = None
+        except Exception:
+            entry = None
+            with self._lock:
+                self.failures += 1
+        with self._lock:
+            self._entries[path] = entry
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, package, language, variants):
+        """Writes the entry of a package with its applications and the logo variants by icon path
+
+        Returns False if another process wrote a valid entry in the meantime or the entry could not be written.
+        """
+        if not package.PackageFullName or not self.is_shared(package.InstallLocation):
+            return False
+        entry = {
+            "version": SHARED_VERSION,
+            "package_full_name": package.PackageFullName,
+            "language": language,
+            "install_location": package.InstallLocation,
+            "manifest_stat": package.manifest_stat(),
+            "apps": [app.to_record() for app in package.apps()],
+            "variants": {icon_path: [variant.to_record() for variant in icon_variants]
+                         for icon_path, icon_variants in variants.items()},
+        }
+        path = self._entry_path(package, language)
+        tmp_path = "{}.{}-{}.tmp".format(path, os.getpid(), threading.get_ident())
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with FileLock(path + ".lock"):
+                existing = self._read(path)
+                if existing is not None and self._valid(existing, package, language):
+                    return False
+                with open(tmp_path, "w", encoding="utf8") as entry_file:
+                    json.dump(entry, entry_file)
+                os.replace(tmp_path, path)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            self._entries[path] = entry
+            self.writes += 1
+        return True
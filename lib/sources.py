@@ -0,0 +1,219 @@
+import json
+import os
+import subprocess
+
+PACKAGE_REPOSITORY_KEY = r"Software\Classes\Local Settings\Software\Microsoft\Windows\CurrentVersion" \
+                         r"\AppModel\Repository\Packages"
+POWERSHELL_COMMAND = "chcp 65001 >$null; [Console]::OutputEncoding = [System.Text.UTF8Encoding]::new(); " \
+                     "Get-AppxPackage | Select-Object Name,InstallLocation,PackageFamilyName,PackageFullName,Version " \
+                     "| ForEach-Object { $_ | ConvertTo-Json -Compress }"
+READ_SIZE = 64 * 1024
+
+
+def iter_json_records(stream):
+    """Yields the objects of a text stream that contains either a JSON array or newline delimited JSON objects
+
+    Only the current object and the unparsed rest of the last read block are kept in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,[]")
+        if not buffer:
+            if eof:
+                return
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer = chunk
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield record
+
+
+class PackageSource(object):
+    """Base class for sources of installed windows app packages
+
+    Sources yield the packages one by one as dicts with the properties of Get-AppxPackage that are used by the
+    plugin: Name, InstallLocation, PackageFamilyName, PackageFullName and Version.
+    """
+
+    name = None
+
+    def packages(self):
+        raise NotImplementedError()
+
+
+class PowerShellPackageSource(PackageSource):
+    """Lists the packages with the Get-AppxPackage cmdlet
+
+    Only the needed properties are selected and every package is written as a single JSON line, which is parsed as
+    soon as it is read.
+    """
+
+    name = "powershell"
+
+    def packages(self):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        process = subprocess.Popen(["powershell.exe",
+                                    "-noprofile",
+                                    POWERSHELL_COMMAND],
+                                   stdout=subprocess.PIPE,
+                                   universal_newlines=False,
+                                   shell=False,
+                                   startupinfo=startupinfo)
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if line:
+                    yield json.loads(line.decode("utf8", "replace"))
+        finally:
+            process.stdout.close()
+            process.wait()
+
+
+class RegistryPackageSource(PackageSource):
+    """Lists the packages of the current user from the package repository in the registry
+
+    Every package has a sub key named after its full name ("<name>_<version>_<architecture>_<resource
+    id>_<publisher id>") with the install location as value "PackageRootFolder".
+    """
+
+    name = "registry"
+
+    @staticmethod
+    def package_from_full_name(full_name, install_location):
+        """Creates the package properties from a package full name
+        """
+        parts = full_name.split("_")
+        if len(parts) != 5:
+            return None
+        name, version, _, _, publisher_id = parts
+        return {
+            "Name": name,
+            "Version": version,
+            "InstallLocation": install_location,
+            "PackageFamilyName": "{}_{}".format(name, publisher_id),
+            "PackageFullName": full_name,
+        }
+
+    def packages(self):
+        import winreg
+
+        packages = []
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, PACKAGE_REPOSITORY_KEY) as repository_key:
+            index = 0
+            while True:
+                try:
+                    full_name = winreg.EnumKey(repository_key, index)
+                except OSError:
+                    break
+                index += 1
+                try:
+                    with winreg.OpenKey(repository_key, full_name) as package_key:
+                        install_location, _ = winreg.QueryValueEx(package_key, "PackageRootFolder")
+                except OSError:
+                    continue
+                # the repository can still contain packages that are no longer on disk
+                if not os.path.isdir(install_location):
+                    continue
+                package = self.package_from_full_name(full_name, install_location)
+                if package:
+                    packages.append(package)
+        return packages
+
+
+class JsonPackageSource(PackageSource):
+    """Reads the packages from a file in the format of "Get-AppxPackage | ConvertTo-Json" or newline delimited JSON
+
+    Allows running the catalog with recorded or generated package lists.
+    """
+
+    name = "json"
+
+    def __init__(self, path):
+        self.path = path
+
+    def packages(self):
+        with open(self.path, "r", encoding="utf8") as package_file:
+            yield from iter_json_records(package_file)
+
+
+class DirectoryPackageSource(PackageSource):
+    """Lists the packages in a directory like "C:\\Program Files\\WindowsApps" or a generated package tree
+
+    Every sub directory with an AppxManifest.xml is a package, its properties are taken from the directory name, which
+    is the package full name. Directories named otherwise are used as name, family and full name of the package.
+    """
+
+    name = "directory"
+
+    def __init__(self, path):
+        self.path = path
+
+    def packages(self):
+        for directory_name in sorted(os.listdir(self.path)):
+            install_location = os.path.join(self.path, directory_name)
+            if not os.path.isfile(os.path.join(install_location, "AppxManifest.xml")):
+                continue
+            package = RegistryPackageSource.package_from_full_name(directory_name, install_location)
+            if package is None:
+                package = {
+                    "Name": directory_name,
+                    "InstallLocation": install_location,
+                    "PackageFamilyName": directory_name,
+                    "PackageFullName": directory_name,
+                }
+            yield package
+
+
+class FallbackPackageSource(PackageSource):
+    """Uses the first source that yields a package without failing
+    """
+
+    name = "auto"
+
+    def __init__(self, *sources):
+        self.sources = sources
+        self.used = None
+
+    def packages(self):
+        errors = []
+        for source in self.sources:
+            try:
+                packages = iter(source.packages())
+                first = next(packages)
+            except StopIteration:
+                continue
+            except Exception as ex:
+                errors.append("{}: {}".format(source.name, ex))
+                continue
+            self.used = source
+            yield first
+            yield from packages
+            return
+        if errors:
+            raise Exception("No package source available ({})".format(", ".join(errors)))
+
+
+SOURCE_NAMES = ["auto", RegistryPackageSource.name, PowerShellPackageSource.name]
+
+
+def create_source(name):
+    """Creates the package source with the given name
+    """
+    if name == RegistryPackageSource.name:
+        return RegistryPackageSource()
+    if name == PowerShellPackageSource.name:
+        return PowerShellPackageSource()
+    return FallbackPackageSource(RegistryPackageSource(), PowerShellPackageSource())
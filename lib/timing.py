@@ -0,0 +1,217 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# audit events counted while a catalog run is measured, see audit_file_accesses()
+AUDITED_EVENTS = {
+    "open": "files opened",
+    "os.scandir": "directories scanned",
+    "os.listdir": "directories listed",
+}
+
+_audited_stats = None
+_audit_hook_installed = False
+
+
+def _audit_hook(event, args):
+    stats = _audited_stats
+    if stats is not None and event in AUDITED_EVENTS:
+        stats.count(AUDITED_EVENTS[event])
+
+
+def audit_file_accesses():
+    """Counts the file system accesses of all threads in the measured CatalogStats from now on
+
+    Installs an audit hook, which can't be removed again and sees every audit event of the interpreter, so it is only
+    meant for the command line and the benchmarks, not for the interpreter of Keypirinha.
+    Returns False if audit hooks are not available.
+    """
+    global _audit_hook_installed
+    if not hasattr(sys, "addaudithook"):
+        return False
+    if not _audit_hook_installed:
+        sys.addaudithook(_audit_hook)
+        _audit_hook_installed = True
+    return True
+
+
+class CatalogStats(object):
+    """Collects phase timings, counters and package timings of a catalog run
+
+    Can be used from several threads at once, times of phases running in worker threads are summed up. A disabled
+    instance does not measure anything.
+    File system accesses of all threads are counted while the run is measured, if audit_file_accesses() was called.
+    The peak memory is traced with tracemalloc only if requested, as tracing slows everything down considerably.
+    """
+
+    def __init__(self, enabled=True, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.kind = None
+        self.start = time.perf_counter()
+        self.elapsed = None
+        self.peak_memory = None
+        self.phases = {}
+        self.counters = {}
+        self.packages = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+        if self.enabled:
+            self._begin_measuring()
+
+    def _begin_measuring(self):
+        global _audited_stats
+        _audited_stats = self
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            elif hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+
+    def finish(self):
+        """Ends the measurement of the run, counting, timing and memory tracing stop
+        """
+        global _audited_stats
+        if not self.enabled or self.elapsed is not None:
+            return
+        self.elapsed = time.perf_counter() - self.start
+        if _audited_stats is self:
+            _audited_stats = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager measuring the time spent in a phase
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        if self.enabled:
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def package(self, name, seconds):
+        """Records the time needed to read a package
+        """
+        if self.enabled:
+            with self._lock:
+                self.packages.append((seconds, name))
+
+    def slowest(self, top):
+        """Returns the slowest packages as list of tuples (seconds, name)
+        """
+        with self._lock:
+            return sorted(self.packages, reverse=True)[:top]
+
+    def report(self, top=10):
+        """Returns the report as list of lines
+        """
+        self.finish()
+        title = "Catalog run ({})".format(self.kind) if self.kind else "Catalog run"
+        lines = ["{} took {:0.3f}s (phase times are summed up over all threads)".format(title, self.elapsed)]
+        if self.peak_memory is not None:
+            lines.append("  memory {:<19} {:8.0f} KiB".format("peak", self.peak_memory / 1024))
+        with self._lock:
+            phases = sorted(self.phases.items(), key=lambda phase: phase[1], reverse=True)
+            counters = sorted(self.counters.items())
+        for name, seconds in phases:
+            lines.append("  phase {:<20} {:8.3f}s".format(name, seconds))
+        for name, value in counters:
+            lines.append("  count {:<20} {:8}".format(name, value))
+        if top > 0 and self.packages:
+            lines.append("  slowest packages:")
+            for seconds, name in self.slowest(top):
+                lines.append("    {:8.3f}s {}".format(seconds, name))
+        return lines
+
+    def to_dict(self):
+        """Returns the results of the run as dict, to be stored as baseline
+        """
+        self.finish()
+        with self._lock:
+            return {
+                "elapsed": self.elapsed,
+                "peak_memory": self.peak_memory,
+                "phases": dict(self.phases),
+                "counters": dict(self.counters),
+            }
+
+    def compare(self, baseline):
+        """Returns lines comparing the run with a baseline created by to_dict
+        """
+        current = self.to_dict()
+        lines = ["Compared with baseline:"]
+
+        def compare_value(label, before, after, value_format="{:12.3f}"):
+            change = "{:+.1f}%".format((after - before) * 100 / before) if before else ""
+            lines.append("  {:<32} {} -> {} {:>9}".format(label,
+                                                          value_format.format(before),
+                                                          value_format.format(after),
+                                                          change))
+
+        compare_value("total (s)", baseline["elapsed"], current["elapsed"])
+        if baseline["peak_memory"] is not None and current["peak_memory"] is not None:
+            compare_value("memory peak (KiB)",
+                          baseline["peak_memory"] / 1024,
+                          current["peak_memory"] / 1024,
+                          "{:12.0f}")
+        for name in sorted(set(baseline["phases"]) | set(current["phases"])):
+            compare_value("phase {} (s)".format(name),
+                          baseline["phases"].get(name, 0.0),
+                          current["phases"].get(name, 0.0))
+        for name in sorted(set(baseline["counters"]) | set(current["counters"])):
+            compare_value("count " + name, baseline["counters"].get(name, 0), current["counters"].get(name, 0), "{:12}")
+        return lines
+
+
+class Baselines(object):
+    """Results of earlier catalog runs per kind of run, the results are compared with
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.runs = {}
+        try:
+            with open(path, "r", encoding="utf8") as baseline_file:
+                baselines = json.load(baseline_file)
+            if baselines.get("version") == self.VERSION:
+                self.runs = baselines["runs"]
+        except (OSError, ValueError):
+            pass
+
+    def get(self, kind):
+        return self.runs.get(kind)
+
+    def record(self, stats):
+        """Stores the results of a run as baseline for its kind of run, if there is none yet
+        """
+        if stats.kind in self.runs:
+            return False
+        self.runs[stats.kind] = stats.to_dict()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as baseline_file:
+            json.dump({"version": self.VERSION, "runs": self.runs}, baseline_file)
+        os.replace(tmp_path, self.path)
+        return True
@@ -0,0 +1,44 @@
+"""Cold, warm and unchanged catalog runs of WindowsApps over a generated package tree
+
+The cold run has nothing cached, the warm one is a restart with the package cache of the cold run and the unchanged one
+catalogs the same plugin again. Reports phase times, counters including opened files and scanned directories and, with
+--memory, the peak memory of every run and compares them with the baseline.
+"""
+import os
+import sys
+
+import benchlib
+
+
+def main(argv=None):
+    parser = benchlib.argument_parser(__doc__)
+    parser.add_argument("--workers", type=int, default=4, help="catalog_workers (default: %(default)s)")
+    parser.add_argument("--pri-files", type=int, default=3, help=".pri files per package (default: %(default)s)")
+    parser.add_argument("--padding", type=int, default=20,
+                        help="unused lines making the manifests bigger (default: %(default)s)")
+    parser.add_argument("--memory", action="store_true", help="trace the peak memory, slows the runs down")
+    args = parser.parse_args(argv)
+    # traced runs are much slower, they have baselines of their own
+    baseline_path = benchlib.baseline_path(args, "catalog-memory" if args.memory else "catalog")
+
+    benchlib.timing.audit_file_accesses()
+    benchlib.install_resolver()
+    with benchlib.package_tree(args.packages, pri_files=args.pri_files, padding=args.padding) as (root, tree):
+        cache_path = os.path.join(root, "cache")
+        settings = {"catalog_workers": args.workers, "catalog_memory": args.memory}
+
+        plugin = benchlib.create_plugin(cache_path, tree, **settings)
+        plugin.on_catalog()
+        benchlib.compare(plugin._stats, baseline_path, args.record)
+
+        restarted = benchlib.create_plugin(cache_path, tree, **settings)
+        restarted.on_catalog()
+        benchlib.compare(restarted._stats, baseline_path, args.record)
+
+        restarted.on_catalog()
+        benchlib.compare(restarted._stats, baseline_path, args.record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
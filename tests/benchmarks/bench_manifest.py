@@ -0,0 +1,87 @@
+"""Reading the applications of generated packages with the streamed read_manifest and with the etree based reading
+
+Every manifest is read --rounds times by AppXPackage.apps() and by etree_manifest.read_apps, which parses the whole
+manifest like before read_manifest. The resource strings are resolved once before, so both only read the manifests
+and take the strings from the resource cache. By default the manifests get the sizes of SIZES, with extensions in the
+Applications and capabilities after them. With --padding every manifest gets that many capability lines instead.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+import benchlib
+import etree_manifest
+import synthetic
+
+helper = benchlib.support.load_lib_module("helper")
+
+# share of the packages, range of the extension lines per Application and of the capability lines after them, about
+# the sizes of the manifests of an installation: mostly 2 to 8 KiB, some 10 to 30 KiB and a few 50 to 150 KiB
+SIZES = (
+    (0.60, (0, 15), (0, 10)),
+    (0.25, (15, 50), (10, 30)),
+    (0.10, (50, 120), (20, 60)),
+    (0.05, (200, 550), (50, 100)),
+)
+
+
+def write_manifests(listed, apps, seed=1):
+    """Writes the manifests of the listed packages again with sizes drawn from SIZES
+    """
+    generator = random.Random(seed)
+    for index, props in enumerate(listed):
+        share = generator.random()
+        for size_share, extensions, padding in SIZES:
+            share -= size_share
+            if share < 0:
+                break
+        synthetic.write_manifest(props["InstallLocation"], index, apps, generator.randint(*padding),
+                                 extensions=generator.randint(*extensions))
+
+
+def run(kind, read_apps, listed, rounds):
+    stats = benchlib.timing.CatalogStats()
+    stats.kind = kind
+    for _ in range(rounds):
+        for props in listed:
+            start = time.perf_counter()
+            apps = read_apps(props)
+            stats.add_time("manifest", time.perf_counter() - start)
+            stats.count("manifests parsed")
+            stats.count("apps", len(apps))
+    stats.count("manifest KiB", sum(os.path.getsize(os.path.join(props["InstallLocation"], "AppxManifest.xml"))
+                                    for props in listed) // 1024)
+    stats.finish()
+    return stats
+
+
+def main(argv=None):
+    parser = benchlib.argument_parser(__doc__)
+    parser.add_argument("--rounds", type=int, default=5, help="times every manifest is read (default: %(default)s)")
+    parser.add_argument("--apps", type=int, default=3, help="applications per package (default: %(default)s)")
+    parser.add_argument("--padding", type=int,
+                        help="unused lines after the Applications of every manifest instead of the sizes of SIZES")
+    args = parser.parse_args(argv)
+    sizes = "sizes" if args.padding is None else args.padding
+    baseline_path = benchlib.baseline_path(args, "manifest-{}".format(sizes))
+
+    benchlib.install_resolver()
+    with benchlib.package_tree(args.packages, apps=args.apps, qualifiers=(), padding=args.padding or 0) as (root, tree):
+        with open(os.path.join(tree, "packages.json"), "r", encoding="utf8") as packages_file:
+            listed = json.load(packages_file)
+        if args.padding is None:
+            write_manifests(listed, args.apps)
+        for props in listed:
+            helper.AppXPackage(props).apps()
+
+        for kind, read_apps in (("streamed", lambda props: helper.AppXPackage(props).apps()),
+                                ("etree", etree_manifest.read_apps)):
+            stats = run(kind, read_apps, listed, args.rounds)
+            benchlib.compare(stats, baseline_path, args.record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Saving and loading a catalog snapshot of many packages with save_records and load_records
+
+The snapshot holds --apps app records for each of --packages packages, like the one WindowsApps writes. For
+comparison the same apps are saved and loaded as a single JSON document of AppX.to_dict dicts. Every run is repeated
+--rounds times, loading includes creating the AppX objects.
+"""
+import json
+import os
+import sys
+import tempfile
+
+import benchlib
+import synthetic
+
+helper = benchlib.support.load_lib_module("helper")
+
+
+def snapshot_entries(packages, apps):
+    """Returns snapshot entries of generated packages, without writing them
+    """
+    entries = []
+    for index in range(packages):
+        props = synthetic.package_props("C:\\Program Files\\WindowsApps", index)
+        records = [helper.AppX(execution="shell:AppsFolder\\{}!App{}".format(props["PackageFamilyName"], app_index),
+                               display_name="App {}.{}".format(index, app_index),
+                               description="Synthetic app {}.{}".format(index, app_index),
+                               icon_path=os.path.join(props["InstallLocation"], "Assets", "Square44x44Logo.png"),
+                               app_id="{}!App{}".format(props["PackageFamilyName"], app_index),
+                               misc_app=app_index > 0,
+                               package_family_name=props["PackageFamilyName"]).to_record()
+                   for app_index in range(apps)]
+        entries.append([props["PackageFullName"], props["InstallLocation"], [1600000000.25 + index, 4096],
+                        [[os.path.join(props["InstallLocation"], "resources.pri"), 1600000000.5]], records])
+    return entries
+
+
+def dict_snapshot(entries):
+    """Returns the entries as dict by package with the apps as AppX.to_dict dicts
+    """
+    return {entry[0]: entry[1:-1] + [[helper.AppX.from_record(record).to_dict() for record in entry[-1]]]
+            for entry in entries}
+
+
+def save_dicts(path, snapshot):
+    with open(path, "w", encoding="utf8") as dicts_file:
+        json.dump(snapshot, dicts_file)
+
+
+def load_dicts(path):
+    with open(path, "r", encoding="utf8") as dicts_file:
+        entries = json.load(dicts_file)
+    return {key: [helper.AppX.from_dict(app_dict) for app_dict in entry[-1]] for key, entry in entries.items()}
+
+
+def load_records(path):
+    return {entry[0]: [helper.AppX.from_record(record) for record in entry[-1]]
+            for entry in helper.load_records(path, "1033")}
+
+
+def run(kind, save, load, path, rounds):
+    stats = benchlib.timing.CatalogStats()
+    stats.kind = kind
+    for _ in range(rounds):
+        with stats.phase("save"):
+            save(path)
+        with stats.phase("load"):
+            packages = load(path)
+    stats.count("packages", len(packages))
+    stats.count("file KiB", os.path.getsize(path) // 1024)
+    stats.finish()
+    return stats
+
+
+def main(argv=None):
+    parser = benchlib.argument_parser(__doc__, packages=2000)
+    parser.add_argument("--apps", type=int, default=2, help="apps per package (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=5, help="times saved and loaded (default: %(default)s)")
+    args = parser.parse_args(argv)
+    baseline_path = benchlib.baseline_path(args, "records")
+
+    entries = snapshot_entries(args.packages, args.apps)
+    snapshot = dict_snapshot(entries)
+    with tempfile.TemporaryDirectory(prefix="windowsapps-benchmark-") as root:
+        for kind, save, load in (("records", lambda path: helper.save_records(path, entries, "1033"), load_records),
+                                 ("dicts", lambda path: save_dicts(path, snapshot), load_dicts)):
+            stats = run(kind, save, load, os.path.join(root, kind), args.rounds)
+            benchlib.compare(stats, baseline_path, args.record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Query latency of the settings suggestions over thousands of generated settings pages
+
+The pages get display names, keywords and descriptions of random words, which are indexed like
+ModernControlPanel._index_settings does. Every query of QUERIES is answered --rounds times by KeywordIndex.search and
+by on_suggest of the plugin, which also leaves out the pages whose label contains the input. The phases sum up the
+times of all rounds of a query.
+"""
+import random
+import sys
+import time
+
+import benchlib
+
+windowsapps = benchlib.support.load_plugin_module()
+
+WORDS = ("display brightness night light resolution color dark mode accent wireless network bluetooth device printer "
+         "mouse keyboard sound volume microphone camera notification focus power battery sleep storage update "
+         "security privacy location language region time date keyboard typing pen touch tablet backup recovery "
+         "activation developer mixed reality gaming capture broadcast accessibility narrator magnifier contrast "
+         "caption speech account email sync family work school sign lock screen background theme start taskbar "
+         "font app default video startup offline map proxy vpn airplane hotspot ethernet cellular dial usage").split()
+
+QUERIES = {
+    "word": "brightness",
+    "prefix": "bri",
+    "two letters": "da",
+    "two words": "dark mode",
+    "three prefixes": "net pro sec",
+    "no match": "zebra",
+}
+
+
+def compiled_settings(pages, seed=1):
+    """Returns compiled settings with random pages, like ModernControlPanel._compile_settings writes them
+    """
+    generator = random.Random(seed)
+    settings = []
+    for number in range(pages):
+        settings.append({
+            "settings_uri": "ms-settings:{}-{}".format(generator.choice(WORDS), number),
+            "display_name": " ".join(generator.sample(WORDS, 2)).capitalize(),
+            "description": " ".join(generator.sample(WORDS, 8)).capitalize(),
+            "keywords": generator.sample(WORDS, 3),
+        })
+    return {"version": windowsapps.ModernControlPanel.COMPILED_SETTINGS_VERSION, "key": None, "label": "Settings",
+            "settings": settings}
+
+
+def run(kind, answer, rounds):
+    stats = benchlib.timing.CatalogStats()
+    stats.kind = kind
+    for name, query in QUERIES.items():
+        for _ in range(rounds):
+            start = time.perf_counter()
+            results = answer(query)
+            stats.add_time("query " + name, time.perf_counter() - start)
+        stats.count("results " + name, len(results))
+    stats.count("queries", len(QUERIES) * rounds)
+    stats.finish()
+    return stats
+
+
+def main(argv=None):
+    parser = benchlib.argument_parser(__doc__, packages=3000)
+    parser.add_argument("--rounds", type=int, default=200, help="times every query is answered (default: %(default)s)")
+    args = parser.parse_args(argv)
+    baseline_path = benchlib.baseline_path(args, "search")
+
+    plugin = benchlib.support.create_plugin(windowsapps.ModernControlPanel, None)
+    compiled = compiled_settings(args.packages)
+    start = time.perf_counter()
+    catalog = plugin._create_settings_items(compiled, None)
+    index = plugin._index_settings(compiled)
+    print("Indexed {} settings pages in {:0.3f}s".format(len(catalog), time.perf_counter() - start))
+    print()
+    plugin._settings_search = (index, catalog)
+
+    def suggest(query):
+        plugin.suggestions = []
+        plugin.on_suggest(query, [])
+        return plugin.suggestions[-1] if plugin.suggestions else []
+
+    benchlib.compare(run("search", index.search, args.rounds), baseline_path, args.record)
+    benchlib.compare(run("suggest", suggest, args.rounds), baseline_path, args.record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Time to the first catalog item and peak memory of the command line over a large recorded package list
+
+The package list is written like "Get-AppxPackage | ConvertTo-Json" does, --records packages (20 per generated
+package by default) cycling through the generated ones. It is read once streamed by the JSON package source and once
+loaded as a whole, like before the packages were streamed, by lib.cli.build_catalog. Memory is traced with
+tracemalloc, so the times of these runs are slower than usual.
+"""
+import json
+import os
+import sys
+import time
+
+import benchlib
+import synthetic
+
+cli = benchlib.support.load_lib_module("cli")
+
+
+class LoadedPackageSource(object):
+    """Reads the whole package list before the first package is passed on
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def packages(self):
+        with open(self.path, "r", encoding="utf8") as package_file:
+            return json.load(package_file)
+
+
+class FirstItemOutput(object):
+    """Output of the catalog records, remembers when the first one was written
+    """
+
+    def __init__(self):
+        self.first_item = None
+        self.records = 0
+
+    def write(self, text):
+        if self.first_item is None:
+            self.first_item = time.perf_counter()
+        if text == "\n":
+            self.records += 1
+
+
+def run(kind, package_source, workers):
+    stats = benchlib.timing.CatalogStats(trace_memory=True)
+    stats.kind = kind
+    output = FirstItemOutput()
+    cli.build_catalog(package_source, output, stats, workers)
+    stats.add_time("first item", output.first_item - stats.start)
+    stats.finish()
+    return stats
+
+
+def main(argv=None):
+    parser = benchlib.argument_parser(__doc__, packages=100)
+    parser.add_argument("--records", type=int, help="packages in the recorded package list (default: 20 per package)")
+    parser.add_argument("--workers", type=int, default=4, help="worker threads (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.records is None:
+        args.records = 20 * args.packages
+    baseline_path = benchlib.baseline_path(args, "source-{}".format(args.records))
+
+    benchlib.timing.audit_file_accesses()
+    benchlib.install_resolver()
+    with benchlib.package_tree(args.packages) as (root, tree):
+        recorded_path = os.path.join(root, "packages.json")
+        with open(os.path.join(tree, "packages.json"), "r", encoding="utf8") as packages_file:
+            synthetic.write_recorded_packages(recorded_path, json.load(packages_file), args.records)
+        print("Recorded package list of {} KiB".format(os.path.getsize(recorded_path) // 1024))
+        print()
+
+        for kind, package_source in (("streamed", cli.sources.JsonPackageSource(recorded_path)),
+                                     ("loaded", LoadedPackageSource(recorded_path))):
+            stats = run(kind, package_source, args.workers)
+            benchlib.compare(stats, baseline_path, args.record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
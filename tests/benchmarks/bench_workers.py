@@ -0,0 +1,45 @@
+"""Cold catalog runs of WindowsApps with different numbers of worker threads
+
+Every run starts with an empty package cache. The fake SHLoadIndirectString waits --resolver-delay milliseconds per
+call without holding the GIL, like the real one reading the .pri files. Reports the time of each run, its speedup over
+the serial run with one worker and compares the runs with the baseline.
+"""
+import os
+import sys
+import time
+
+import benchlib
+
+
+def main(argv=None):
+    parser = benchlib.argument_parser(__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="catalog_workers of the runs (default: %(default)s)")
+    parser.add_argument("--resolver-delay", type=float, default=0.5,
+                        help="milliseconds per resolver call (default: %(default)s)")
+    args = parser.parse_args(argv)
+    baseline_path = benchlib.baseline_path(args, "workers")
+
+    benchlib.timing.audit_file_accesses()
+    elapsed = {}
+    with benchlib.package_tree(args.packages, pri_files=3) as (root, tree):
+        for workers in args.workers:
+            # the resource cache of the module is emptied too
+            benchlib.install_resolver(delay=args.resolver_delay / 1000)
+            plugin = benchlib.create_plugin(os.path.join(root, "cache-{}".format(workers)), tree,
+                                            catalog_workers=workers)
+            start = time.perf_counter()
+            plugin.on_catalog()
+            elapsed[workers] = time.perf_counter() - start
+            plugin._stats.kind = "cold, {} workers".format(workers)
+            benchlib.compare(plugin._stats, baseline_path, args.record)
+
+    serial = elapsed.get(1)
+    for workers, seconds in elapsed.items():
+        speedup = " {:5.2f}x".format(serial / seconds) if serial else ""
+        print("{:3} workers {:8.3f}s{}".format(workers, seconds, speedup))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Runs the plugins on generated package trees and compares the results with stored baselines
+
+Shared by the benchmark scripts in this directory, which are run directly, e.g.
+
+    python tests/benchmarks/bench_catalog.py --packages 300
+
+They need neither Keypirinha nor Windows, the keypirinha modules are replaced by the stand-ins of tests/stubs and the
+resource strings are resolved by the fake SHLoadIndirectString of tests/support.py. The first result of every kind of
+run is stored in the baseline file, later results are compared with it.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS))
+
+import support
+import synthetic
+
+timing = support.load_lib_module("timing")
+
+
+def argument_parser(description, packages=300):
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=packages,
+                        help="number of generated packages (default: %(default)s)")
+    parser.add_argument("--baseline",
+                        help="baseline file (default: results/<benchmark>-<packages>.json next to the benchmarks)")
+    parser.add_argument("--record", action="store_true", help="store the results as new baselines")
+    return parser
+
+
+def baseline_path(args, name):
+    if args.baseline:
+        return args.baseline
+    return os.path.join(BENCHMARKS, "results", "{}-{}.json".format(name, args.packages))
+
+
+def compare(stats, path, record=False, top=0):
+    """Prints the report of a run and compares it with the baseline of its kind, which is stored if there is none
+    """
+    for line in stats.report(top):
+        print(line)
+    baselines = timing.Baselines(path)
+    if record:
+        baselines.runs.pop(stats.kind, None)
+    baseline = baselines.get(stats.kind)
+    if baseline:
+        for line in stats.compare(baseline):
+            print(line)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        baselines.record(stats)
+        print("Stored as baseline in", path)
+    print()
+
+
+@contextlib.contextmanager
+def package_tree(packages, **options):
+    """Generates a package tree in a temporary directory, yields the directory and the tree in it
+    """
+    with tempfile.TemporaryDirectory(prefix="windowsapps-benchmark-") as root:
+        tree = os.path.join(root, "WindowsApps")
+        synthetic.generate_tree(tree, packages, **options)
+        yield root, tree
+
+
+def install_resolver(prefix="App", delay=0.0):
+    return support.install_resolver(support.FakeResolver(prefix, delay=delay))
+
+
+def create_plugin(cache_path, tree, **settings):
+    """Creates a WindowsApps plugin reading the generated tree, with catalog_timings enabled
+    """
+    windowsapps = support.load_plugin_module()
+    settings.setdefault("catalog_timings", True)
+    return support.create_plugin(windowsapps.WindowsApps, cache_path, windowsapps.sources.DirectoryPackageSource(tree),
+                                 **settings)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import support
+import synthetic
+
+
+@pytest.fixture
+def windowsapps():
+    return support.load_plugin_module()
+
+
+@pytest.fixture
+def resolver():
+    resolver = support.FakeResolver()
+    support.install_resolver(resolver)
+    return resolver
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A tree of 5 generated packages
+    """
+    root = str(tmp_path / "WindowsApps")
+    synthetic.generate_tree(root, packages=5)
+    return root
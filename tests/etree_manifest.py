@@ -0,0 +1,126 @@
+"""The etree based reading of the applications of a package, as before helper.read_manifest
+
+Kept as reference for the parity tests and bench_manifest.py. The whole manifest is parsed into a tree and every
+resource string is resolved one by one with AppXPackage.get_resource, which goes through the resource cache instead of
+globbing the .pri files on every call like it did.
+"""
+import os
+import re
+import xml.etree.ElementTree as etree
+
+import support
+
+helper = support.load_lib_module("helper")
+
+
+def read_apps(props):
+    """Returns the applications of the package as list of dicts with the fields of AppX but package_family_name
+    """
+    name = props.get("Name")
+    install_location = props.get("InstallLocation")
+    package_family_name = props.get("PackageFamilyName")
+    if not install_location:
+        return []
+
+    manifest_path = os.path.join(install_location, "AppxManifest.xml")
+    if not os.path.isfile(manifest_path):
+        return []
+    manifest = etree.parse(manifest_path)
+    ns = {"default": re.sub(r"{(.*?)}.+", r"\1", manifest.getroot().tag)}
+
+    package_applications = manifest.findall("./default:Applications/default:Application", ns)
+    if not package_applications:
+        return []
+
+    apps = []
+
+    package_description = ""
+    default_description_node = manifest.find("./default:Properties/default:Description", ns)
+    if default_description_node is not None:
+        package_description = default_description_node.text.strip()
+
+    package_display_name = ""
+    default_display_name_node = manifest.find("./default:Properties/default:DisplayName", ns)
+    if default_display_name_node is not None:
+        package_display_name = default_display_name_node.text.strip()
+
+    package_icon_path = ""
+    logo_node = manifest.find("./default:Properties/default:Logo", ns)
+    if logo_node is not None:
+        logo = logo_node.text
+        package_icon_path = os.path.join(install_location, logo)
+
+    for application in package_applications:
+        app_icon_path = ""
+
+        visual_elements = next((elem for elem in application if elem.tag.endswith("VisualElements")), None)
+        if visual_elements is None:
+            continue
+        default_tile = next((elem for elem in visual_elements if elem.tag.endswith("DefaultTile")), None)
+
+        app_misc = visual_elements.get("AppListEntry") == "none" \
+            if "AppListEntry" in visual_elements.attrib else False
+
+        app_display_name = visual_elements.get("DisplayName")
+        app_description = visual_elements.get("Description")
+
+        logos = {attr: visual_elements.get(attr) for attr in visual_elements.attrib if "logo" in attr.lower()}
+        if ns["default"] == helper.WINDOWS10 and "Square44x44Logo" in logos:
+            app_icon_path = os.path.join(install_location, logos["Square44x44Logo"])
+        elif ns["default"] == helper.WINDOWS81 and "Square30x30Logo" in logos:
+            app_icon_path = os.path.join(install_location, logos["Square30x30Logo"])
+        elif ns["default"] == helper.WINDOWS8 and "SmallLogo" in logos:
+            app_icon_path = os.path.join(install_location, logos["SmallLogo"])
+        else:
+            if default_tile is not None:
+                logos.update({attr: default_tile.get(attr) for attr in default_tile.attrib
+                              if "logo" in attr.lower()})
+            square_logos = {key: value for key, value in logos.items() if "square" in key.lower()}
+            wide_logos = {key: value for key, value in logos.items() if "wide" in key.lower()}
+
+            if square_logos:
+                biggest = max(square_logos.keys(), key=lambda x: int(re.search(r"(\d+)x\d+", x).groups()[0]))
+                app_icon_path = os.path.join(install_location, logos[biggest])
+            elif not app_icon_path and wide_logos:
+                # compared as strings, see test_parity.test_wide_logos_are_compared_by_width
+                biggest = max(wide_logos, key=lambda x: re.search(r"(\d+)x\d+", x).groups()[0])
+                app_icon_path = os.path.join(install_location, logos[biggest])
+            elif not app_icon_path and logos:
+                biggest = min(logos)
+                app_icon_path = os.path.join(install_location, logos[biggest])
+            elif not app_icon_path:
+                app_icon_path = package_icon_path
+
+        if app_display_name and app_display_name.startswith(helper.RESOURCE_PREFIX):
+            resource = helper.AppXPackage.get_resource(install_location, app_display_name, name)
+            if resource:
+                app_display_name = resource
+            else:
+                if package_display_name and package_display_name.startswith(helper.RESOURCE_PREFIX):
+                    resource = helper.AppXPackage.get_resource(install_location, package_display_name, name)
+                    if resource:
+                        package_display_name = resource
+                        app_display_name = package_display_name
+                    else:
+                        app_display_name = name
+                else:
+                    app_display_name = name
+
+        if app_description and app_description.startswith(helper.RESOURCE_PREFIX):
+            resource = helper.AppXPackage.get_resource(install_location, app_description, name)
+            if resource:
+                app_description = resource
+            else:
+                if package_description and package_description.startswith(helper.RESOURCE_PREFIX):
+                    resource = helper.AppXPackage.get_resource(install_location, package_description, name)
+                    if resource:
+                        package_description = resource
+                        app_description = package_description
+
+        apps.append({"execution": "shell:AppsFolder\\{}!{}".format(package_family_name, application.get("Id")),
+                     "display_name": app_display_name,
+                     "description": app_description,
+                     "icon_path": app_icon_path,
+                     "app_id": "{}!{}".format(package_family_name, application.get("Id")),
+                     "misc_app": app_misc})
+    return apps
@@ -0,0 +1,170 @@
+"""Stand-in for the keypirinha module of Keypirinha, records what a plugin publishes instead of showing it
+
+Only the parts of the API used by the plugins of this package are available.
+"""
+import os
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ItemCategory:
+    KEYWORD = 1
+    CMDLINE = 5
+
+
+class ItemArgsHint:
+    FORBIDDEN = 0
+
+
+class ItemHitHint:
+    NOARGS = 1
+
+
+class Events:
+    PACKCONFIG = 0x04
+
+
+class Match:
+    ANY = 0
+    FUZZY = 1
+    DEFAULT = 2
+
+
+class Sort:
+    NONE = 0
+    SCORE_DESC = 1
+
+
+class CatalogItem(object):
+    """Catalog item with the accessors of keypirinha's CatalogItem
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def __repr__(self):
+        return "CatalogItem({!r})".format(self.fields)
+
+    def label(self):
+        return self.fields.get("label")
+
+    def short_desc(self):
+        return self.fields.get("short_desc")
+
+    def target(self):
+        return self.fields.get("target")
+
+    def data_bag(self):
+        return self.fields.get("data_bag")
+
+    def icon(self):
+        return self.fields.get("icon_handle")
+
+
+class IconHandle(object):
+    """Icon handle that remembers whether it was freed
+    """
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.freed = False
+
+    def free(self):
+        self.freed = True
+
+
+class Settings(object):
+    """Settings of the [main] section given as dict
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, section="main", fallback=None, unquote=True):
+        return self.values.get(key, fallback)
+
+    def get_bool(self, key, section="main", fallback=None):
+        return bool(self.values.get(key, fallback))
+
+    def get_int(self, key, section="main", fallback=None, min=None, max=None):
+        value = int(self.values.get(key, fallback))
+        if min is not None and value < min:
+            return fallback
+        if max is not None and value > max:
+            return fallback
+        return value
+
+    def get_enum(self, key, section="main", fallback=None, enum=None, case_sensitive=False):
+        value = self.values.get(key, fallback)
+        return value if enum is None or value in enum else fallback
+
+
+class Plugin(object):
+    """Base class of the plugins, the catalogs, suggestions and log lines are kept in lists
+
+    The package cache is the directory in cache_path, settings are read from the dict settings.
+    """
+
+    def __init__(self):
+        self.cache_path = None
+        self.settings = {}
+        self.catalogs = []
+        self.suggestions = []
+        self.actions = {}
+        self.logs = []
+        self.loaded_icons = 0
+
+    def _log(self, level, *args):
+        self.logs.append((level, " ".join(str(arg) for arg in args)))
+
+    def dbg(self, *args):
+        self._log("debug", *args)
+
+    def info(self, *args):
+        self._log("info", *args)
+
+    def warn(self, *args):
+        self._log("warning", *args)
+
+    def err(self, *args):
+        self._log("error", *args)
+
+    def log_lines(self, level):
+        return [line for line_level, line in self.logs if line_level == level]
+
+    def should_terminate(self, wait=None):
+        return False
+
+    def load_settings(self):
+        return Settings(self.settings)
+
+    def package_full_name(self):
+        return "WindowsApps"
+
+    def get_package_cache_path(self, create=False):
+        if create:
+            os.makedirs(self.cache_path, exist_ok=True)
+        return self.cache_path
+
+    def load_text_resource(self, name):
+        with open(os.path.join(REPOSITORY, name), "r", encoding="utf8") as resource_file:
+            return resource_file.read()
+
+    def load_icon(self, sources, force_reload=False):
+        self.loaded_icons += 1
+        return IconHandle(sources)
+
+    def create_item(self, **fields):
+        return CatalogItem(**fields)
+
+    def create_action(self, **fields):
+        return fields
+
+    def set_actions(self, category, actions):
+        self.actions[category] = actions
+
+    def set_catalog(self, catalog):
+        self.catalogs.append(list(catalog))
+
+    def set_suggestions(self, suggestions, match_method=Match.DEFAULT, sort_method=Sort.SCORE_DESC):
+        self.suggestions.append(list(suggestions))
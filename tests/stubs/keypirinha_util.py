@@ -0,0 +1,15 @@
+"""Stand-in for the keypirinha_util module of Keypirinha, records executions and the clipboard
+"""
+
+executed = []
+clipboard = []
+
+
+def shell_execute(thing, args="", working_dir="", verb="", try_runas=True, detect_nongui=True, api_flags=None,
+                  terminal_cmd=None, show=-1):
+    executed.append((thing, verb))
+    return True
+
+
+def set_clipboard(text):
+    clipboard.append(text)
@@ -0,0 +1,134 @@
+"""Loads the plugins of the package with the stand-ins of tests/stubs and resolves resource strings of synthetic trees
+
+Shared by the tests and the benchmarks, which add the tests directory to sys.path.
+"""
+import builtins
+import ctypes as ct
+import importlib
+import os
+import re
+import sys
+import time
+import types
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY = os.path.dirname(TESTS)
+PACKAGE_NAME = "WindowsApps"
+
+if os.path.join(TESTS, "stubs") not in sys.path:
+    sys.path.insert(0, os.path.join(TESTS, "stubs"))
+
+# HRESULT of SHLoadIndirectString for resources that are not found
+E_NOT_FOUND = -2147023728
+
+
+def load_plugin_module():
+    """Imports windowsapps.py as a module of the package "WindowsApps", like Keypirinha does
+    """
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [REPOSITORY]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(PACKAGE_NAME + ".windowsapps")
+
+
+def load_lib_module(name):
+    """Imports a module of lib, e.g. "helper"
+    """
+    load_plugin_module()
+    return importlib.import_module("{}.lib.{}".format(PACKAGE_NAME, name))
+
+
+class FakeResolver(object):
+    """Resolves the resource strings of packages generated by synthetic.py
+
+    Installed as SHLoadIndirectString of the helper module, so the descriptors are built and passed like on Windows.
+    "PackageName", "AppName<n>" and "AppDescription<n>" of the packages are resolved, the values start with the prefix,
+    a resolver with another prefix stands for another UI language. Resource paths outside of the generated packages,
+    like "Windows.UI.ShellCommon/JumpViewUI/JumpView_CustomOpenAction", are resolved from the dict strings. A delay in
+    seconds per call stands for the time SHLoadIndirectString spends outside of the GIL.
+    """
+
+    DESCRIPTOR = re.compile(r"@\{(?P<pri>.*)\? ms-resource://(?P<root>/resources|[^/]*)/(?P<path>.*)\}$")
+    PACKAGE = re.compile(r"Synthetic\.App(\d+)_")
+
+    def __init__(self, prefix="App", strings=None, delay=0.0):
+        self.prefix = prefix
+        self.strings = strings or {}
+        self.delay = delay
+        self.calls = 0
+
+    def resolve(self, descriptor):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        match = self.DESCRIPTOR.match(descriptor)
+        if match is None:
+            return None
+        if match.group("root") != "/resources":
+            return self.strings.get("{}/{}".format(match.group("root"), match.group("path")))
+        package = self.PACKAGE.search(match.group("pri"))
+        if package is None:
+            return None
+        if match.group("path") == "PackageName":
+            return "{} Package {}".format(self.prefix, package.group(1))
+        if match.group("path").startswith("AppName"):
+            return "{} {}.{}".format(self.prefix, package.group(1), match.group("path")[7:])
+        if match.group("path").startswith("AppDescription"):
+            return "{} description {}.{}".format(self.prefix, package.group(1), match.group("path")[14:])
+        return None
+
+    def sh_load_indirect_string(self, inp, output, size, reserved):
+        """Signature and return values of shlwapi's SHLoadIndirectString
+        """
+        value = self.resolve(inp.value)
+        if value is None:
+            return E_NOT_FOUND
+        output.value = value[:size // ct.sizeof(ct.c_wchar) - 1]
+        return 0
+
+
+def install_resolver(resolver, language="1033"):
+    """Makes the helper module resolve with the fake resolver and starts with an empty resource cache
+    """
+    helper = load_lib_module("helper")
+    helper.SHLoadIndirectString = resolver.sh_load_indirect_string
+    helper.resource_cache = helper.ResourceCache(language=language)
+    return helper
+
+
+def create_plugin(plugin_class, cache_path, package_source=None, **settings):
+    """Creates a plugin with its config read, like on_start without resolving the action labels
+    """
+    plugin = plugin_class()
+    plugin.cache_path = cache_path
+    plugin.settings = dict(settings)
+    plugin._read_config()
+    if package_source is not None:
+        plugin._package_source = package_source
+    return plugin
+
+
+class OpenCounter(object):
+    """Counts the files opened with open() while active, manifests separately
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.manifests = 0
+        self._open = None
+
+    def __enter__(self):
+        self._open = builtins.open
+
+        def counting_open(file, *args, **kwargs):
+            self.files += 1
+            if str(file).endswith("AppxManifest.xml"):
+                self.manifests += 1
+            return self._open(file, *args, **kwargs)
+
+        builtins.open = counting_open
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.open = self._open
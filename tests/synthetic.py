@@ -0,0 +1,216 @@
+"""Generates trees of fake windows app packages for tests and benchmarks
+
+Every package is a directory named after its full name with an AppxManifest.xml, logo variants and .pri files, like
+the packages in "C:\\Program Files\\WindowsApps". The resource strings of the manifests are resolved by FakeResolver
+of support.py, the .pri files only have to exist.
+"""
+import json
+import os
+import struct
+import zlib
+
+WINDOWS10 = "http://schemas.microsoft.com/appx/manifest/foundation/windows10"
+UAP = "http://schemas.microsoft.com/appx/manifest/uap/windows10"
+PUBLISHER_ID = "8wekyb3d8bbwe"
+DEFAULT_QUALIFIERS = ("scale-100", "scale-200", "targetsize-16", "targetsize-24", "targetsize-32", "targetsize-48",
+                      "targetsize-16_altform-unplated", "targetsize-32_altform-unplated")
+PRI_LANGUAGES = ("en-US", "de-DE", "fr-FR", "es-ES", "it-IT", "ja-JP", "zh-CN")
+
+MANIFEST_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<Package xmlns="{ns}" xmlns:uap="{uap}" IgnorableNamespaces="uap">
+  <Identity Name="{name}" Publisher="CN=Synthetic" Version="{version}" ProcessorArchitecture="x64"/>
+  <Properties>
+    <DisplayName>ms-resource:PackageName</DisplayName>
+    <PublisherDisplayName>Synthetic Publisher</PublisherDisplayName>
+    <Logo>Assets/StoreLogo.png</Logo>
+    <Description>Package {index}</Description>
+  </Properties>
+  <Dependencies>
+    <TargetDeviceFamily Name="Windows.Desktop" MinVersion="10.0.17763.0" MaxVersionTested="10.0.19041.0"/>
+  </Dependencies>
+  <Resources>
+    <Resource Language="en-US"/>
+  </Resources>
+  <Applications>
+{applications}
+  </Applications>
+  <Capabilities>
+{padding}  </Capabilities>
+</Package>
+"""
+
+APPLICATION_TEMPLATE = """    <Application Id="{app_id}" Executable="{app_id}.exe"
+        EntryPoint="Windows.FullTrustApplication">
+      <uap:VisualElements DisplayName="ms-resource:AppName{app_index}" Description="Synthetic app {index}.{app_index}"
+          Square44x44Logo="Assets/Square44x44Logo.png" Square150x150Logo="Assets/Square150x150Logo.png"
+          BackgroundColor="transparent"{app_list_entry}>
+        <uap:DefaultTile Wide310x150Logo="Assets/Wide310x150Logo.png"/>
+      </uap:VisualElements>{extensions}
+    </Application>"""
+
+PADDING_LINE = '    <Capability Name="internetClient"/><DeviceCapability Name="location"/>\n'
+
+EXTENSION_LINE = '        <uap:Extension Category="windows.protocol"><uap:Protocol Name="app-{}"/></uap:Extension>\n'
+
+
+def png_bytes(width, height, rgba=(32, 96, 160, 255)):
+    """Returns a valid PNG image of a single color
+    """
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data \
+            + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff)
+
+    row = b"\x00" + bytes(rgba) * width
+    return b"\x89PNG\r\n\x1a\n" \
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)) \
+        + chunk(b"IDAT", zlib.compress(row * height)) \
+        + chunk(b"IEND", b"")
+
+
+def qualifier_size(qualifier, base_size=44):
+    """Returns the pixel size of a logo variant with the qualifiers, e.g. 88 for "scale-200"
+    """
+    size = base_size
+    for part in qualifier.split("_"):
+        key, _, value = part.partition("-")
+        if key == "targetsize":
+            return int(value)
+        if key == "scale":
+            size = base_size * int(value) // 100
+    return size
+
+
+def package_full_name(index, version="1.0.0.0"):
+    return "Synthetic.App{}_{}_x64__{}".format(index, version, PUBLISHER_ID)
+
+
+def package_props(root, index, version="1.0.0.0"):
+    """Returns the properties of a generated package as listed by a package source
+    """
+    name = "Synthetic.App{}".format(index)
+    full_name = package_full_name(index, version)
+    return {
+        "Name": name,
+        "InstallLocation": os.path.join(root, full_name),
+        "PackageFamilyName": "{}_{}".format(name, PUBLISHER_ID),
+        "PackageFullName": full_name,
+        "Version": version,
+    }
+
+
+def write_manifest(install_location, index, apps=1, padding=0, version="1.0.0.0", misc_apps=0, extensions=0):
+    """Writes the manifest of a generated package, padding adds unused Capabilities lines and extensions unused
+    Extensions lines to every Application
+    """
+    extension_lines = ""
+    if extensions:
+        extension_lines = "\n      <Extensions>\n{}      </Extensions>".format(
+            "".join(EXTENSION_LINE.format(number) for number in range(extensions)))
+    applications = []
+    for app_index in range(apps):
+        applications.append(APPLICATION_TEMPLATE.format(
+            app_id="App{}".format(app_index) if app_index else "App",
+            app_index=app_index,
+            index=index,
+            extensions=extension_lines,
+            app_list_entry=' AppListEntry="none"' if app_index >= apps - misc_apps else ""))
+    manifest = MANIFEST_TEMPLATE.format(ns=WINDOWS10,
+                                        uap=UAP,
+                                        name="Synthetic.App{}".format(index),
+                                        version=version,
+                                        index=index,
+                                        applications="\n".join(applications),
+                                        padding=PADDING_LINE * padding)
+    with open(os.path.join(install_location, "AppxManifest.xml"), "w", encoding="utf8") as manifest_file:
+        manifest_file.write(manifest)
+
+
+def write_assets(install_location, qualifiers=DEFAULT_QUALIFIERS):
+    assets = os.path.join(install_location, "Assets")
+    os.makedirs(assets, exist_ok=True)
+    images = {}
+    for logo, base_size in (("Square44x44Logo", 44), ("Square150x150Logo", 150), ("StoreLogo", 50)):
+        for qualifier in qualifiers:
+            size = qualifier_size(qualifier, base_size)
+            if size not in images:
+                images[size] = png_bytes(size, size)
+            with open(os.path.join(assets, "{}.{}.png".format(logo, qualifier)), "wb") as asset_file:
+                asset_file.write(images[size])
+    with open(os.path.join(assets, "Wide310x150Logo.png"), "wb") as asset_file:
+        asset_file.write(png_bytes(31, 15))
+
+
+def write_pri_files(install_location, count=1):
+    """Writes the main resources.pri and count - 1 localized ones in language sub directories
+    """
+    for number in range(count):
+        if number == 0:
+            path = os.path.join(install_location, "resources.pri")
+        else:
+            language_dir = os.path.join(install_location, PRI_LANGUAGES[(number - 1) % len(PRI_LANGUAGES)]
+                                        + ("" if number <= len(PRI_LANGUAGES) else str(number)))
+            os.makedirs(language_dir, exist_ok=True)
+            path = os.path.join(language_dir, "resources.pri")
+        with open(path, "wb") as pri_file:
+            pri_file.write(b"mrm_pri2\x00" + bytes(number % 256 for _ in range(64)))
+
+
+def generate_tree(root, packages=10, apps=1, qualifiers=DEFAULT_QUALIFIERS, pri_files=1, padding=0, misc_apps=0,
+                  extensions=0):
+    """Generates a tree of packages in root and a packages.json listing them, returns the package properties
+
+    qualifiers are the logo variants written for every logo, pri_files the number of .pri files per package, padding
+    and extensions the number of unused lines after and in the Applications that make the manifests bigger.
+    """
+    os.makedirs(root, exist_ok=True)
+    listed = []
+    for index in range(packages):
+        props = package_props(root, index)
+        install_location = props["InstallLocation"]
+        os.makedirs(install_location, exist_ok=True)
+        write_manifest(install_location, index, apps, padding, misc_apps=misc_apps, extensions=extensions)
+        write_assets(install_location, qualifiers)
+        write_pri_files(install_location, pri_files)
+        listed.append(props)
+    with open(os.path.join(root, "packages.json"), "w", encoding="utf8") as packages_file:
+        json.dump(listed, packages_file)
+    return listed
+
+
+def recorded_package(props, number):
+    """Returns the package as recorded by "Get-AppxPackage | ConvertTo-Json", with all the properties not needed for
+    cataloging
+    """
+    record = dict(props)
+    record.update({
+        "PackageFullName": "{}.{}".format(props["PackageFullName"], number) if number else props["PackageFullName"],
+        "Architecture": 9,
+        "ResourceId": "",
+        "Publisher": "CN=Synthetic, O=Synthetic Publisher, L=Redmond, S=Washington, C=US",
+        "PublisherId": PUBLISHER_ID,
+        "IsFramework": False,
+        "IsResourcePackage": False,
+        "IsBundle": False,
+        "IsDevelopmentMode": False,
+        "NonRemovable": False,
+        "SignatureKind": 3,
+        "Status": 0,
+        "Dependencies": [{"Name": "Microsoft.VCLibs.140.00",
+                          "PackageFullName": "Microsoft.VCLibs.140.00_14.0.{}.0_x64__{}".format(version, PUBLISHER_ID),
+                          "Version": "14.0.{}.0".format(version),
+                          "Architecture": 9}
+                         for version in range(30000, 30008)],
+    })
+    return record
+
+
+def write_recorded_packages(path, listed, records):
+    """Writes records packages like "Get-AppxPackage | ConvertTo-Json" does, cycling through the listed packages
+    """
+    with open(path, "w", encoding="utf8") as packages_file:
+        packages_file.write("[\n")
+        for number in range(records):
+            if number:
+                packages_file.write(",\n")
+            packages_file.write(json.dumps(recorded_package(listed[number % len(listed)], number), indent=4))
+        packages_file.write("\n]\n")
@@ -0,0 +1,46 @@
+"""The localized labels of the run actions
+"""
+import json
+import os
+import threading
+
+import support
+
+SHELL_STRINGS = {
+    "Windows.UI.ShellCommon/JumpViewUI/JumpView_CustomOpenAction": "Öffnen",
+    "Windows.UI.ShellCommon/JumpViewUI/JumpView_CustomRunAsAdminAction": "Als Administrator ausführen",
+}
+
+
+def test_both_plugins_refresh_the_labels_at_once(windowsapps, tmp_path, monkeypatch):
+    system_resources = tmp_path / "Windows" / "SystemResources"
+    system_resources.mkdir(parents=True)
+    (system_resources / "Windows.UI.ShellCommon.pri").write_bytes(b"mrm_pri2\x00")
+    monkeypatch.setenv("WINDIR", str(tmp_path / "Windows"))
+    cache_path = str(tmp_path / "cache")
+
+    for _ in range(20):
+        support.install_resolver(support.FakeResolver(strings=SHELL_STRINGS), language="1031")
+        plugins = [support.create_plugin(windowsapps.WindowsApps, cache_path),
+                   support.create_plugin(windowsapps.ModernControlPanel, cache_path)]
+        threads = [threading.Thread(target=plugin._refresh_action_labels,
+                                    args=(dict(windowsapps.WindowsApps.DEFAULT_ACTION_LABELS),))
+                   for plugin in plugins]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for plugin in plugins:
+            assert plugin.log_lines("warning") == []
+            # the actions are set on the plugin thread
+            assert plugin.actions == {}
+            plugin.on_suggest("", [])
+            assert [action["label"] for action in plugin.actions[windowsapps.kp.ItemCategory.CMDLINE]][:2] \
+                == ["Öffnen", "Als Administrator ausführen"]
+        assert not [name for name in os.listdir(cache_path) if name.endswith(".tmp")]
+        with open(os.path.join(cache_path, windowsapps.WindowsApps.ACTION_LABELS_FILE), encoding="utf8") as labels:
+            assert json.load(labels) == {"language": "1031",
+                                         "labels": {windowsapps.WindowsApps.ACTION_RUN_NORMAL: "Öffnen",
+                                                    windowsapps.WindowsApps.ACTION_RUN_ELEVATED:
+                                                        "Als Administrator ausführen"}}
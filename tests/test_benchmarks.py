@@ -0,0 +1,24 @@
+"""The benchmarks still run, with a few packages
+"""
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+
+@pytest.mark.parametrize("script", sorted(glob.glob(os.path.join(BENCHMARKS, "bench_*.py"))),
+                         ids=os.path.basename)
+def test_benchmark_runs_and_compares_with_its_baseline(script, tmp_path):
+    command = [sys.executable, script, "--packages", "5", "--baseline", str(tmp_path / "baseline.json")]
+
+    first = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    assert first.returncode == 0, first.stdout
+    assert "Stored as baseline" in first.stdout
+
+    second = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    assert second.returncode == 0, second.stdout
+    assert "Compared with baseline" in second.stdout
@@ -0,0 +1,58 @@
+"""Building the catalog with the command line
+"""
+import json
+
+import support
+import synthetic
+
+cli = support.load_lib_module("cli")
+timing = support.load_lib_module("timing")
+
+
+class CountingSource(object):
+    def __init__(self, listed):
+        self.listed = listed
+        self.read = 0
+
+    def packages(self):
+        for props in self.listed:
+            self.read += 1
+            yield props
+
+
+class Output(object):
+    def __init__(self, source=None):
+        self.source = source
+        self.text = []
+        self.read_before_first_write = None
+
+    def write(self, text):
+        if self.source is not None and self.read_before_first_write is None:
+            self.read_before_first_write = self.source.read
+        self.text.append(text)
+
+
+def test_build_catalog_writes_the_apps_in_package_order(resolver, tmp_path):
+    tree = str(tmp_path / "WindowsApps")
+    listed = synthetic.generate_tree(tree, packages=3, apps=2, qualifiers=("scale-100", "targetsize-16"))
+    recorded_path = str(tmp_path / "packages.json")
+    synthetic.write_recorded_packages(recorded_path, listed, 6)
+
+    output = Output()
+    cli.build_catalog(cli.sources.JsonPackageSource(recorded_path), output, timing.CatalogStats(), workers=2)
+
+    records = [json.loads(line) for line in "".join(output.text).splitlines()]
+    assert [record["display_name"] for record in records] == ["App {}.{}".format(number % 3, app)
+                                                             for number in range(6) for app in range(2)]
+    assert all(len(record["logos"]) == 4 for record in records)
+
+
+def test_build_catalog_reads_only_a_few_packages_ahead(resolver, tmp_path):
+    tree = str(tmp_path / "WindowsApps")
+    listed = synthetic.generate_tree(tree, packages=2, qualifiers=())
+    source = CountingSource([listed[number % 2] for number in range(200)])
+    output = Output(source)
+    cli.build_catalog(source, output, timing.CatalogStats(), workers=2)
+
+    assert source.read == 200
+    assert output.read_before_first_write <= 2 * cli.READ_AHEAD_PER_WORKER + 1
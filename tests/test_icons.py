@@ -0,0 +1,179 @@
+"""Selecting, storing and rendering the logos of the apps
+"""
+import io
+import os
+
+import pytest
+
+import support
+import synthetic
+
+icons = support.load_lib_module("icons")
+
+
+def write_logo(path, size, rgba=(32, 96, 160, 255)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as logo_file:
+        logo_file.write(synthetic.png_bytes(size, size, rgba))
+    return path
+
+
+def test_render_icon_scales_the_logos_to_the_icon_sizes(tmp_path):
+    image_module = pytest.importorskip("PIL.Image")
+    logo = write_logo(str(tmp_path / "Square44x44Logo.scale-200.png"), 88)
+    big = write_logo(str(tmp_path / "Square44x44Logo.scale-400.png"), 176)
+
+    content = icons.render_icon([(16, logo), (24, logo), (32, logo), (48, big)])
+
+    with image_module.open(io.BytesIO(content)) as icon:
+        assert icon.format == "ICO"
+        assert sorted(icon.info["sizes"]) == [(16, 16), (24, 24), (32, 32), (48, 48)]
+
+
+def test_add_rendered_renders_only_changed_logos(tmp_path):
+    pytest.importorskip("PIL.Image")
+    logo = write_logo(str(tmp_path / "Assets" / "Square44x44Logo.scale-200.png"), 88)
+    logos_by_size = [(size, logo) for size in icons.ICON_SIZES]
+    rendered = []
+
+    def render(logos):
+        rendered.append(logos)
+        return icons.render_icon(logos)
+
+    store = icons.IconStore(str(tmp_path / "store"))
+    file_name = store.add_rendered(logos_by_size, render)
+    assert file_name.endswith(icons.PRESCALED_EXT)
+    assert store.add_rendered(logos_by_size, render) == file_name
+    assert len(rendered) == 1
+
+    store.save()
+    store = icons.IconStore(str(tmp_path / "store"))
+    store.begin_run()
+    assert store.add_rendered(logos_by_size, render) == file_name
+    assert len(rendered) == 1
+    assert store.collect_garbage() == (0, 0)
+
+    write_logo(logo, 88, (255, 255, 255, 255))
+    os.utime(logo, (1, 1))
+    assert store.add_rendered(logos_by_size, render) != file_name
+    assert len(rendered) == 2
+
+
+def test_prescaled_icons_are_cataloged(windowsapps, resolver, tmp_path):
+    pytest.importorskip("PIL.Image")
+    tree = str(tmp_path / "WindowsApps")
+    synthetic.generate_tree(tree, packages=2, qualifiers=("scale-200",))
+    plugin = support.create_plugin(windowsapps.WindowsApps, str(tmp_path / "cache"),
+                                   windowsapps.sources.DirectoryPackageSource(tree), prescale_icons=True)
+    plugin.on_catalog()
+
+    sources = [item.icon().sources for item in plugin.catalogs[-1]]
+    assert len(sources) == 2
+    assert all(len(icon_sources) == 1 and icon_sources[0].endswith(icons.PRESCALED_EXT) for icon_sources in sources)
+    assert plugin.log_lines("warning") == []
+
+
+def test_logo_directories_of_earlier_versions_are_removed(windowsapps, resolver, tree, tmp_path):
+    cache_path = tmp_path / "cache"
+    write_logo(str(cache_path / "Synthetic.App0" / "Square44x44Logo.png"), 44)
+    write_logo(str(cache_path / "settings_icons" / "logo.png"), 44)
+    write_logo(str(cache_path / "shared" / "logo.png"), 44)
+    (cache_path / "usage.json").write_text("{}")
+    plugin = support.create_plugin(windowsapps.WindowsApps, str(cache_path),
+                                   windowsapps.sources.DirectoryPackageSource(tree),
+                                   shared_cache_path=str(cache_path / "shared"))
+    plugin.on_catalog()
+
+    assert sorted(os.listdir(str(cache_path))) == ["catalog_snapshot.jsonl", "icons", "resource_cache.json",
+                                                   "settings_icons", "shared", "usage.json"]
+    assert os.listdir(str(cache_path / "settings_icons")) == ["logo.png"]
+
+
+# every place Windows looks for qualified logo files, with files of other logos and other file types next to them
+ASSET_FILES = [
+    "Square44x44Logo.png",
+    "Square44x44Logo.scale-100.png",
+    "Square44x44Logo.scale-200.png",
+    "Square44x44Logo.scale-100_contrast-black.png",
+    "Square44x44Logo.targetsize-16.png",
+    "Square44x44Logo.targetsize-32_altform-unplated.png",
+    "Square44x44Logo.contrast-white_scale-100.png",
+    "Square44x44Logo.scale-100.jpg",
+    "Square44x44Logo.targetsize-16.png.bak",
+    "Square44x44LogoLarge.scale-100.png",
+    "Square150x150Logo.scale-100.png",
+    "scale-100/Square44x44Logo.png",
+    "scale-100/Square44x44Logo.contrast-black.png",
+    "scale-100/Square150x150Logo.png",
+    "scale-100/contrast-white/Square44x44Logo.png",
+    "scale-100/contrast-white/Square44x44Logo.scale-100.png",
+    "scale-200/Square44x44Logo.png",
+    "contrast-black/Square44x44Logo.png",
+    "contrast-black/Square44x44Logo.contrast-black_scale-100.png",
+    "contrast-black/Square44x44Logo.scale-200.png",
+    "contrast-black/Square44x44Logo.targetsize-24.png",
+    "contrast-black/scale-100/Square44x44Logo.png",
+    "contrast-black/scale-100/Square150x150Logo.png",
+    "contrast-white/Square44x44Logo.targetsize-48_altform-unplated.png",
+    "contrast-white/targetsize-16/Square44x44Logo.png",
+    "Images/Square44x44Logo.png",
+    "Images/Square44x44Logo.scale-100.png",
+]
+
+
+def write_asset_files(assets):
+    for asset_file in ASSET_FILES:
+        (assets / asset_file).parent.mkdir(parents=True, exist_ok=True)
+        (assets / asset_file).write_bytes(b"")
+    return assets
+
+
+def glob_variants(icon_path):
+    """The 12 globs the variants of a logo were found with before the asset index
+    """
+    import glob
+
+    base_path = os.path.splitext(icon_path)
+    dirname = os.path.dirname(base_path[0])
+    basename = os.path.basename(base_path[0])
+    return [glob.glob(icon_path),
+            glob.glob("{}.scale-*{}".format(base_path[0], base_path[1])),
+            glob.glob("{}/scale-*/{}{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}.targetsize-*{}".format(base_path[0], base_path[1])),
+            glob.glob("{}.contrast-*{}".format(base_path[0], base_path[1])),
+            glob.glob("{}/contrast-*/{}{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}/contrast-*/{}.contrast-*{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}/contrast-*/{}.scale-*{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}/contrast-*/{}.targetsize-*{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}/contrast-*/scale-*/{}{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}/scale-*/{}.contrast-*{}".format(dirname, basename, base_path[1])),
+            glob.glob("{}/scale-*/contrast-*/{}{}".format(dirname, basename, base_path[1]))]
+
+
+@pytest.mark.parametrize("logo", ["Square44x44Logo.png", "Square150x150Logo.png", "StoreLogo.png"])
+def test_asset_index_finds_the_variants_of_the_globs(tmp_path, logo):
+    assets = write_asset_files(tmp_path / "Assets")
+    icon_path = str(assets / logo)
+
+    globbed = glob_variants(icon_path)
+    variants = icons.AssetIndex().variants(icon_path)
+
+    assert sorted(variant.path for variant in variants) == sorted(path for paths in globbed for path in paths)
+    # in the order of the globs
+    glob_numbers = [next(number for number, paths in enumerate(globbed) if variant.path in paths)
+                    for variant in variants]
+    assert glob_numbers == sorted(glob_numbers)
+
+
+def test_asset_index_parses_the_qualifiers(tmp_path):
+    assets = write_asset_files(tmp_path / "Assets")
+
+    variants = {os.path.relpath(variant.path, str(assets)).replace(os.sep, "/"): variant
+                for variant in icons.AssetIndex().variants(str(assets / "Square44x44Logo.png"))}
+
+    unplated = variants["Square44x44Logo.targetsize-32_altform-unplated.png"]
+    assert (unplated.targetsize, unplated.altform, unplated.contrast) == (32, "unplated", None)
+    nested = variants["scale-100/contrast-white/Square44x44Logo.png"]
+    assert (nested.scale, nested.contrast) == (100, "white")
+    qualified = variants["contrast-black/Square44x44Logo.contrast-black_scale-100.png"]
+    assert (qualified.scale, qualified.contrast) == (100, "black")
@@ -0,0 +1,83 @@
+"""Reading the applications of a package from its manifest
+"""
+import os
+
+import support
+import synthetic
+from support import OpenCounter
+
+WITHOUT_VISUAL_ELEMENTS = """<?xml version="1.0" encoding="utf-8"?>
+<Package xmlns="http://schemas.microsoft.com/appx/manifest/foundation/windows10"
+    xmlns:uap="http://schemas.microsoft.com/appx/manifest/uap/windows10">
+  <Identity Name="Synthetic.App7" Publisher="CN=Synthetic" Version="1.0.0.0"/>
+  <Properties>
+    <DisplayName>Background Tasks</DisplayName>
+    <PublisherDisplayName>Synthetic Publisher</PublisherDisplayName>
+    <Logo>Assets/StoreLogo.png</Logo>
+  </Properties>
+  <Applications>
+    <Application Id="Worker" Executable="Worker.exe"/>
+    <Application Id="App" Executable="App.exe">
+      <uap:VisualElements DisplayName="Visible App" Description="Shown in the start menu"
+          Square44x44Logo="Assets/Square44x44Logo.png" Square150x150Logo="Assets/Square150x150Logo.png"
+          BackgroundColor="transparent"/>
+    </Application>
+  </Applications>
+</Package>
+"""
+
+
+def read_apps(install_location, manifest):
+    helper = support.load_lib_module("helper")
+    os.makedirs(install_location, exist_ok=True)
+    with open(os.path.join(install_location, "AppxManifest.xml"), "w", encoding="utf8") as manifest_file:
+        manifest_file.write(manifest)
+    package = helper.AppXPackage({"Name": "Synthetic.App7",
+                                  "InstallLocation": install_location,
+                                  "PackageFamilyName": "Synthetic.App7_8wekyb3d8bbwe"})
+    return package.apps()
+
+
+def test_applications_without_visual_elements_are_skipped(resolver, tmp_path):
+    apps = read_apps(str(tmp_path / "Synthetic.App7"), WITHOUT_VISUAL_ELEMENTS)
+
+    assert [app.app_id for app in apps] == ["Synthetic.App7_8wekyb3d8bbwe!App"]
+    assert apps[0].display_name == "Visible App"
+    assert apps[0].icon_path == os.path.join(str(tmp_path / "Synthetic.App7"), "Assets/Square44x44Logo.png")
+
+
+def test_unresolved_strings_are_resolved_without_reading_the_manifest_again(resolver, tree):
+    helper = support.load_lib_module("helper")
+    package = helper.AppXPackage(synthetic.package_props(tree, 2), cached_only=True)
+
+    assert [app.display_name for app in package.apps()] == ["Synthetic.App2"]
+    assert package.unresolved
+
+    with OpenCounter() as opens:
+        apps = package.resolve()
+
+    assert opens.manifests == 0
+    assert [app.display_name for app in apps] == ["App 2.0"]
+    assert package.apps() is apps
+    assert not package.unresolved and not package.cached_only
+
+
+def test_big_manifests_are_read_up_to_the_applications(resolver, tmp_path):
+    helper = support.load_lib_module("helper")
+    props = synthetic.package_props(str(tmp_path), 3)
+    os.makedirs(props["InstallLocation"])
+    synthetic.write_manifest(props["InstallLocation"], 3, apps=2, padding=2000)
+    manifest_path = os.path.join(props["InstallLocation"], "AppxManifest.xml")
+    # the end of the manifest isn't well-formed, which only the parsed manifests find out
+    with open(manifest_path, "r+", encoding="utf8") as manifest_file:
+        manifest = manifest_file.read().replace("</Package>", "<Broken></Package>")
+        manifest_file.seek(0)
+        manifest_file.write(manifest)
+    assert os.path.getsize(manifest_path) > helper.MANIFEST_PARSE_SIZE
+
+    ns, properties, applications = helper.read_manifest(manifest_path)
+
+    assert ns == synthetic.WINDOWS10
+    assert properties["DisplayName"] == "ms-resource:PackageName"
+    assert [application[0]["Id"] for application in applications] == ["App", "App1"]
+    assert applications[0][2] == {"Wide310x150Logo": "Assets/Wide310x150Logo.png"}
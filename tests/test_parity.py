@@ -0,0 +1,101 @@
+"""The streamed manifest reading finds the same applications as the etree based one it replaced
+"""
+import os
+import shutil
+
+import pytest
+
+import etree_manifest
+import support
+import synthetic
+
+MANIFESTS = os.path.join(support.TESTS, "fixtures", "manifests")
+
+# fixture manifest and the number of its package, Identity names match the package directories
+FIXTURES = {
+    "windows8": 0,
+    "windows81": 1,
+    "windows81_manifest": 2,
+    "windows10": 3,
+    "windows10_tiles": 4,
+    "properties_last": 5,
+    "framework": 6,
+}
+
+
+def install_fixture(root, fixture):
+    """Installs the fixture manifest as generated package with a resources.pri, returns the package properties
+    """
+    props = synthetic.package_props(root, FIXTURES[fixture])
+    os.makedirs(props["InstallLocation"])
+    shutil.copyfile(os.path.join(MANIFESTS, fixture + ".xml"),
+                    os.path.join(props["InstallLocation"], "AppxManifest.xml"))
+    synthetic.write_pri_files(props["InstallLocation"])
+    return props
+
+
+def read_apps(props):
+    """Returns the applications read by helper.AppXPackage with a fresh resource cache as dicts like etree_manifest
+    """
+    helper = support.install_resolver(support.FakeResolver())
+    apps = []
+    for app in helper.AppXPackage(props).apps():
+        assert app.package_family_name == props["PackageFamilyName"]
+        app_dict = app.to_dict()
+        del app_dict["package_family_name"]
+        apps.append(app_dict)
+    return apps
+
+
+@pytest.mark.parametrize("streamed", [False, True], ids=["parsed", "streamed"])
+@pytest.mark.parametrize("fixture", sorted(FIXTURES))
+def test_same_applications_as_etree(fixture, streamed, resolver, tmp_path, monkeypatch):
+    if streamed:
+        # the fixtures are smaller than MANIFEST_PARSE_SIZE, they are streamed in small chunks like bigger ones
+        helper = support.load_lib_module("helper")
+        monkeypatch.setattr(helper, "MANIFEST_PARSE_SIZE", 0)
+        monkeypatch.setattr(helper, "MANIFEST_CHUNK_SIZE", 64)
+    props = install_fixture(str(tmp_path), fixture)
+
+    expected = etree_manifest.read_apps(props)
+    apps = read_apps(props)
+
+    assert [app["app_id"] for app in apps] == [app["app_id"] for app in expected]
+    for app, expected_app in zip(apps, expected):
+        assert app == expected_app
+
+
+def test_fixtures_cover_the_manifest_variants(resolver, tmp_path):
+    root = str(tmp_path)
+    apps = {fixture: {app["app_id"].partition("!")[2]: app for app in read_apps(install_fixture(root, fixture))}
+            for fixture in FIXTURES}
+
+    def icon(fixture, app_id):
+        install_location = synthetic.package_props(root, FIXTURES[fixture])["InstallLocation"]
+        return os.path.relpath(apps[fixture][app_id]["icon_path"], install_location)
+
+    assert apps["windows8"]["App"]["display_name"] == "App 0.0"
+    assert apps["windows8"]["App"]["description"] == "App description 0.0"
+    assert icon("windows8", "App") == "Assets\\SmallLogo.png"
+    assert icon("windows8", "Viewer") == "Assets\\ViewerLogo.png"
+    assert icon("windows81", "App") == "Assets\\Square310x310Logo.png"
+    assert icon("windows81_manifest", "App") == "Assets\\Square30x30Logo.png"
+    assert sorted(apps["windows10"]) == ["App", "Background", "Fallback"]
+    assert apps["windows10"]["Fallback"]["display_name"] == "App Package 3"
+    assert apps["windows10"]["Fallback"]["description"] == "ms-resource:MissingDescription"
+    assert apps["windows10"]["Background"]["misc_app"] is True
+    assert icon("windows10", "App") == "Assets\\Square44x44Logo.png"
+    assert icon("windows10_tiles", "Tiles") == "Assets\\Square150x150Logo.png"
+    assert icon("windows10_tiles", "Wide") == "Assets\\Wide310x150Logo.png"
+    assert icon("windows10_tiles", "PackageLogo") == "Assets\\StoreLogo.png"
+    assert apps["properties_last"]["App"]["display_name"] == "App Package 5"
+    assert apps["framework"] == {}
+
+
+def test_wide_logos_are_compared_by_width():
+    # the etree based reading compared the widths of wide logos as strings, a deliberate difference without effect on
+    # the manifest schemas, which only know Wide310x150Logo
+    helper = support.load_lib_module("helper")
+    wide_logos = ["Wide310x150Logo", "Wide1240x600Logo"]
+
+    assert max(wide_logos, key=helper._logo_width) == "Wide1240x600Logo"
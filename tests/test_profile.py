@@ -0,0 +1,22 @@
+"""Profiling catalog runs with catalog_profile
+"""
+import os
+import pstats
+
+import support
+
+
+def profiled_functions(profile_path):
+    return {function_name for _, _, function_name in pstats.Stats(profile_path).stats}
+
+
+def test_profile_includes_the_worker_threads(windowsapps, resolver, tree, tmp_path):
+    plugin = support.create_plugin(windowsapps.WindowsApps, str(tmp_path / "cache"),
+                                   windowsapps.sources.DirectoryPackageSource(tree), catalog_profile=True)
+    plugin.on_catalog()
+
+    functions = profiled_functions(os.path.join(plugin.cache_path, windowsapps.WindowsApps.PROFILE_FILE))
+    assert "_catalog_apps" in functions
+    # only run by the worker threads
+    assert {"read_manifest", "_get_icon_sources"} <= functions
+    assert plugin._worker_profiles is None
@@ -0,0 +1,95 @@
+"""The app records and the files they are saved in between runs
+"""
+import json
+import os
+
+import pytest
+
+import support
+
+helper = support.load_lib_module("helper")
+
+APPS = [
+    helper.AppX(execution="shell:AppsFolder\\Synthetic.App0_8wekyb3d8bbwe!App",
+                display_name="Fotos – Überblick",
+                description="写真とビデオ 📷",
+                icon_path="C:\\Program Files\\WindowsApps\\Synthetic.App0\\Assets\\Square44x44Logo.png",
+                app_id="Synthetic.App0_8wekyb3d8bbwe!App",
+                misc_app=False,
+                package_family_name="Synthetic.App0_8wekyb3d8bbwe"),
+    helper.AppX(execution="shell:AppsFolder\\Synthetic.App0_8wekyb3d8bbwe!Background",
+                display_name="Background \"Tasks\"\n",
+                description=None,
+                icon_path="",
+                app_id="Synthetic.App0_8wekyb3d8bbwe!Background",
+                misc_app=True,
+                package_family_name=None),
+]
+
+
+def snapshot_entries(count=2):
+    """Returns entries like the catalog snapshot of WindowsApps writes them
+    """
+    return [["Synthetic.App{}_1.0.0.0_x64__8wekyb3d8bbwe".format(index),
+             "C:\\Program Files\\WindowsApps\\Synthetic.App{}".format(index),
+             [1600000000.25 + index, 2048 + index],
+             [["C:\\Program Files\\WindowsApps\\Synthetic.App{}\\resources.pri".format(index), 1600000000.5]],
+             [app.to_record() for app in APPS]]
+            for index in range(count)]
+
+
+def test_records_restore_the_apps():
+    for app in APPS:
+        assert helper.AppX.from_record(json.loads(json.dumps(app.to_record()))).to_dict() == app.to_dict()
+        assert helper.AppX.from_dict(app.to_dict()).to_record() == app.to_record()
+
+
+def test_saved_entries_are_loaded_unchanged(tmp_path):
+    path = str(tmp_path / "snapshot.jsonl")
+    entries = snapshot_entries()
+
+    helper.save_records(path, iter(entries), "1031")
+
+    assert helper.load_records(path, "1031") == entries
+    with open(path, "r", encoding="utf8") as records_file:
+        assert len(records_file.readlines()) == 1 + len(entries)
+    loaded_apps = [helper.AppX.from_record(record) for record in helper.load_records(path, "1031")[0][-1]]
+    assert [app.to_dict() for app in loaded_apps] == [app.to_dict() for app in APPS]
+
+
+def test_no_entries(tmp_path):
+    path = str(tmp_path / "snapshot.jsonl")
+
+    helper.save_records(path, [])
+
+    assert helper.load_records(path) == []
+
+
+@pytest.mark.parametrize("header", [{"version": helper.RECORDS_VERSION - 1},
+                                    {"fields": list(helper.AppX.__slots__)[:-1]},
+                                    {"language": "1033"}],
+                         ids=["version", "fields", "language"])
+def test_other_header_is_not_loaded(header, tmp_path):
+    path = str(tmp_path / "snapshot.jsonl")
+    helper.save_records(path, snapshot_entries(), "1031")
+    with open(path, "r", encoding="utf8") as records_file:
+        lines = records_file.readlines()
+    saved_header = json.loads(lines[0])
+    saved_header.update(header)
+    with open(path, "w", encoding="utf8") as records_file:
+        records_file.write(json.dumps(saved_header) + "\n")
+        records_file.writelines(lines[1:])
+
+    assert helper.load_records(path, "1031") is None
+
+
+def test_failed_save_keeps_the_file(tmp_path):
+    path = str(tmp_path / "snapshot.jsonl")
+    entries = snapshot_entries()
+    helper.save_records(path, entries, "1031")
+
+    with pytest.raises(TypeError):
+        helper.save_records(path, entries + [["Synthetic.Broken", object()]], "1031")
+
+    assert helper.load_records(path, "1031") == entries
+    assert os.listdir(str(tmp_path)) == ["snapshot.jsonl"]
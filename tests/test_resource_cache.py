@@ -0,0 +1,146 @@
+"""Resolving resource strings with the resource cache and its .pri file index
+"""
+import os
+import time
+
+import support
+import synthetic
+
+helper = support.load_lib_module("helper")
+
+
+def install_package(root, index=0, pri_files=1):
+    """Creates the install location of a generated package with its .pri files only, returns it
+    """
+    install_location = synthetic.package_props(root, index)["InstallLocation"]
+    os.makedirs(install_location)
+    synthetic.write_pri_files(install_location, pri_files)
+    return install_location
+
+
+def touch(path):
+    later = time.time() + 10
+    os.utime(path, (later, later))
+
+
+def test_resolved_strings_are_cached(tmp_path):
+    install_location = install_package(str(tmp_path))
+    resolver = support.FakeResolver()
+    cache = helper.ResourceCache(resolver=resolver.resolve, language="1033")
+
+    assert cache.resolve(install_location, "ms-resource:AppName0", "Synthetic.App0") == "App 0.0"
+    calls = resolver.calls
+    assert cache.resolve(install_location, "ms-resource:AppName0", "Synthetic.App0") == "App 0.0"
+
+    assert resolver.calls == calls
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.lookup(install_location, "ms-resource:AppName0", "Synthetic.App0") == (True, "App 0.0")
+    assert cache.lookup(install_location, "ms-resource:AppName1", "Synthetic.App0") == (False, None)
+
+
+def test_unresolvable_strings_are_cached_as_none(tmp_path):
+    install_location = install_package(str(tmp_path))
+    resolver = support.FakeResolver()
+    cache = helper.ResourceCache(resolver=resolver.resolve, language="1033")
+
+    assert cache.resolve_many(install_location, ["ms-resource:Missing", "Plain name"], "Synthetic.App0") \
+        == {"ms-resource:Missing": None, "Plain name": None}
+    calls = resolver.calls
+    assert calls > 0
+    assert cache.resolve(install_location, "ms-resource:Missing", "Synthetic.App0") is None
+
+    assert resolver.calls == calls
+    assert cache.lookup(install_location, "ms-resource:Missing", "Synthetic.App0") == (True, None)
+    assert cache.lookup(install_location, "Plain name", "Synthetic.App0") == (True, None)
+
+
+def test_changed_pri_files_drop_the_cached_strings(tmp_path):
+    install_location = install_package(str(tmp_path))
+    resolver = support.FakeResolver()
+    cache = helper.ResourceCache(resolver=resolver.resolve, language="1033")
+    cache.resolve(install_location, "ms-resource:Missing", "Synthetic.App0")
+
+    # the .pri files are only scanned once per run
+    touch(os.path.join(install_location, "resources.pri"))
+    assert cache.lookup(install_location, "ms-resource:Missing", "Synthetic.App0") == (True, None)
+
+    cache.begin_run()
+    assert cache.lookup(install_location, "ms-resource:Missing", "Synthetic.App0") == (False, None)
+    assert cache.hits == cache.misses == 0
+
+    cache.resolve(install_location, "ms-resource:Missing", "Synthetic.App0")
+    synthetic.write_pri_files(install_location, 2)
+    cache.rescan(install_location)
+    assert cache.lookup(install_location, "ms-resource:Missing", "Synthetic.App0") == (False, None)
+    assert len(cache.pri_signature(install_location)) == 2
+
+
+def test_rescan_keeps_the_other_install_locations(tmp_path):
+    first = install_package(str(tmp_path), 0)
+    second = install_package(str(tmp_path), 1)
+    cache = helper.ResourceCache(resolver=support.FakeResolver().resolve, language="1033")
+    cache.resolve(first, "ms-resource:AppName0", "Synthetic.App0")
+    cache.resolve(second, "ms-resource:AppName0", "Synthetic.App1")
+    index = cache._pri_index(second)
+    touch(os.path.join(first, "resources.pri"))
+    touch(os.path.join(second, "resources.pri"))
+
+    cache.rescan(first)
+
+    assert cache.lookup(first, "ms-resource:AppName0", "Synthetic.App0") == (False, None)
+    assert cache.lookup(second, "ms-resource:AppName0", "Synthetic.App1") == (True, "App 1.0")
+    assert cache._pri_index(second) is index
+
+
+def test_saved_strings_are_loaded_for_the_same_language(tmp_path):
+    install_location = install_package(str(tmp_path))
+    path = str(tmp_path / "resources.json")
+    cache = helper.ResourceCache(resolver=support.FakeResolver().resolve, language="1033")
+    cache.resolve_many(install_location, ["ms-resource:AppName0", "ms-resource:Missing"], "Synthetic.App0")
+    cache.save(path)
+
+    resolver = support.FakeResolver()
+    loaded = helper.ResourceCache(resolver=resolver.resolve, language="1033")
+    loaded.load(path)
+    assert loaded.resolve_many(install_location, ["ms-resource:AppName0", "ms-resource:Missing"], "Synthetic.App0") \
+        == {"ms-resource:AppName0": "App 0.0", "ms-resource:Missing": None}
+    assert resolver.calls == 0
+
+    other_language = helper.ResourceCache(resolver=resolver.resolve, language="1031")
+    other_language.load(path)
+    assert other_language.lookup(install_location, "ms-resource:AppName0", "Synthetic.App0") == (False, None)
+
+    touch(os.path.join(install_location, "resources.pri"))
+    outdated = helper.ResourceCache(resolver=resolver.resolve, language="1033")
+    outdated.load(path)
+    assert outdated.lookup(install_location, "ms-resource:AppName0", "Synthetic.App0") == (False, None)
+
+
+def test_the_pri_file_that_resolved_last_is_tried_first(tmp_path):
+    # only the main resources.pri has the strings, the localized ones of the language directories are tried first
+    resolver = support.FakeResolver()
+    calls = []
+
+    def main_pri_only(descriptor):
+        calls.append(descriptor)
+        if os.path.dirname(descriptor[2:].partition("?")[0]).endswith(synthetic.PUBLISHER_ID):
+            return resolver.resolve(descriptor)
+        return None
+
+    cache = helper.ResourceCache(resolver=main_pri_only, language="1033")
+    for index in range(3):
+        install_location = install_package(str(tmp_path), index, pri_files=5)
+        name = "Synthetic.App{}".format(index)
+        pri_files = cache._pri_index(install_location).pri_files
+        assert pri_files[-1] == os.path.join(install_location, "resources.pri")
+
+        del calls[:]
+        assert cache.resolve(install_location, "ms-resource:AppName0", name) == "App {}.0".format(index)
+        # every localized file is tried with the resource roots "/resources" and the package name
+        assert len(calls) == 2 * (len(pri_files) - 1) + 1
+
+        del calls[:]
+        assert cache.resolve_many(install_location, ["ms-resource:AppName1", "ms-resource:AppName2"], name) \
+            == {"ms-resource:AppName1": "App {}.1".format(index), "ms-resource:AppName2": "App {}.2".format(index)}
+        assert len(calls) == 2
+        assert cache._pri_index(install_location).ordered(name)[0] == pri_files[-1]
@@ -0,0 +1,92 @@
+"""Finding the settings pages by whole words and word prefixes
+"""
+import support
+
+search = support.load_lib_module("search")
+
+PAGES = [
+    [(2, "Display"), (2, "brightness night light resolution"), (1, "Change the brightness of the display")],
+    [(2, "Colors"), (2, "dark mode accent"), (1, "Choose the colors of Windows and apps")],
+    [(2, "Wi-Fi"), (2, "wireless network"), (1, "Connect to wireless networks")],
+    [(2, "Night light"), (2, "blue light"), (1, "Shows warmer colors at night")],
+    [(2, "Straße"), (2, ""), (1, "Verkehr")],
+]
+
+
+def index_pages():
+    index = search.KeywordIndex()
+    for weighted_texts in PAGES:
+        index.add(weighted_texts)
+    return index
+
+
+def test_tokenize_splits_words_in_lower_case():
+    assert search.tokenize("Wi-Fi & Bluetooth, DARK mode") == ["wi", "fi", "bluetooth", "dark", "mode"]
+    assert search.tokenize("Straße") == ["strasse"]
+
+
+def test_whole_words_and_prefixes_match():
+    index = index_pages()
+
+    assert len(index) == len(PAGES)
+    assert index.search("brightness") == [0]
+    assert index.search("bright") == [0]
+    assert index.search("BRIGHT") == [0]
+    assert index.search("wirel") == [2]
+    assert index.search("STRASSE") == [4]
+    assert index.search("bluetooth") == []
+
+
+def test_prefixes_need_two_characters():
+    index = index_pages()
+
+    assert index.search("d") == []
+    assert index.search("da") == [1]
+
+
+def test_whole_words_rank_before_prefixes():
+    index = index_pages()
+
+    # equal scores keep the order of the entries
+    assert index.search("night") == [0, 3]
+    # the whole word "light" scores twice as much as the prefix of "lights" with the same weight
+    index.add([(2, "Lights"), (1, "")])
+    assert index.search("light") == [0, 3, 5]
+
+
+def test_every_word_of_the_query_has_to_match():
+    index = index_pages()
+
+    assert index.search("dark mode") == [1]
+    assert index.search("mode dark") == [1]
+    assert index.search("night light") == [0, 3]
+    assert index.search("night bright") == [0]
+    assert index.search("night wireless") == []
+    assert index.search("dark dark mode") == index.search("dark mode")
+
+
+def test_weights_order_the_matches():
+    index = index_pages()
+
+    # a display name or keyword weighs twice as much as a description
+    assert index.search("colors") == [1, 3]
+    index.add([(1, "Other display"), (2, "")])
+    assert index.search("display") == [0, 5]
+
+
+def test_limit_and_empty_queries():
+    index = index_pages()
+
+    assert index.search("n", limit=1) == []
+    assert index.search("night light", limit=1) == [0]
+    assert index.search("") == []
+    assert index.search("  -  ") == []
+
+
+def test_entries_added_after_a_search_are_found():
+    index = index_pages()
+    assert index.search("bluet") == []
+
+    entry = index.add([(2, "Bluetooth"), (1, "Pair devices")])
+
+    assert index.search("bluet") == [entry]
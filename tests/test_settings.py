@@ -0,0 +1,102 @@
+"""Cataloging the pages of the system settings
+"""
+import os
+import time
+
+import support
+import synthetic
+
+SETTINGS_STRINGS = {
+    "Windows.UI.SettingsAppThreshold/SystemSettings/Resources/SettingsAppTitle/Text": "Settings",
+    "Windows.UI.SettingsAppThreshold/SystemSettings/Resources/SettingsPagePCSystemDisplay/DisplayName": "Display",
+}
+
+
+def test_refreshing_the_settings_keeps_the_run_of_windowsapps(windowsapps, resolver, tree, tmp_path, monkeypatch):
+    system_resources = tmp_path / "Windows" / "SystemResources"
+    system_resources.mkdir(parents=True)
+    (system_resources / "Windows.UI.SettingsAppThreshold.pri").write_bytes(b"mrm_pri2\x00")
+    monkeypatch.setenv("WINDIR", str(tmp_path / "Windows"))
+    resolver.strings.update(SETTINGS_STRINGS)
+    helper = support.load_lib_module("helper")
+    resource_cache = helper.resource_cache
+    install_location = synthetic.package_props(tree, 0)["InstallLocation"]
+
+    # a catalog run of WindowsApps in progress
+    resource_cache.begin_run()
+    resource_cache.resolve(install_location, "ms-resource:AppName0", "Synthetic.App0")
+    resource_cache.resolve(install_location, "ms-resource:AppName0", "Synthetic.App0")
+    pri_index = resource_cache._pri_index(install_location)
+    hits = resource_cache.hits
+
+    settings = support.create_plugin(windowsapps.ModernControlPanel, str(tmp_path / "cache"))
+    settings_str = settings.load_text_resource("settings.json")
+    settings._settings_key = settings._compiled_settings_key(settings_str)
+    settings._refresh_settings(settings_str, settings._settings_key, None)
+
+    assert settings.log_lines("error") == []
+    assert [item.label() for item in settings.catalogs[-1]] == ["Settings: Display (ms-settings:display)"]
+    assert resource_cache._pri_index(install_location) is pri_index
+    assert resource_cache.hits >= hits > 0
+
+
+def outdated_settings(windowsapps, resolver, tmp_path, monkeypatch):
+    """Catalogs the settings once, then changes the system resources, returns a plugin whose compiled settings are
+    outdated
+    """
+    system_resources = tmp_path / "Windows" / "SystemResources"
+    system_resources.mkdir(parents=True)
+    pri_file = system_resources / "Windows.UI.SettingsAppThreshold.pri"
+    pri_file.write_bytes(b"mrm_pri2\x00")
+    monkeypatch.setenv("WINDIR", str(tmp_path / "Windows"))
+    resolver.strings.update(SETTINGS_STRINGS)
+    support.create_plugin(windowsapps.ModernControlPanel, str(tmp_path / "cache")).on_catalog()
+
+    pri_file.write_bytes(b"mrm_pri2\x00\x01")
+    later = time.time() + 10
+    os.utime(str(pri_file), (later, later))
+    support.install_resolver(resolver)
+    resolver.strings[next(path for path in SETTINGS_STRINGS if path.endswith("DisplayName"))] = "Anzeige"
+    return support.create_plugin(windowsapps.ModernControlPanel, str(tmp_path / "cache"))
+
+
+def labels(catalog):
+    return [item.label() for item in catalog]
+
+
+def test_refresh_done_first_is_not_replaced_by_the_outdated_catalog(windowsapps, resolver, tmp_path, monkeypatch):
+    settings = outdated_settings(windowsapps, resolver, tmp_path, monkeypatch)
+    # the refresh is done before the plugin thread publishes the outdated catalog
+    monkeypatch.setattr(settings, "_start_settings_refresh", settings._refresh_settings)
+
+    settings.on_catalog()
+
+    assert [labels(catalog) for catalog in settings.catalogs] == [["Settings: Anzeige (ms-settings:display)"]]
+    assert labels(settings._settings_search[1]) == ["Settings: Anzeige (ms-settings:display)"]
+
+
+def test_refresh_replaces_the_outdated_catalog(windowsapps, resolver, tmp_path, monkeypatch):
+    settings = outdated_settings(windowsapps, resolver, tmp_path, monkeypatch)
+    refreshes = []
+    monkeypatch.setattr(settings, "_start_settings_refresh", lambda *args: refreshes.append(args))
+
+    settings.on_catalog()
+    settings._refresh_settings(*refreshes[0])
+
+    assert [labels(catalog) for catalog in settings.catalogs] == [["Settings: Display (ms-settings:display)"],
+                                                                  ["Settings: Anzeige (ms-settings:display)"]]
+    assert labels(settings._settings_search[1]) == ["Settings: Anzeige (ms-settings:display)"]
+
+
+def test_refresh_for_other_settings_is_dropped(windowsapps, resolver, tmp_path, monkeypatch):
+    settings = outdated_settings(windowsapps, resolver, tmp_path, monkeypatch)
+    refreshes = []
+    monkeypatch.setattr(settings, "_start_settings_refresh", lambda *args: refreshes.append(args))
+    settings.on_catalog()
+    settings._refresh_settings(*refreshes[0])
+
+    # a refresh started for settings that are no longer the current ones
+    settings_str, key, settings_icon = refreshes[0]
+    settings._refresh_settings(settings_str, dict(key, language="1031"), settings_icon)
+
+    assert len(settings.catalogs) == 2
@@ -0,0 +1,76 @@
+"""The shared package cache used by several processes at once
+"""
+import concurrent.futures
+import json
+import os
+
+import support
+import synthetic
+
+PROCESSES = 4
+LANGUAGE = "1033"
+
+
+def shared_packages(tree):
+    """Returns the packages of a generated tree with their applications, without reading the manifests
+    """
+    helper = support.load_lib_module("helper")
+    with open(os.path.join(tree, "packages.json"), "r", encoding="utf8") as packages_file:
+        listed = json.load(packages_file)
+    packages = []
+    for props in listed:
+        package = helper.AppXPackage(props)
+        package.applications = [helper.AppX(
+            execution="shell:AppsFolder\\{}!App".format(package.PackageFamilyName),
+            display_name=package.Name,
+            description="",
+            icon_path=os.path.join(package.InstallLocation, "Assets", "Square44x44Logo.png"),
+            app_id="{}!App".format(package.PackageFamilyName),
+            misc_app=False,
+            package_family_name=package.PackageFamilyName)]
+        packages.append(package)
+    return packages
+
+
+def write_entries(cache_path, tree):
+    """Writes the entries of all packages of the tree, runs in its own process
+    """
+    shared = support.load_lib_module("shared")
+    icons = support.load_lib_module("icons")
+    cache = shared.SharedPackageCache(cache_path, roots=[tree])
+    for package in shared_packages(tree):
+        icon_path = package.apps()[0].icon_path
+        cache.put(package, LANGUAGE, {icon_path: [icons.IconVariant(icon_path, scale=100)]})
+    return cache.writes, cache.failures
+
+
+def test_default_roots_prefer_the_64_bit_program_files(monkeypatch):
+    shared = support.load_lib_module("shared")
+    monkeypatch.setenv("ProgramFiles", os.path.join("C:", "Program Files (x86)"))
+    monkeypatch.setenv("ProgramW6432", os.path.join("C:", "Program Files"))
+
+    assert shared.default_roots()[0] == os.path.join("C:", "Program Files", "WindowsApps")
+
+    monkeypatch.delenv("ProgramW6432")
+    assert shared.default_roots()[0] == os.path.join("C:", "Program Files (x86)", "WindowsApps")
+
+
+def test_processes_write_every_entry_once(tmp_path):
+    tree = str(tmp_path / "WindowsApps")
+    cache_path = str(tmp_path / "shared")
+    synthetic.generate_tree(tree, packages=20, qualifiers=())
+
+    with concurrent.futures.ProcessPoolExecutor(PROCESSES) as executor:
+        results = list(executor.map(write_entries, [cache_path] * PROCESSES, [tree] * PROCESSES))
+
+    assert sum(writes for writes, _ in results) == 20
+    assert sum(failures for _, failures in results) == 0
+    assert not [name for name in os.listdir(cache_path) if name.endswith(".tmp")]
+
+    shared = support.load_lib_module("shared")
+    cache = shared.SharedPackageCache(cache_path, roots=[tree])
+    for package in shared_packages(tree):
+        entry = cache.get(package, LANGUAGE)
+        assert entry is not None
+        assert entry["apps"] == [app.to_record() for app in package.apps()]
+    assert cache.failures == 0
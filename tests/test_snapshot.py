@@ -0,0 +1,102 @@
+"""The catalog snapshot keeps the apps of unchanged packages between runs and restarts
+"""
+import os
+import shutil
+import time
+
+import support
+import synthetic
+from support import OpenCounter
+
+
+def catalog(windowsapps, cache_path, tree):
+    source = windowsapps.sources.DirectoryPackageSource(tree)
+    return support.create_plugin(windowsapps.WindowsApps, cache_path, source)
+
+
+def labels(plugin):
+    return sorted(item.label() for item in plugin.catalogs[-1])
+
+
+def touch(path):
+    later = time.time() + 10
+    os.utime(path, (later, later))
+
+
+def test_cold_run_reads_every_manifest(windowsapps, resolver, tree, tmp_path):
+    plugin = catalog(windowsapps, str(tmp_path / "cache"), tree)
+    with OpenCounter() as opens:
+        plugin.on_catalog()
+
+    assert opens.manifests == 5
+    assert labels(plugin) == ["Windows App: App {}.0".format(index) for index in range(5)]
+    assert os.path.isfile(os.path.join(plugin.cache_path, windowsapps.WindowsApps.SNAPSHOT_FILE))
+
+
+def test_restart_reads_no_manifest(windowsapps, resolver, tree, tmp_path):
+    cache_path = str(tmp_path / "cache")
+    first = catalog(windowsapps, cache_path, tree)
+    first.on_catalog()
+    resolver.calls = 0
+
+    restarted = catalog(windowsapps, cache_path, tree)
+    with OpenCounter() as opens:
+        restarted.on_catalog()
+
+    assert opens.manifests == 0
+    assert resolver.calls == 0
+    assert labels(restarted) == labels(first)
+
+
+def test_unchanged_rebuild_reads_no_manifest(windowsapps, resolver, tree, tmp_path):
+    plugin = catalog(windowsapps, str(tmp_path / "cache"), tree)
+    plugin.on_catalog()
+
+    with OpenCounter() as opens:
+        plugin.on_catalog()
+
+    assert opens.manifests == 0
+    assert plugin._stats.kind == "unchanged"
+    assert labels(plugin) == ["Windows App: App {}.0".format(index) for index in range(5)]
+
+
+def test_changed_package_is_read_again(windowsapps, resolver, tree, tmp_path):
+    cache_path = str(tmp_path / "cache")
+    catalog(windowsapps, cache_path, tree).on_catalog()
+    install_location = synthetic.package_props(tree, 3)["InstallLocation"]
+    synthetic.write_manifest(install_location, 3, apps=2)
+    touch(os.path.join(install_location, "AppxManifest.xml"))
+    shutil.rmtree(synthetic.package_props(tree, 1)["InstallLocation"])
+
+    restarted = catalog(windowsapps, cache_path, tree)
+    with OpenCounter() as opens:
+        restarted.on_catalog()
+
+    assert opens.manifests == 1
+    assert labels(restarted) == ["Windows App: App 0.0", "Windows App: App 2.0", "Windows App: App 3.0",
+                                 "Windows App: App 3.1", "Windows App: App 4.0"]
+
+
+def test_changed_pri_file_resolves_again(windowsapps, resolver, tree, tmp_path):
+    cache_path = str(tmp_path / "cache")
+    catalog(windowsapps, cache_path, tree).on_catalog()
+    touch(os.path.join(synthetic.package_props(tree, 2)["InstallLocation"], "resources.pri"))
+
+    restarted = catalog(windowsapps, cache_path, tree)
+    with OpenCounter() as opens:
+        restarted.on_catalog()
+
+    assert opens.manifests == 1
+
+
+def test_other_ui_language_reads_every_manifest(windowsapps, resolver, tree, tmp_path):
+    cache_path = str(tmp_path / "cache")
+    catalog(windowsapps, cache_path, tree).on_catalog()
+
+    support.install_resolver(support.FakeResolver("App de"), language="1031")
+    restarted = catalog(windowsapps, cache_path, tree)
+    with OpenCounter() as opens:
+        restarted.on_catalog()
+
+    assert opens.manifests == 5
+    assert labels(restarted) == ["Windows App: App de {}.0".format(index) for index in range(5)]
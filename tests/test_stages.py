@@ -0,0 +1,73 @@
+"""Publishing the app catalog in stages, the texts first and the icons afterwards
+"""
+import json
+import os
+
+import support
+import synthetic
+
+
+def create_plugin(windowsapps, tmp_path, tree):
+    plugin = support.create_plugin(windowsapps.WindowsApps, str(tmp_path / "cache"),
+                                   windowsapps.sources.DirectoryPackageSource(tree))
+    published = []
+
+    def set_catalog(catalog):
+        published.append((list(catalog), plugin.loaded_icons))
+
+    plugin.set_catalog = set_catalog
+    return plugin, published
+
+
+def target(index):
+    return "shell:AppsFolder\\Synthetic.App{}_8wekyb3d8bbwe!App".format(index)
+
+
+def test_texts_are_published_before_the_icons(windowsapps, resolver, tree, tmp_path):
+    plugin, published = create_plugin(windowsapps, tmp_path, tree)
+    plugin.on_catalog()
+
+    assert len(published) == 2
+    (texts, icons_loaded), (final, _) = published
+    assert icons_loaded == 0
+    assert [item.target() for item in texts] == [target(index) for index in range(5)]
+    assert all(item.icon() is None for item in texts)
+    # the labels of the first stage are resolved by the second one
+    assert [item.label() for item in texts] == ["Windows App: Synthetic.App{}".format(index) for index in range(5)]
+    assert [item.label() for item in final] == ["Windows App: App {}.0".format(index) for index in range(5)]
+    assert all(item.icon() is not None for item in final)
+    assert plugin.log_lines("info")[0].startswith("Published 5 items of stage 'text'")
+
+
+def test_launched_apps_are_published_with_icons_first(windowsapps, resolver, tree, tmp_path):
+    os.makedirs(str(tmp_path / "cache"))
+    with open(str(tmp_path / "cache" / windowsapps.WindowsApps.USAGE_FILE), "w", encoding="utf8") as usage_file:
+        json.dump({target(3): 5, target(1): 2}, usage_file)
+    plugin, published = create_plugin(windowsapps, tmp_path, tree)
+    plugin.on_catalog()
+
+    assert len(published) == 3
+    launched = published[1][0]
+    assert [item.target() for item in launched] == [target(index) for index in range(5)]
+    assert [item.target() for item in launched if item.icon() is not None] == [target(1), target(3)]
+    assert len([line for line in plugin.log_lines("info") if line.startswith("Launched apps ready after")]) == 1
+
+
+def test_first_package_is_logged_without_launched_apps(windowsapps, resolver, tree, tmp_path):
+    plugin, published = create_plugin(windowsapps, tmp_path, tree)
+    plugin.on_catalog()
+
+    ready = [line for line in plugin.log_lines("info") if "ready after" in line]
+    assert len(ready) == 1
+    assert ready[0].startswith("No launched apps, first package ready after")
+
+
+def test_later_runs_publish_only_the_complete_catalog(windowsapps, resolver, tree, tmp_path):
+    plugin, published = create_plugin(windowsapps, tmp_path, tree)
+    plugin.on_catalog()
+    manifest_path = os.path.join(synthetic.package_props(tree, 2)["InstallLocation"], "AppxManifest.xml")
+    os.utime(manifest_path, (1, 1))
+    plugin.on_catalog()
+
+    assert len(published) == 3
+    assert all(item.icon() is not None for item in published[2][0])
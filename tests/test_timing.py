@@ -0,0 +1,33 @@
+"""Measuring catalog runs with catalog_timings
+"""
+import support
+
+timing = support.load_lib_module("timing")
+
+
+def test_plugin_reports_without_an_audit_hook(windowsapps, resolver, tree, tmp_path):
+    plugin = support.create_plugin(windowsapps.WindowsApps, str(tmp_path / "cache"),
+                                   windowsapps.sources.DirectoryPackageSource(tree), catalog_timings=True)
+    plugin.on_catalog()
+
+    assert not timing._audit_hook_installed
+    report = plugin.log_lines("info")
+    assert any(line.startswith("Catalog run (cold) took") for line in report)
+    assert any("count manifests parsed" in line for line in report)
+    assert any(line.startswith("Stored the cold catalog run as baseline") for line in report)
+
+
+def test_later_runs_are_compared_with_the_baseline(windowsapps, resolver, tree, tmp_path):
+    cache_path = str(tmp_path / "cache")
+    source = windowsapps.sources.DirectoryPackageSource(tree)
+    support.create_plugin(windowsapps.WindowsApps, cache_path, source, catalog_timings=True).on_catalog()
+
+    plugin = support.create_plugin(windowsapps.WindowsApps, cache_path, source, catalog_timings=True)
+    plugin.on_catalog()
+    plugin.on_catalog()
+    plugin.on_catalog()
+
+    report = plugin.log_lines("info")
+    assert any(line.startswith("Stored the warm catalog run as baseline") for line in report)
+    assert any(line.startswith("Stored the unchanged catalog run as baseline") for line in report)
+    assert report.count("Compared with baseline:") == 1
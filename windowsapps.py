@@ -1,14 +1,26 @@
-import glob
+import time
+
+# start of loading the plugin, to measure the time until it is started
+_load_start = time.perf_counter()
+
+import collections
+import concurrent.futures
+import hashlib
 import json
 import os
-import subprocess
-import time
+import shutil
+import threading
 import traceback
 
 import keypirinha as kp
 import keypirinha_util as kpu
 
 from .lib import helper
+from .lib import icons
+from .lib import search
+from .lib import shared
+from .lib import sources
+from .lib import timing
 
 
 class WindowsApps(kp.Plugin):
@@ -19,10 +31,32 @@ class WindowsApps(kp.Plugin):
     DEFAULT_ITEM_LABEL = "Windows App:"
     DEFAULT_SHOW_MISC_APPS = False
     DEFAULT_PREFERRED_CONTRAST = ""
+    DEFAULT_PRESCALE_ICONS = False
+    DEFAULT_CATALOG_WORKERS = 4
+    DEFAULT_PACKAGE_SOURCE = "auto"
+    DEFAULT_SHARED_CACHE_PATH = ""
+    DEFAULT_CATALOG_TIMINGS = False
+    DEFAULT_CATALOG_TIMINGS_TOP = 10
+    DEFAULT_CATALOG_PROFILE = False
+    DEFAULT_CATALOG_MEMORY = False
     STORE_PREFIX = "ms-windows-store://pdp/?PFN={}"
     ACTION_RUN_NORMAL = "run_normal"
     ACTION_RUN_ELEVATED = "run_elevated"
     ACTION_OPEN_STORE_PAGE = "open_store_page"
+    DEFAULT_ACTION_LABELS = {
+        ACTION_RUN_NORMAL: "Open",
+        ACTION_RUN_ELEVATED: "Run as administrator",
+    }
+    ACTION_LABELS_FILE = "action_labels.json"
+    USAGE_FILE = "usage.json"
+    SNAPSHOT_FILE = "catalog_snapshot.jsonl"
+    RESOURCE_CACHE_FILE = "resource_cache.json"
+    ICON_STORE_DIR = "icons"
+    # directories of the package cache owned by the plugins, other ones are left from the logo copies of every
+    # package that versions before the icon stores made
+    CACHE_DIRS = ("icons", "settings_icons")
+    PROFILE_FILE = "catalog.prof"
+    BASELINE_FILE = "catalog_baseline.json"
 
     def __init__(self):
         """Default constructor and initializing internal attributes
@@ -31,70 +65,248 @@ class WindowsApps(kp.Plugin):
         self._item_label = self.DEFAULT_ITEM_LABEL
         self._show_misc_apps = self.DEFAULT_SHOW_MISC_APPS
         self._preferred_contrast = self.DEFAULT_PREFERRED_CONTRAST
-        self._icon_handles = []
+        self._prescale_icons = self.DEFAULT_PRESCALE_ICONS
+        self._catalog_workers = self.DEFAULT_CATALOG_WORKERS
+        self._package_source = sources.create_source(self.DEFAULT_PACKAGE_SOURCE)
+        self._shared_cache = None
+        self._icon_registry = icons.IconRegistry(self.load_icon)
+        self._icon_refs = []
+        self._asset_index = icons.AssetIndex()
+        self._icon_store = None
+        self._catalog_timings = self.DEFAULT_CATALOG_TIMINGS
+        self._catalog_timings_top = self.DEFAULT_CATALOG_TIMINGS_TOP
+        self._catalog_profile = self.DEFAULT_CATALOG_PROFILE
+        self._catalog_memory = self.DEFAULT_CATALOG_MEMORY
+        self._worker_profiles = None
+        self._stats = timing.CatalogStats(enabled=False)
+        self._catalog_data = None
+        self._fingerprint = None
+        # labels resolved by the background thread of on_start, set as actions by the plugin thread
+        self._resolved_action_labels = None
 
     def _get_icon(self, name, icon_path):
-        """Create a list of possible logo files to show as icon for a window app
-        """
-        base_path = os.path.splitext(icon_path)
-        dirname = os.path.dirname(base_path[0])
-        basename = os.path.basename(base_path[0])
-        logos = []
-        logos.extend(glob.glob(icon_path))
-        logos.extend(glob.glob("{}.scale-*{}".format(base_path[0], base_path[1])))
-        logos.extend(glob.glob("{}/scale-*/{}{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}.targetsize-*{}".format(base_path[0], base_path[1])))
-        logos.extend(glob.glob("{}.contrast-*{}".format(base_path[0], base_path[1])))
-        logos.extend(glob.glob("{}/contrast-*/{}{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}/contrast-*/{}.contrast-*{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}/contrast-*/{}.scale-*{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}/contrast-*/{}.targetsize-*{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}/contrast-*/scale-*/{}{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}/scale-*/{}.contrast-*{}".format(dirname, basename, base_path[1])))
-        logos.extend(glob.glob("{}/scale-*/contrast-*/{}{}".format(dirname, basename, base_path[1])))
-
-        if self._preferred_contrast:
-            logos_preferred = [logo for logo in logos if "contrast-{}".format(self._preferred_contrast) in logo]
-        else:
-            logos_preferred = [logo for logo in logos if "contrast-" not in logo]
+        """Selects the logo files that fit the icon sizes best and loads them as icon for a window app
+        """
+        return self._load_icon(self._get_icon_sources(name, icon_path))
+
+    def _get_icon_sources(self, name, icon_path, variants=None):
+        """Selects the logo files that fit the icon sizes best and returns them as cached keypirinha resource strings
 
-        if logos_preferred:
-            logos = logos_preferred
+        The variants of the logo are looked up in the asset index unless they are given.
+        Safe to be called from worker threads.
+        """
+        with self._stats.phase("icon selection"):
+            if variants is None:
+                variants = self._asset_index.variants(icon_path)
+            base_size = icons.logo_base_size(icon_path)
+            best_variants = icons.best_variants(variants, self._preferred_contrast, base_size)
+            logos = []
+            for _, variant in best_variants:
+                if variant.path not in logos:
+                    logos.append(variant.path)
 
         self.dbg(name)
         for logo in logos:
             self.dbg("{}".format(logo))
 
+        if logos and self._prescale_icons and icons.load_pillow() and icons.needs_prescaling(best_variants, base_size):
+            with self._stats.phase("icon render"):
+                cached_logo = self._render_icon([(size, variant.path) for size, variant in best_variants])
+            if cached_logo:
+                return [cached_logo]
         if logos:
-            cached_logos = self._copy_files(name, logos)
-            handle = self.load_icon(cached_logos, force_reload=True)
-            self._icon_handles.append(handle)
+            with self._stats.phase("icon copy"):
+                return self._copy_files(name, logos)
+        return []
+
+    def _load_icon(self, cached_logos):
+        """Loads the cached logos as icon, has to be called from the plugin thread
+        """
+        if cached_logos:
+            # stored files are named after their content, an already loaded one never needs to be reloaded
+            with self._stats.phase("load icon"):
+                handle, key = self._icon_registry.acquire(cached_logos)
+            self._icon_refs.append(key)
             return handle
 
     def _copy_files(self, name, logos):
-        """Copies the logos to the package cache and returns a list of keypirinha resource strings
+        """Adds the logos to the icon store and returns a list of keypirinha resource strings
         """
         cached_logos = []
         for logo in logos:
-            out_dir = os.path.join(self.get_package_cache_path(True), name)
-            if not os.path.isdir(out_dir):
-                os.mkdir(out_dir)
             try:
-                out_path = os.path.join(out_dir, os.path.basename(logo))
-                if not os.path.isfile(out_path) or os.path.getsize(out_path) != os.path.getsize(logo):
-                    with open(logo, "rb") as in_file, \
-                            open(out_path, "wb") as out_file:
-                        out_file.write(in_file.read())
+                file_name = self._icon_store.add(logo)
                 cached_logos.append("cache://{}/{}/{}".format(self.package_full_name(),
-                                                              name,
-                                                              os.path.basename(logo)))
+                                                              self.ICON_STORE_DIR,
+                                                              file_name))
             except Exception as ex:
                 self.warn(ex)
                 self.dbg(traceback.format_exc())
         return cached_logos
 
+    def _render_icon(self, logos_by_size):
+        """Adds an icon rendered from the logos at the icon sizes to the icon store and returns its keypirinha resource
+        string or None if rendering failed
+        """
+        try:
+            file_name = self._icon_store.add_rendered(logos_by_size, icons.render_icon)
+            return "cache://{}/{}/{}".format(self.package_full_name(), self.ICON_STORE_DIR, file_name)
+        except Exception as ex:
+            self.warn("Failed to render icon, using the original logos:", ex)
+            self.dbg(traceback.format_exc())
+            return None
+
+    def _begin_icon_run(self):
+        """Prepares asset index and icon store for a new catalog run
+        """
+        self._asset_index = icons.AssetIndex()
+        if self._icon_store is None:
+            self._remove_legacy_logo_dirs()
+            self._icon_store = icons.IconStore(os.path.join(self.get_package_cache_path(True), self.ICON_STORE_DIR))
+        self._icon_store.begin_run()
+
+    def _remove_legacy_logo_dirs(self):
+        """Removes the directories of the package cache that are not in CACHE_DIRS, once per start of the plugin
+
+        Earlier versions copied the logos of every package to a directory named after the package, nothing else would
+        ever remove them.
+        """
+        shared_cache_path = os.path.normcase(os.path.abspath(self._shared_cache.path)) if self._shared_cache else None
+        try:
+            with os.scandir(self.get_package_cache_path(False)) as entries:
+                legacy_dirs = [entry.path for entry in entries
+                               if entry.name not in self.CACHE_DIRS and entry.is_dir()
+                               and os.path.normcase(os.path.abspath(entry.path)) != shared_cache_path]
+        except OSError:
+            return
+        for legacy_dir in legacy_dirs:
+            self.dbg("Removing legacy logo directory:", legacy_dir)
+            shutil.rmtree(legacy_dir, ignore_errors=True)
+
+    def _end_icon_run(self):
+        """Removes logos no longer used by the catalog from the icon store and persists its index
+        """
+        try:
+            removed, freed = self._icon_store.collect_garbage()
+            self._icon_store.save()
+            count, size = self._icon_store.size()
+            self.dbg("Icon store: {} files, {} bytes, {} hits, {} misses, removed {} files ({} bytes)".format(
+                count, size, self._icon_store.hits, self._icon_store.misses, removed, freed))
+            saved = self._icon_store.source_bytes - self._icon_store.stored_bytes
+            self.dbg("Icons: {} bytes of logos loaded as {} bytes, {} bytes saved".format(
+                self._icon_store.source_bytes, self._icon_store.stored_bytes, saved))
+            self._stats.count("icon bytes saved", saved)
+            self._stats.count("logos copied", self._icon_store.misses)
+            self._stats.count("icon store hits", self._icon_store.hits)
+        except Exception as ex:
+            self.warn("Failed to clean up icon store:", ex)
+            self.dbg(traceback.format_exc())
+
+    def _read_diagnostics_config(self, settings):
+        """Reads the settings for timing reports and profiling of catalog runs
+        """
+        self._catalog_timings = settings.get_bool("catalog_timings", "main", self.DEFAULT_CATALOG_TIMINGS)
+        self.dbg("catalog_timings =", self._catalog_timings)
+
+        self._catalog_timings_top = settings.get_int("catalog_timings_top",
+                                                     "main",
+                                                     self.DEFAULT_CATALOG_TIMINGS_TOP,
+                                                     min=0)
+        self.dbg("catalog_timings_top =", self._catalog_timings_top)
+
+        self._catalog_profile = settings.get_bool("catalog_profile", "main", self.DEFAULT_CATALOG_PROFILE)
+        self.dbg("catalog_profile =", self._catalog_profile)
+
+        self._catalog_memory = settings.get_bool("catalog_memory", "main", self.DEFAULT_CATALOG_MEMORY)
+        self.dbg("catalog_memory =", self._catalog_memory)
+
+    def _run_profiled(self, catalog_func):
+        """Runs the catalog function, with cProfile if enabled in the config
+
+        The plugin thread and the tasks run by the worker threads (see _profiled) are profiled, the profiles are merged
+        and written to the package cache.
+        """
+        if not self._catalog_profile:
+            catalog_func()
+            return
+
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        self._worker_profiles = []
+        profiler.enable()
+        try:
+            catalog_func()
+        finally:
+            profiler.disable()
+            stats = pstats.Stats(profiler)
+            for worker_profile in self._worker_profiles:
+                stats.add(worker_profile)
+            self._worker_profiles = None
+            profile_path = os.path.join(self.get_package_cache_path(True), self.PROFILE_FILE)
+            stats.dump_stats(profile_path)
+            self.info("Wrote catalog profile to", profile_path)
+
+    def _profiled(self, task):
+        """Returns the task to submit to the worker threads, profiling it in the worker thread if catalog_profile is
+        enabled
+
+        A cProfile profiler only sees the thread it was enabled in.
+        """
+        if self._worker_profiles is None:
+            return task
+
+        import cProfile
+
+        worker_profiles = self._worker_profiles
+
+        def profiled_task(*args):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # since Python 3.12 only one profiler can be active, the one of the plugin thread sees all threads
+                return task(*args)
+            try:
+                return task(*args)
+            finally:
+                profiler.disable()
+                worker_profiles.append(profiler)
+
+        return profiled_task
+
+    def _report_stats(self):
+        """Logs timings and counters of the catalog run, if enabled in the config
+        """
+        if not self._stats.enabled:
+            return
+        resource_cache = helper.resource_cache
+        self._stats.count("resource lookups", resource_cache.hits + resource_cache.misses)
+        self._stats.count("resource cache hits", resource_cache.hits)
+        self._stats.count("resolver calls", resource_cache.resolver_calls)
+        self._stats.add_time("resolve resources", resource_cache.resolver_seconds)
+        for line in self._stats.report(self._catalog_timings_top):
+            self.info(line)
+
+        if not self._stats.kind:
+            return
+        try:
+            baselines = timing.Baselines(os.path.join(self.get_package_cache_path(True), self.BASELINE_FILE))
+            baseline = baselines.get(self._stats.kind)
+            if baseline:
+                for line in self._stats.compare(baseline):
+                    self.info(line)
+            elif baselines.record(self._stats):
+                self.info("Stored the {} catalog run as baseline in".format(self._stats.kind), baselines.path)
+        except Exception as ex:
+            self.warn("Failed to compare with baseline:", ex)
+            self.dbg(traceback.format_exc())
+
     def _read_config(self):
         """Reads the default action from the config
+
+        Returns True if a setting changed, that requires reading the packages again.
         """
         self.dbg("Reading config")
         settings = self.load_settings()
@@ -107,32 +319,74 @@ class WindowsApps(kp.Plugin):
         self._show_misc_apps = settings.get_bool("show_misc_apps", "main", self.DEFAULT_SHOW_MISC_APPS)
         self.dbg("show_misc_apps =", self._show_misc_apps)
 
+        self._catalog_workers = settings.get_int("catalog_workers", "main", self.DEFAULT_CATALOG_WORKERS, min=1)
+        self.dbg("catalog_workers =", self._catalog_workers)
+
+        package_source = settings.get_enum("package_source", "main", self.DEFAULT_PACKAGE_SOURCE, sources.SOURCE_NAMES)
+        self.dbg("package_source =", package_source)
+        package_source_changed = package_source != self._package_source.name
+        if package_source_changed:
+            self._package_source = sources.create_source(package_source)
+
+        shared_cache_path = os.path.expandvars(settings.get("shared_cache_path", "main",
+                                                            self.DEFAULT_SHARED_CACHE_PATH)).strip()
+        self.dbg("shared_cache_path =", shared_cache_path)
+        if not shared_cache_path:
+            self._shared_cache = None
+        elif self._shared_cache is None or self._shared_cache.path != shared_cache_path:
+            self._shared_cache = shared.SharedPackageCache(shared_cache_path)
+
+        self._read_diagnostics_config(settings)
+
+        prescale_icons_changed = self._read_prescale_config(settings)
+
+        # logos of another contrast are selected by the next catalog run, the icon store removes the unused ones
         preferred_contrast_before = self._preferred_contrast
         self._preferred_contrast = settings.get_enum("preferred_contrast",
                                                      "main",
                                                      self.DEFAULT_PREFERRED_CONTRAST,
                                                      ["black", "white", ""])
         self.dbg("preferred_contrast =", self._preferred_contrast)
-        preferred_contrast_after = self._preferred_contrast
-        if preferred_contrast_before != preferred_contrast_after:
-            self._clear_logo_cache()
+
+        return package_source_changed or prescale_icons_changed \
+            or preferred_contrast_before != self._preferred_contrast
+
+    def _read_prescale_config(self, settings):
+        """Reads whether icons are rendered at the icon sizes, returns True if the setting changed
+        """
+        prescale_icons_before = self._prescale_icons
+        self._prescale_icons = settings.get_bool("prescale_icons", "main", self.DEFAULT_PRESCALE_ICONS)
+        self.dbg("prescale_icons =", self._prescale_icons)
+        if self._prescale_icons and not icons.load_pillow():
+            self.warn("prescale_icons requires Pillow (PIL), the original logos are used")
+        return prescale_icons_before != self._prescale_icons
 
     def on_start(self):
-        """Reads the config
+        """Reads the config and sets the actions
+
+        The labels of the run actions are localized resource strings, they are taken from the labels persisted by an
+        earlier start and resolved again in the background, so starting does not wait for the system resources. The
+        actions are only set on the plugin thread, the resolved labels by the next on_catalog or on_suggest.
         """
         self._read_config()
 
+        labels = self._load_action_labels()
+        self._set_actions(labels)
+        threading.Thread(target=self._refresh_action_labels, args=(labels,), daemon=True).start()
+        self.info("Started {:0.3f} seconds after loading the plugin".format(time.perf_counter() - _load_start))
+
+    def _set_actions(self, labels):
         actions = []
 
         normal = self.create_action(
             name=self.ACTION_RUN_NORMAL,
-            label=helper.AppXPackage.get_resource(os.path.join(os.environ["WINDIR"], "SystemResources"), helper.RESOURCE_OPEN),
+            label=labels[self.ACTION_RUN_NORMAL],
         )
         actions.append(normal)
 
         elevated = self.create_action(
             name=self.ACTION_RUN_ELEVATED,
-            label=helper.AppXPackage.get_resource(os.path.join(os.environ["WINDIR"], "SystemResources"), helper.RESOURCE_RUN_AS_ADMIN),
+            label=labels[self.ACTION_RUN_ELEVATED],
         )
         actions.append(elevated)
 
@@ -145,78 +399,485 @@ class WindowsApps(kp.Plugin):
 
         self.set_actions(kp.ItemCategory.CMDLINE, actions)
 
+    def _apply_action_labels(self):
+        """Sets the actions with the labels resolved by _refresh_action_labels if they changed
+        """
+        labels = self._resolved_action_labels
+        if labels is not None:
+            self._resolved_action_labels = None
+            self._set_actions(labels)
+
+    def _load_action_labels(self):
+        """Returns the labels of the run actions persisted for the UI language or the default labels
+        """
+        labels = dict(self.DEFAULT_ACTION_LABELS)
+        labels_path = os.path.join(self.get_package_cache_path(False), self.ACTION_LABELS_FILE)
+        try:
+            with open(labels_path, "r", encoding="utf8") as labels_file:
+                persisted = json.load(labels_file)
+            if persisted.get("language") == helper.resource_cache.language:
+                labels.update(persisted["labels"])
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            self.warn("Failed to load action labels:", ex)
+            self.dbg(traceback.format_exc())
+        return labels
+
+    def _refresh_action_labels(self, labels):
+        """Resolves the labels of the run actions and persists them if they changed, runs in a background thread
+
+        The changed labels are left to _apply_action_labels, as the actions may only be set on the plugin thread.
+        """
+        try:
+            resources = {self.ACTION_RUN_NORMAL: helper.RESOURCE_OPEN,
+                         self.ACTION_RUN_ELEVATED: helper.RESOURCE_RUN_AS_ADMIN}
+            resolved = helper.AppXPackage.get_resources(os.path.join(os.environ["WINDIR"], "SystemResources"),
+                                                        list(resources.values()))
+            new_labels = {action: resolved[resource] or self.DEFAULT_ACTION_LABELS[action]
+                          for action, resource in resources.items()}
+            if new_labels == labels:
+                return
+            self.dbg("Action labels changed:", new_labels)
+            self._resolved_action_labels = new_labels
+
+            # both plugins of the package refresh the labels at the same time
+            labels_path = os.path.join(self.get_package_cache_path(True), self.ACTION_LABELS_FILE)
+            tmp_path = "{}.{}.tmp".format(labels_path, threading.get_ident())
+            with open(tmp_path, "w", encoding="utf8") as labels_file:
+                json.dump({"language": helper.resource_cache.language, "labels": new_labels}, labels_file)
+            os.replace(tmp_path, labels_path)
+        except Exception as ex:
+            self.warn("Failed to refresh action labels:", ex)
+            self.dbg(traceback.format_exc())
+
+    def _load_usage(self):
+        """Returns how often the apps were launched by their targets
+        """
+        usage_path = os.path.join(self.get_package_cache_path(False), self.USAGE_FILE)
+        try:
+            with open(usage_path, "r", encoding="utf8") as usage_file:
+                return json.load(usage_file)
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            self.warn("Failed to load usage:", ex)
+            self.dbg(traceback.format_exc())
+        return {}
+
+    def _count_launch(self, target):
+        """Counts a launch of an app and persists the counts in the package cache
+        """
+        usage = self._load_usage()
+        usage[target] = usage.get(target, 0) + 1
+        usage_path = os.path.join(self.get_package_cache_path(True), self.USAGE_FILE)
+        try:
+            with open(usage_path + ".tmp", "w", encoding="utf8") as usage_file:
+                json.dump(usage, usage_file)
+            os.replace(usage_path + ".tmp", usage_path)
+        except Exception as ex:
+            self.warn("Failed to save usage:", ex)
+            self.dbg(traceback.format_exc())
+
     def on_events(self, flags):
         """Reloads the package config when its changed
         """
         if flags & kp.Events.PACKCONFIG:
-            self._read_config()
-            self.on_catalog()
+            if self._read_config() or self._catalog_data is None:
+                # the kept app data has the logos selected with the old settings
+                self._fingerprint = None
+                self.on_catalog()
+            else:
+                self._rebuild_catalog()
 
     def on_catalog(self):
         """Catalogs items for keypirinha
 
-        Calls powershell to get a list of windows app packages with their properties
+        Gets a list of windows app packages with their properties from the package source
         and creates catalog items for keypirinha.
+        The packages are streamed from the source to a pool of worker threads, catalog items are created in the
+        order of the packages as soon as they are ready.
+        Cataloging is done in two stages: the first one reads the manifests and takes resource strings only from
+        the cache, the second one resolves the missing resource strings and the icons. If there is no catalog yet, it
+        is published after each stage.
+        The second stage completes the packages in the order of how often their apps were launched, packages without
+        visible apps come last. Without a catalog yet, the items are also published as soon as the launched apps are
+        complete.
+        If the installed packages did not change since the last run, the items are created from the kept app data.
         """
-        start_time = time.time()
+        self._apply_action_labels()
+        self._run_profiled(self._catalog_apps)
+
+    def on_suggest(self, user_input, items_chain):
+        """Sets the actions with the labels resolved in the background, the apps are only searched in the catalog
+        """
+        self._apply_action_labels()
 
-        self.dbg("Freeing", len(self._icon_handles), "icon handles")
-        for icon_handle in self._icon_handles:
-            icon_handle.free()
-        self._icon_handles.clear()
-
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        output, err = subprocess.Popen(["powershell.exe",
-                                        "-noprofile",
-                                        "chcp 65001 >$null; [Console]::OutputEncoding = [System.Text.UTF8Encoding]::new(); Get-AppxPackage | ConvertTo-Json"],
-                                       stdout=subprocess.PIPE,
-                                       universal_newlines=False,
-                                       shell=False,
-                                       startupinfo=startupinfo).communicate()
+    def _catalog_apps(self):
+        start_time = time.time()
+        self._stats = timing.CatalogStats(enabled=self._catalog_timings, trace_memory=self._catalog_memory)
 
+        self._load_resource_cache()
+        if self._shared_cache is not None:
+            self._shared_cache.begin_run()
+        with self._stats.phase("snapshot"):
+            snapshot = self._load_snapshot()
+        self._stats.kind = "warm" if snapshot else "cold"
+        new_snapshot = {}
+        prepared = []
         catalog = []
-        packages = json.loads(output.decode("utf8", "replace"))
-        for package in packages:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._catalog_workers) as executor:
+            # first stage: manifests and cached resource strings
+            pending = collections.deque()
             try:
-                catalog.extend(self._create_catalog_item(package))
+                packages = iter(self._package_source.packages())
+                while True:
+                    with self._stats.phase("package source"):
+                        props = next(packages, None)
+                    if props is None:
+                        break
+                    pending.append((props, executor.submit(self._profiled(self._prepare_package), props, snapshot)))
+                    while pending and pending[0][1].done():
+                        catalog.extend(self._collect_package(*pending.popleft(), prepared))
             except Exception as ex:
-                self.warn(ex)
+                self.err("Failed to list packages:", ex)
                 self.dbg(traceback.format_exc())
+                for _, future in pending:
+                    future.cancel()
+                self._stats.finish()
+                return
+            while pending:
+                catalog.extend(self._collect_package(*pending.popleft(), prepared))
+            self.dbg("Listed", len(prepared), "packages")
 
-        self.set_catalog(catalog)
+            fingerprint = self._fingerprint_packages(prepared)
+            if self._catalog_data is not None and fingerprint == self._fingerprint:
+                self.dbg("Installed packages did not change")
+                self._rebuild_catalog()
+                self._stats.kind = "unchanged"
+                self._report_stats()
+                return
+
+            # without a catalog from an earlier run, the items are published without icons first
+            if self._catalog_data is None:
+                self._publish("text", catalog, start_time)
+
+            # second stage: resource strings missing in the cache and icons, most launched apps first
+            self._begin_icon_run()
+            old_icon_refs = self._icon_refs
+            self._icon_refs = []
+            usage = self._load_usage()
+            priorities = [self._package_priority(package, usage) for _, package, _ in prepared]
+            order = sorted(range(len(prepared)), key=priorities.__getitem__)
+            complete_package = self._profiled(self._complete_package)
+            futures = [executor.submit(complete_package, *prepared[position], new_snapshot) for position in order]
+            used = sum(1 for position in order if priorities[position][0] < 0)
+            self._stats.count("launched packages", used)
+            completed = [None] * len(prepared)
+            catalog_data = []
+            for number, (position, future) in enumerate(zip(order, futures), 1):
+                completed[position] = self._collect_completed_package(future, catalog_data)
+                if number == used:
+                    self.info("Launched apps ready after {:0.2f} seconds".format(time.time() - start_time))
+                    if self._catalog_data is None and used < len(order):
+                        self._publish("launched apps", self._merge_completed(prepared, completed), start_time)
+                elif number == 1 and used == 0:
+                    self.info("No launched apps, first package ready after {:0.2f} seconds".format(
+                        time.time() - start_time))
+            catalog = [item for items in completed for item in items]
+
+        with self._stats.phase("snapshot"):
+            self._save_snapshot(new_snapshot)
+        self._save_resource_cache()
+        self._end_icon_run()
+        self._report_shared_cache()
+
+        self._publish("icons", catalog, start_time)
+        self._release_icons(old_icon_refs)
+        self._catalog_data = catalog_data
+        self._fingerprint = fingerprint
         elapsed = time.time() - start_time
         self.info("Cataloged {} items in {:0.1f} seconds".format(len(catalog), elapsed))
+        self._report_stats()
+
+    def _package_priority(self, package, usage):
+        """Returns the sort key of a package in the second stage
+
+        Packages whose apps were launched most often come first, packages without visible apps last.
+        """
+        apps = self._visible_apps(package)
+        return -sum(usage.get(app.execution, 0) for app in apps), not apps
+
+    def _merge_completed(self, prepared, completed):
+        """Returns the items of the packages completed so far and the items without icons of the other packages
+        """
+        catalog = []
+        for (_, package, _), items in zip(prepared, completed):
+            if items is None:
+                items = self._create_catalog_items([(app, None) for app in self._visible_apps(package)])
+            catalog.extend(items)
+        return catalog
+
+    def _fingerprint_packages(self, prepared):
+        """Returns a fingerprint of the installed packages, their versions, install locations, manifests and .pri files
+        """
+        packages = sorted([props.get("PackageFullName") or props.get("Name") or "",
+                           props.get("Version") or "",
+                           package.InstallLocation or "",
+                           package.manifest_stat(),
+                           helper.resource_cache.pri_signature(package.InstallLocation)
+                           if package.InstallLocation else None]
+                          for props, package, _ in prepared)
+        return hashlib.sha1(json.dumps(packages).encode("utf8")).hexdigest()
+
+    def _rebuild_catalog(self):
+        """Creates the catalog items again from the app data of the last catalog run without reading any package
+
+        Used when only settings changed, that affect the presentation of the items.
+        """
+        start_time = time.time()
+        old_icon_refs = self._icon_refs
+        self._icon_refs = []
+        catalog = []
+        for package, logos_by_app in self._catalog_data:
+            prepared = []
+            for app in self._visible_apps(package):
+                if app.execution not in logos_by_app:
+                    logos_by_app[app.execution] = self._get_icon_sources(package.Name, app.icon_path)
+                prepared.append((app, logos_by_app[app.execution]))
+            catalog.extend(self._create_catalog_items(prepared))
+        self.set_catalog(catalog)
+        self._release_icons(old_icon_refs)
+        elapsed = time.time() - start_time
+        self.info("Rebuilt {} items in {:0.1f} seconds".format(len(catalog), elapsed))
+
+    def _release_icons(self, icon_refs):
+        """Releases the icons referenced by a replaced catalog, icons no longer referenced at all are freed
+        """
+        freed_before = self._icon_registry.freed
+        self._icon_registry.release(icon_refs)
+        freed = self._icon_registry.freed - freed_before
+        live = self._icon_registry.live()
+        self.dbg("Released", len(icon_refs), "icon references, freed", freed, "icon handles,", live, "still loaded")
+        self._stats.count("icon handles freed", freed)
+        self._stats.count("icon handles live", live)
+
+    def _publish(self, stage, catalog, start_time):
+        """Sets the catalog of a stage and logs the time since the start of cataloging
+        """
+        self.set_catalog(catalog)
+        self.info("Published {} items of stage '{}' after {:0.2f} seconds".format(len(catalog),
+                                                                                    stage,
+                                                                                    time.time() - start_time))
+
+    def _load_snapshot(self):
+        """Loads the package snapshot of the last catalog run from the package cache
 
-    def _create_catalog_item(self, props):
+        The snapshot maps each package to its install location, the state of its manifest, the signature of its
+        .pri files and the records of the applications parsed from it. It is only valid for the UI language it was
+        written with.
+        """
+        snapshot_path = os.path.join(self.get_package_cache_path(False), self.SNAPSHOT_FILE)
         try:
-            package = helper.AppXPackage(props)
-            # some packages can be just libraries with no executable application
-            # only take packages which have a application
-            apps = package.apps()
-            catalog_items = []
-            if apps:
-                self.dbg(package.InstallLocation)
-                for app in apps:
-                    if not app.misc_app or self._show_misc_apps:
-                        catalog_items.append(self.create_item(
-                            category=kp.ItemCategory.CMDLINE,
-                            label="{} {}".format(self._item_label, app.display_name).strip(),
-                            short_desc=app.description
-                            if app.description else app.display_name,
-                            target=app.execution,
-                            args_hint=kp.ItemArgsHint.FORBIDDEN,
-                            hit_hint=kp.ItemHitHint.NOARGS,
-                            icon_handle=self._get_icon(package.Name, app.icon_path),
-                            data_bag=package.PackageFamilyName
-                        ))
-            return catalog_items
+            entries = helper.load_records(snapshot_path, helper.resource_cache.language)
+            if entries is not None:
+                return {entry[0]: entry[1:] for entry in entries}
+            self.dbg("Discarding catalog snapshot of another format version or UI language")
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            self.warn("Failed to load catalog snapshot:", ex)
+            self.dbg(traceback.format_exc())
+        return {}
+
+    def _save_snapshot(self, packages):
+        """Writes the package snapshot of the current catalog run to the package cache
+        """
+        snapshot_path = os.path.join(self.get_package_cache_path(True), self.SNAPSHOT_FILE)
+        try:
+            helper.save_records(snapshot_path,
+                                ([key] + entry for key, entry in packages.items()),
+                                helper.resource_cache.language)
+        except Exception as ex:
+            self.warn("Failed to save catalog snapshot:", ex)
+            self.dbg(traceback.format_exc())
+
+    def _load_resource_cache(self):
+        """Starts a new run of the resource cache and loads the strings resolved by earlier runs
+        """
+        helper.resource_cache.begin_run()
+        helper.resource_cache.load(os.path.join(self.get_package_cache_path(False), self.RESOURCE_CACHE_FILE))
+
+    def _save_resource_cache(self):
+        """Persists the resolved resource strings to the package cache
+        """
+        self.dbg("Resource cache hits:", helper.resource_cache.hits, "misses:", helper.resource_cache.misses)
+        try:
+            helper.resource_cache.save(os.path.join(self.get_package_cache_path(True), self.RESOURCE_CACHE_FILE))
+        except Exception as ex:
+            self.warn("Failed to save resource cache:", ex)
+            self.dbg(traceback.format_exc())
+
+    def _load_apps(self, package, snapshot):
+        """Returns the applications of the package, parsing the manifest only if it or the .pri files changed since
+        the last snapshot and the shared cache has no entry for it
+
+        Resource strings of a parsed manifest are only taken from the resource cache, the package is marked as
+        unresolved if some of them are missing and resolves them in the second stage.
+        """
+        key = package.snapshot_key()
+        manifest_stat = package.manifest_stat()
+        entry = snapshot.get(key) if key else None
+        if entry and manifest_stat is not None and entry[0] == package.InstallLocation and entry[1] == manifest_stat \
+                and entry[2] == helper.resource_cache.pri_signature(package.InstallLocation):
+            package.applications = [helper.AppX.from_record(record) for record in entry[3]]
+            return package.apps()
+
+        shared_entry = self._shared_entry(package)
+        if shared_entry is not None:
+            package.applications = [helper.AppX.from_record(record) for record in shared_entry["apps"]]
+        else:
+            self.dbg("Parsing manifest of", key)
+            package.cached_only = True
+        return package.apps()
+
+    def _shared_entry(self, package):
+        """Returns the entry of the package in the shared cache or None
+        """
+        if self._shared_cache is None:
+            return None
+        with self._stats.phase("shared cache"):
+            return self._shared_cache.get(package, helper.resource_cache.language)
+
+    def _share_package(self, package):
+        """Writes the applications of a package installed for all users and the variants of their logos to the shared
+        cache, if it has no entry for it yet
+        """
+        if self._shared_cache is None or not self._shared_cache.is_shared(package.InstallLocation) \
+                or self._shared_entry(package) is not None:
+            return
+        variants = {}
+        for app in package.apps():
+            if app.icon_path and app.icon_path not in variants:
+                variants[app.icon_path] = self._asset_index.variants(app.icon_path)
+        with self._stats.phase("shared cache"):
+            self._shared_cache.put(package, helper.resource_cache.language, variants)
+
+    def _report_shared_cache(self):
+        if self._shared_cache is None:
+            return
+        shared_cache = self._shared_cache
+        self.dbg("Shared cache hits:", shared_cache.hits, "misses:", shared_cache.misses,
+                 "writes:", shared_cache.writes, "failures:", shared_cache.failures)
+        self._stats.count("shared cache hits", shared_cache.hits)
+        self._stats.count("shared cache writes", shared_cache.writes)
+        if shared_cache.failures:
+            self.warn("Shared cache {} failed {} times, the packages were read per user instead".format(
+                shared_cache.path, shared_cache.failures))
+
+    def _store_snapshot(self, package, new_snapshot):
+        """Adds the applications of a package to the snapshot of the current catalog run
+        """
+        key = package.snapshot_key()
+        manifest_stat = package.manifest_stat()
+        if not key or manifest_stat is None:
+            return
+        new_snapshot[key] = [package.InstallLocation,
+                             manifest_stat,
+                             helper.resource_cache.pri_signature(package.InstallLocation),
+                             [app.to_record() for app in package.apps()]]
+
+    def _visible_apps(self, package):
+        # some packages can be just libraries with no executable application
+        # only take packages which have a application
+        return [app for app in package.apps() if not app.misc_app or self._show_misc_apps]
+
+    def _prepare_package(self, props, snapshot):
+        """Reads the applications of a package, runs in a worker thread
+
+        Returns the package and the seconds it took.
+        """
+        start = time.perf_counter()
+        try:
+            package = helper.AppXPackage(props, self._stats)
+            self._load_apps(package, snapshot)
+            return package, time.perf_counter() - start
         except Exception as exc:
             if "Name" in props:
                 raise Exception("Error while creating catalog item for '{0}'".format(props["Name"])) from exc
             else:
                 raise Exception("Error while creating catalog item for {0}".format(props)) from exc
 
+    def _collect_package(self, props, future, prepared):
+        """Creates the catalog items without icons of a package read in the first stage
+        """
+        try:
+            package, seconds = future.result()
+            prepared.append((props, package, seconds))
+            return self._create_catalog_items([(app, None) for app in self._visible_apps(package)])
+        except Exception as ex:
+            self.warn(ex)
+            self.dbg(traceback.format_exc())
+            return []
+
+    def _complete_package(self, props, package, seconds, new_snapshot):
+        """Resolves the resource strings missing in the first stage and the icons of a package, runs in a worker thread
+
+        Returns the package and a list of tuples of the applications to catalog and their cached logos.
+        """
+        start = time.perf_counter()
+        try:
+            if package.unresolved:
+                package.resolve()
+            self._store_snapshot(package, new_snapshot)
+            self._share_package(package)
+            shared_entry = self._shared_entry(package)
+            shared_variants = shared_entry["variants"] if shared_entry else {}
+            prepared = []
+            apps = self._visible_apps(package)
+            if apps:
+                self.dbg(package.InstallLocation)
+                for app in apps:
+                    variants = None
+                    if app.icon_path in shared_variants:
+                        variants = [icons.IconVariant.from_record(record) for record in shared_variants[app.icon_path]]
+                    prepared.append((app, self._get_icon_sources(package.Name, app.icon_path, variants)))
+            self._stats.package(package.Name, seconds + time.perf_counter() - start)
+            return package, prepared
+        except Exception as exc:
+            raise Exception("Error while creating catalog item for '{0}'".format(package.Name)) from exc
+
+    def _collect_completed_package(self, future, catalog_data):
+        """Creates the catalog items of a package completed in the second stage and keeps its app data
+        """
+        try:
+            package, prepared = future.result()
+            catalog_data.append((package, {app.execution: cached_logos for app, cached_logos in prepared}))
+            return self._create_catalog_items(prepared)
+        except Exception as ex:
+            self.warn(ex)
+            self.dbg(traceback.format_exc())
+            return []
+
+    def _create_catalog_items(self, prepared):
+        """Creates the catalog items for the prepared applications of a package
+        """
+        catalog_items = []
+        for app, cached_logos in prepared:
+            icon_handle = self._load_icon(cached_logos)
+            catalog_items.append(self.create_item(
+                category=kp.ItemCategory.CMDLINE,
+                label="{} {}".format(self._item_label, app.display_name).strip(),
+                short_desc=app.description
+                if app.description else app.display_name,
+                target=app.execution,
+                args_hint=kp.ItemArgsHint.FORBIDDEN,
+                hit_hint=kp.ItemHitHint.NOARGS,
+                icon_handle=icon_handle,
+                data_bag=app.package_family_name
+            ))
+        return catalog_items
+
     def on_execute(self, item, action):
         """Starts the windows app
         """
@@ -232,34 +893,30 @@ class WindowsApps(kp.Plugin):
         if action and action.name() == self.ACTION_RUN_ELEVATED:
             verb = "runas"
         kpu.shell_execute(item.target(), verb=verb)
-
-    def _clear_logo_cache(self):
-        self.dbg("Clearing logo cache")
-        top = self.get_package_cache_path(False)
-
-        self.dbg("Cleaning up:", top)
-        try:
-            for root, dirs, files in os.walk(top, topdown=False):
-                for name in files:
-                    path = os.path.join(root, name)
-                    self.dbg("Removing file:", path)
-                    os.remove(path)
-                for name in dirs:
-                    path = os.path.join(root, name)
-                    self.dbg("Removing dir:", path)
-                    os.rmdir(path)
-        except Exception:
-            self.err(traceback.format_exc())
+        self._count_launch(item.target())
 
 
 class ModernControlPanel(WindowsApps):
     DEFAULT_DISABLE_SETTINGS = False
+    ICON_STORE_DIR = "settings_icons"
+    PROFILE_FILE = "settings_catalog.prof"
+    BASELINE_FILE = "settings_catalog_baseline.json"
+    COMPILED_SETTINGS_FILE = "settings_catalog.json"
+    COMPILED_SETTINGS_VERSION = 2
+    SUGGEST_MIN_INPUT = 2
+    SUGGEST_LIMIT = 10
     ACTION_OPEN = "open_setting"
     ACTION_COPY_URL = "copy_url_settings"
 
     def __init__(self):
         super().__init__()
         self._disable_settings = self.DEFAULT_DISABLE_SETTINGS
+        self._settings_refresh = None
+        self._settings_search = None
+        # key of the current settings and of the published catalog, see _publish_settings()
+        self._settings_lock = threading.Lock()
+        self._settings_key = None
+        self._published_settings_key = None
 
     def _read_config(self):
         self.dbg("Reading config")
@@ -273,9 +930,13 @@ class ModernControlPanel(WindowsApps):
                                                      ["black", "white"])
         self.dbg("preferred_contrast =", self._preferred_contrast)
 
+        self._read_prescale_config(settings)
+
         self._disable_settings = settings.get_bool("disable_settings", "main", self.DEFAULT_DISABLE_SETTINGS)
         self.dbg("disable_settings =", self._disable_settings)
 
+        self._read_diagnostics_config(settings)
+
     def on_catalog(self):
         """Catalogs items for keypirinha
 
@@ -286,10 +947,20 @@ class ModernControlPanel(WindowsApps):
         or plain strings.
         Whichever way the infos are obtained, display name has to be a not empty string.
         (otherwise the item will not be cataloged)
+        The resolved infos are compiled into the package cache and reused as long as the system resources, the UI
+        language and the settings.json stay the same.
         """
+        self._apply_action_labels()
+        self._run_profiled(self._catalog_settings)
+
+    def _catalog_settings(self):
         if self._disable_settings:
             self.dbg("cataloging of windows settings disabled")
-            self.set_catalog([])
+            with self._settings_lock:
+                self._settings_key = None
+            self._publish_settings([], None, None)
+            self._release_icons(self._icon_refs)
+            self._icon_refs = []
             return
 
         actions = []
@@ -306,70 +977,256 @@ class ModernControlPanel(WindowsApps):
         self.set_actions(kp.ItemCategory.KEYWORD, actions)
 
         start_time = time.time()
+        self._stats = timing.CatalogStats(enabled=self._catalog_timings, trace_memory=self._catalog_memory)
+        self._begin_icon_run()
+        old_icon_refs = self._icon_refs
+        self._icon_refs = []
         catalog = []
+        search_index = None
+        compiled_key = None
         try:
-            settings_str = self.load_text_resource("settings.json")
-            settings = json.loads(settings_str)
-            settings_resource_path = os.path.join(os.environ["WINDIR"], "SystemResources")
+            with self._stats.phase("load settings"):
+                settings_str = self.load_text_resource("settings.json")
             settings_icon_path = os.path.join(os.environ["WINDIR"], "ImmersiveControlPanel", "Images", "logo.png")
-            settings_label = helper.AppXPackage.get_resource(settings_resource_path, helper.RESOURCE_SETTINGS_TITLE)
-            if not settings_label:
-                settings_label = helper.AppXPackage.get_resource(settings_resource_path, helper.RESOURCE_SETTINGS_TITLE2)
             settings_icon = self._get_icon("windows.immersivecontrolpanel", settings_icon_path)
 
-            for setting in settings:
-                try:
-                    self.dbg("App Setting:", setting)
-                    if "page_name" in setting and setting["page_name"]:
-                        display_rsrc = helper.RESOURCE_ALT_DISPLAY_FORMAT.format(setting["page_name"])
-                        display_name = helper.AppXPackage.get_resource(settings_resource_path, display_rsrc)
-                        if not display_name:
-                            display_rsrc = helper.RESOURCE_DISPLAY_FORMAT.format(setting["page_name"])
-                            display_name = helper.AppXPackage.get_resource(settings_resource_path, display_rsrc)
-                        desc_rsrc = helper.RESOURCE_DESC_FORMAT.format(setting["page_name"])
-                        desc = helper.AppXPackage.get_resource(settings_resource_path, desc_rsrc)
-                    else:
-                        if "display_name" in setting:
-                            if setting["display_name"].startswith(helper.RESOURCE_PREFIX):
-                                display_name = helper.AppXPackage.get_resource(settings_resource_path,
-                                                                               setting["display_name"])
-                            else:
-                                display_name = setting["display_name"]
+            key = self._compiled_settings_key(settings_str)
+            with self._settings_lock:
+                self._settings_key = key
+            with self._stats.phase("load compiled"):
+                compiled = self._load_compiled_settings()
+            self._stats.kind = "warm" if compiled else "cold"
+            if compiled is None:
+                compiled = self._compile_settings(settings_str, key)
+            elif compiled["key"] != key:
+                self._start_settings_refresh(settings_str, key, settings_icon)
+            catalog = self._create_settings_items(compiled, settings_icon)
+            with self._stats.phase("index settings"):
+                search_index = self._index_settings(compiled)
+            compiled_key = compiled["key"]
+        except Exception as exc:
+            self.err(exc)
+        self._end_icon_run()
+
+        self._publish_settings(catalog, search_index, compiled_key)
+        self._release_icons(old_icon_refs)
+        elapsed = time.time() - start_time
+        self.info("Cataloged {} items in {:0.1f} seconds".format(len(catalog), elapsed))
+        self._report_stats()
+
+    @staticmethod
+    def _settings_resource_path():
+        return os.path.join(os.environ["WINDIR"], "SystemResources")
+
+    def _compiled_settings_key(self, settings_str):
+        """Returns the key the compiled settings are valid for
+
+        The resolved names only change with the system resources, the UI language or the settings.json.
+        """
+        return {
+            "pri": helper.PriIndex(self._settings_resource_path()).signature(),
+            "language": helper.resource_cache.language,
+            "settings": hashlib.sha1(settings_str.encode("utf8")).hexdigest(),
+        }
+
+    def _load_compiled_settings(self):
+        """Loads the compiled settings of an earlier catalog run from the package cache
+        """
+        compiled_path = os.path.join(self.get_package_cache_path(False), self.COMPILED_SETTINGS_FILE)
+        try:
+            with open(compiled_path, "r", encoding="utf8") as compiled_file:
+                compiled = json.load(compiled_file)
+            if compiled.get("version") == self.COMPILED_SETTINGS_VERSION:
+                return compiled
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            self.warn("Failed to load compiled settings:", ex)
+            self.dbg(traceback.format_exc())
+        return None
+
+    def _load_resource_cache(self):
+        """Loads the strings resolved by earlier runs and scans the system resources again
+
+        The resource cache is shared with the WindowsApps plugin, which may be cataloging at the same time, only that
+        plugin starts new runs of it.
+        """
+        helper.resource_cache.rescan(self._settings_resource_path())
+        helper.resource_cache.load(os.path.join(self.get_package_cache_path(False), self.RESOURCE_CACHE_FILE))
+
+    def _compile_settings(self, settings_str, key):
+        """Resolves display names and descriptions of all settings pages and persists them in the package cache
+        """
+        self._load_resource_cache()
+        settings = json.loads(settings_str)
+        settings_resource_path = self._settings_resource_path()
+
+        # all resource strings are resolved at once, the fallback ones only for those that could not be resolved
+        page_names = [setting["page_name"] for setting in settings if setting.get("page_name")]
+        resources = [helper.RESOURCE_SETTINGS_TITLE]
+        for page_name in page_names:
+            resources.append(helper.RESOURCE_ALT_DISPLAY_FORMAT.format(page_name))
+            resources.append(helper.RESOURCE_DESC_FORMAT.format(page_name))
+        for setting in settings:
+            if not setting.get("page_name"):
+                resources.extend(setting[field] for field in ("display_name", "description")
+                                 if setting.get(field, "").startswith(helper.RESOURCE_PREFIX))
+        strings = helper.AppXPackage.get_resources(settings_resource_path, resources)
+
+        fallbacks = [helper.RESOURCE_DISPLAY_FORMAT.format(page_name) for page_name in page_names
+                     if not strings[helper.RESOURCE_ALT_DISPLAY_FORMAT.format(page_name)]]
+        if not strings[helper.RESOURCE_SETTINGS_TITLE]:
+            fallbacks.append(helper.RESOURCE_SETTINGS_TITLE2)
+        strings.update(helper.AppXPackage.get_resources(settings_resource_path, fallbacks))
+
+        settings_label = strings[helper.RESOURCE_SETTINGS_TITLE] or strings.get(helper.RESOURCE_SETTINGS_TITLE2)
+
+        entries = []
+        for setting in settings:
+            try:
+                self.dbg("App Setting:", setting)
+                if "page_name" in setting and setting["page_name"]:
+                    display_name = strings[helper.RESOURCE_ALT_DISPLAY_FORMAT.format(setting["page_name"])]
+                    if not display_name:
+                        display_name = strings[helper.RESOURCE_DISPLAY_FORMAT.format(setting["page_name"])]
+                    desc = strings[helper.RESOURCE_DESC_FORMAT.format(setting["page_name"])]
+                else:
+                    if "display_name" in setting:
+                        if setting["display_name"].startswith(helper.RESOURCE_PREFIX):
+                            display_name = strings[setting["display_name"]]
                         else:
-                            display_name = ""
+                            display_name = setting["display_name"]
+                    else:
+                        display_name = ""
 
-                        if "description" in setting:
-                            if setting["description"].startswith(helper.RESOURCE_PREFIX):
-                                desc = helper.AppXPackage.get_resource(settings_resource_path, setting["description"])
-                            else:
-                                desc = setting["description"]
+                    if "description" in setting:
+                        if setting["description"].startswith(helper.RESOURCE_PREFIX):
+                            desc = strings[setting["description"]]
                         else:
-                            desc = ""
+                            desc = setting["description"]
+                    else:
+                        desc = ""
 
-                    self.dbg("App Setting display_name", display_name)
-                    self.dbg("App Setting description", desc)
+                self.dbg("App Setting display_name", display_name)
+                self.dbg("App Setting description", desc)
 
-                    if not display_name:
-                        self.dbg("App Setting:", setting, "display name empty")
-                        continue
-
-                    catalog.append(self.create_item(
-                        category=kp.ItemCategory.KEYWORD,
-                        label="{}: {} ({})".format(settings_label, display_name, setting["settings_uri"]).strip(),
-                        short_desc=desc if desc else "",
-                        target=setting["settings_uri"],
-                        args_hint=kp.ItemArgsHint.FORBIDDEN,
-                        hit_hint=kp.ItemHitHint.NOARGS,
-                        icon_handle=settings_icon
-                    ))
-                except Exception as ex:
-                    self.warn("App Setting:", setting, "\n", ex)
+                if not display_name:
+                    self.dbg("App Setting:", setting, "display name empty")
+                    continue
+
+                entries.append({
+                    "settings_uri": setting["settings_uri"],
+                    "display_name": display_name,
+                    "description": desc if desc else "",
+                    "keywords": setting.get("keywords", []),
+                })
+            except Exception as ex:
+                self.warn("App Setting:", setting, "\n", ex)
+        self._save_resource_cache()
+
+        compiled = {
+            "version": self.COMPILED_SETTINGS_VERSION,
+            "key": key,
+            "label": settings_label,
+            "settings": entries,
+        }
+        compiled_path = os.path.join(self.get_package_cache_path(True), self.COMPILED_SETTINGS_FILE)
+        try:
+            with open(compiled_path + ".tmp", "w", encoding="utf8") as compiled_file:
+                json.dump(compiled, compiled_file)
+            os.replace(compiled_path + ".tmp", compiled_path)
+        except Exception as ex:
+            self.warn("Failed to save compiled settings:", ex)
+            self.dbg(traceback.format_exc())
+        return compiled
+
+    def _create_settings_items(self, compiled, settings_icon):
+        """Creates the catalog items from compiled settings
+        """
+        catalog = []
+        for entry in compiled["settings"]:
+            catalog.append(self.create_item(
+                category=kp.ItemCategory.KEYWORD,
+                label="{}: {} ({})".format(compiled["label"], entry["display_name"], entry["settings_uri"]).strip(),
+                short_desc=entry["description"],
+                target=entry["settings_uri"],
+                args_hint=kp.ItemArgsHint.FORBIDDEN,
+                hit_hint=kp.ItemHitHint.NOARGS,
+                icon_handle=settings_icon
+            ))
+        return catalog
+
+    def _index_settings(self, compiled):
+        """Returns the index of the display names, keywords and descriptions of the settings pages for the suggestions
+
+        The catalog items are in the order of the compiled settings, so the entry numbers of the index are their
+        positions in the catalog.
+        """
+        index = search.KeywordIndex()
+        for entry in compiled["settings"]:
+            index.add([
+                (2, entry["display_name"]),
+                (2, " ".join(entry["keywords"])),
+                (2, entry["settings_uri"].partition(":")[2]),
+                (1, entry["description"]),
+            ])
+        return index
+
+    def _publish_settings(self, catalog, search_index, compiled_key):
+        """Sets the catalog and the search index of settings compiled for compiled_key, unless they are outdated
+
+        Both the plugin thread and the background refresh publish, the refresh may be done before the plugin thread
+        publishes the outdated settings the refresh was started for. A catalog of another key than the current one is
+        dropped, if the catalog of the current key has been published already.
+        Returns False if the catalog was dropped.
+        """
+        with self._settings_lock:
+            if compiled_key != self._settings_key and self._published_settings_key == self._settings_key:
+                self.dbg("Dropping the catalog of outdated settings")
+                return False
+            self._settings_search = (search_index, catalog) if search_index is not None else None
+            self.set_catalog(catalog)
+            self._published_settings_key = compiled_key
+        return True
+
+    def _start_settings_refresh(self, settings_str, key, settings_icon):
+        """Compiles the settings again in a background thread, the outdated ones are cataloged in the meantime
+        """
+        if self._settings_refresh is not None and self._settings_refresh.is_alive():
+            return
+        self.dbg("Compiled settings are outdated, refreshing in background")
+        self._settings_refresh = threading.Thread(target=self._refresh_settings,
+                                                  args=(settings_str, key, settings_icon),
+                                                  daemon=True)
+        self._settings_refresh.start()
+
+    def _refresh_settings(self, settings_str, key, settings_icon):
+        start_time = time.time()
+        try:
+            compiled = self._compile_settings(settings_str, key)
+            catalog = self._create_settings_items(compiled, settings_icon)
+            if self._publish_settings(catalog, self._index_settings(compiled), key):
+                elapsed = time.time() - start_time
+                self.info("Refreshed {} items in {:0.1f} seconds".format(len(catalog), elapsed))
         except Exception as exc:
             self.err(exc)
+            self.dbg(traceback.format_exc())
 
-        self.set_catalog(catalog)
-        elapsed = time.time() - start_time
-        self.info("Cataloged {} items in {:0.1f} seconds".format(len(catalog), elapsed))
+    def on_suggest(self, user_input, items_chain):
+        """Suggests the settings pages whose keywords or descriptions match the user input
+
+        Pages whose label already contains the input are left to the catalog search.
+        """
+        self._apply_action_labels()
+        settings_search = self._settings_search
+        if items_chain or settings_search is None or len(user_input.strip()) < self.SUGGEST_MIN_INPUT:
+            return
+        index, catalog = settings_search
+        needle = user_input.strip().casefold()
+        suggestions = [catalog[entry] for entry in index.search(user_input)
+                       if needle not in catalog[entry].label().casefold()]
+        if suggestions:
+            self.set_suggestions(suggestions[:self.SUGGEST_LIMIT], kp.Match.ANY, kp.Sort.NONE)
 
     def on_execute(self, item, action):
         self.dbg("Executing (settings):", item.target(), action.name() if action else None)